@@ -1,12 +1,17 @@
-from arcpy import da, env, CreateTable_management, AddField_management, Exists, ListFields
+from arcpy import da, env, CreateTable_management, AddField_management, Exists, ListFields, Describe
+from SMD_Package.load_config import SMDConfigs
+from journal import WriteJournal
+from change_log import RouteChangeLog
 import datetime
 import time
+import os
 
 env.overwriteOutput = True
 
 
 def gdb_table_writer(workspace, dataframe, table_name, cols_dtype, new_table=False, input_routeid='LINKID',
-                     target_routeid='LINKID', write_date=True, replace_key=None):
+                     target_routeid='LINKID', write_date=True, replace_key=None, batch_size=None, journal=True,
+                     change_log=True, data_type=None, year=None, semester=None):
     """
     This function writes input DataFrame as geodatabase event table
     :param workspace: The workspace for target database table
@@ -18,8 +23,21 @@ def gdb_table_writer(workspace, dataframe, table_name, cols_dtype, new_table=Fal
     :param input_routeid: The RouteID column in the input table.
     :param target_routeid: The RouteID column in the target table.
     :param write_date: If True then a date column will be created and filled with current time. Default is True.
+    :param replace_key: The columns used as key for deleting the existing rows. If None then the route column is used.
+    :param batch_size: The amount of route written in a single edit session. If None then the "table_writer"
+    "batch_size" value from SMD config file will be used.
+    :param journal: If True then every committed batch will be recorded in the write journal, so a retried write with
+    the same input will skip the already committed batches.
+    :param change_log: If True then the update date of every written route will be recorded in the route change log.
+    :param data_type: The data type recorded in the route change log.
+    :param year: The data year recorded in the route change log.
+    :param semester: The data semester recorded in the route change log.
     :return:
     """
+    writer_config = getattr(SMDConfigs(), 'table_writer', dict())
+    if batch_size is None:
+        batch_size = writer_config.get('batch_size', 500)
+
     env.workspace = workspace  # Environment workspace
     env.overwriteOutput = True
     table_exist = Exists(table_name)  # Check if the table already exist in the workspace.
@@ -44,47 +62,144 @@ def gdb_table_writer(workspace, dataframe, table_name, cols_dtype, new_table=Fal
         AddField_management(table_name, str(col), col_dtype)
 
     input_routes = dataframe[input_routeid].unique().tolist()  # List of every route in the input DataFrame
+    table_column = list(cols_dtype.keys())  # The written columns, in the same order as the inserted row
+
+    if write_date:
+        table_column_date = table_column+[date_column]
+    else:
+        table_column_date = table_column
+
+    route_batches = [input_routes[x: x+batch_size] for x in range(0, len(input_routes), batch_size)]
+
+    if journal:
+        journal_path = writer_config.get('journal', 'write_journal.sqlite')
+        if not os.path.isabs(journal_path):
+            journal_path = os.path.join(SMDConfigs.smd_dir(), journal_path)
+
+        write_journal = WriteJournal(journal_path)
+        job_id = write_journal.job_id(workspace, table_name, dataframe, table_column, replace_key, batch_size)
+        committed = write_journal.committed_batches(job_id)  # Batches committed by the previous failed job
+    else:
+        write_journal = None
+        job_id = None
+        committed = set()
+
+    if change_log:
+        route_log = route_change_log()
+    else:
+        route_log = None
+
+    versioned = getattr(Describe(table_name), 'isVersioned', False)  # The versioned table requires versioned edit
+    editor = da.Editor(workspace)
+
+    for batch_index, batch_routes in enumerate(route_batches):  # Iterate for every route batch
+        if batch_index in committed:  # The batch is already committed
+            continue
+
+        df_batch = dataframe.loc[dataframe[input_routeid].isin(batch_routes)]  # The batch DataFrame
+        replace_clause = _replace_clause(df_batch, batch_routes, input_routeid, target_routeid, cols_dtype,
+                                         replace_key)
+
+        # The delete and insert is committed at the end of the edit session, or rolled back if any error occurred.
+        # The edit session is started without undo/redo stack.
+        editor.startEditing(False, versioned)
+        editor.startOperation()
+
+        try:
+            with da.UpdateCursor(table_name, target_routeid, where_clause=replace_clause)\
+                    as del_cursor:
+                for _ in del_cursor:
+                    del_cursor.deleteRow()  # If the route already exist in the table then delete the whole route row
+
+            update_date = datetime.datetime.now()  # Single date value for the whole batch
+
+            with da.InsertCursor(table_name, table_column_date) as insert_cursor:  # Create an insert cursor
+                for row in df_batch[table_column].itertuples(index=False):  # Iterate over available rows
+                    if write_date:
+                        insert_cursor.insertRow(tuple(row) + (update_date,))  # Date value at the last index
+                    else:
+                        insert_cursor.insertRow(tuple(row))  # Insert the new row
+        except Exception:
+            editor.abortOperation()
+            editor.stopEditing(False)  # Discard the batch edits
+            raise
 
-    for route in input_routes:  # Iterate for every available route in the input
-        df_route = dataframe.loc[dataframe[input_routeid] == route]  # The route DataFrame
+        editor.stopOperation()
+        editor.stopEditing(True)
 
-        if replace_key is None:
-            replace_clause = "{0}='{1}'".format(target_routeid, route)
-        else:
-            if type(replace_key) != list:
-                raise TypeError
-            else:
-                replace_clause = ''
-                for key in replace_key:
-                    value = df_route[key].tolist()[0]
-                    key_type = cols_dtype[key]['dtype']
-
-                    if key_type != 'string':
-                        statement = "({0} = {1})".format(key, value)
-                    else:
-                        statement = "({0} = '{1}')".format(key, str(value))
+        if write_journal is not None:
+            write_journal.commit(job_id, table_name, batch_index, batch_routes)
 
-                    if replace_clause == '':
-                        replace_clause = statement
-                    else:
-                        replace_clause = replace_clause + ' AND ' + statement
+        if route_log is not None:
+            route_log.record(table_name, batch_routes, update_date, data_type=data_type, year=year, semester=semester)
+
+    if write_journal is not None:
+        write_journal.finish(job_id)  # All batches are committed
+
+    return
+
+
+def route_change_log():
+    """
+    The route change log specified in the SMD config file "table_writer" "change_log" key.
+    :return: RouteChangeLog object.
+    """
+    writer_config = getattr(SMDConfigs(), 'table_writer', dict())
+    log_path = writer_config.get('change_log', 'route_change_log.sqlite')
+    if not os.path.isabs(log_path):
+        log_path = os.path.join(SMDConfigs.smd_dir(), log_path)
 
-        if write_date:
-            table_column = cols_dtype.keys()+[date_column]
+    return RouteChangeLog(log_path)
+
+
+def _replace_clause(df_batch, batch_routes, input_routeid, target_routeid, cols_dtype, replace_key=None):
+    """
+    This function create a set based where clause for deleting the existing rows of a route batch.
+    :param df_batch: The batch DataFrame.
+    :param batch_routes: The routes in the batch.
+    :param input_routeid: The RouteID column in the input table.
+    :param target_routeid: The RouteID column in the target table.
+    :param cols_dtype: The column details.
+    :param replace_key: The column used as key for deleting existing rows. The key value for every route is taken from
+    the route first row.
+    :return: Where clause string.
+    """
+    def value_statement(key, value):
+        if cols_dtype[key]['dtype'] != 'string':
+            return "{0} = {1}".format(key, value)
         else:
-            table_column = cols_dtype.keys()
+            return "{0} = '{1}'".format(key, str(value))
+
+    if replace_key is None:
+        return "{0} IN ({1})".format(target_routeid, str([str(x) for x in batch_routes]).strip('[]'))
+
+    if type(replace_key) != list:
+        raise TypeError("replace_key should be a list.")
+
+    first_rows = df_batch.drop_duplicates(input_routeid)  # The first row of every route in the batch
+    other_keys = [x for x in replace_key if x != input_routeid]
+
+    if input_routeid not in replace_key:  # Every route has its own key statement
+        statements = list()
+        for _, row in first_rows[replace_key].drop_duplicates().iterrows():
+            statements.append('(' + ' AND '.join([value_statement(x, row[x]) for x in replace_key]) + ')')
+
+        return ' OR '.join(statements)
 
-        with da.UpdateCursor(table_name, target_routeid, where_clause=replace_clause)\
-                as del_cursor:
-            for _ in del_cursor:
-                del_cursor.deleteRow()  # If the route already exist in the table then delete the whole route row
+    # Group the route based on the other key value, so every group only requires a single IN statement.
+    statements = list()
+    if len(other_keys) == 0:
+        groups = [((), first_rows)]
+    else:
+        groups = first_rows.groupby(other_keys)
 
-        with da.InsertCursor(table_name, table_column) as insert_cursor:  # Create an insert cursor
-            for index, row in df_route.iterrows():  # Iterate over available rows
-                row_object = []
+    for key_value, group in groups:
+        if type(key_value) != tuple:
+            key_value = (key_value,)
 
-                for col_name in cols_dtype.keys():  # Iterate only column which has been specified in config
-                    row_object.append(row[col_name])
+        group_routes = str([str(x) for x in group[input_routeid].tolist()]).strip('[]')
+        statement = ["{0} IN ({1})".format(input_routeid, group_routes)]
+        statement += [value_statement(key, value) for key, value in zip(other_keys, key_value)]
+        statements.append('(' + ' AND '.join(statement) + ')')
 
-                row_object.append(datetime.datetime.now())  # Add date value which at the last index
-                insert_cursor.insertRow(row_object)  # Insert the new row
+    return ' OR '.join(statements)
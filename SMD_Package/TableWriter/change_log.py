@@ -0,0 +1,149 @@
+import pandas as pd
+import sqlite3
+import datetime
+
+
+class RouteChangeLog(object):
+    """
+    Local SQLite log which records the last update date of every route written to a table. The log is updated by
+    gdb_table_writer, so the outdated route of a summary table can be selected with an indexed lookup instead of
+    querying the MAX(UPDATE_DATE) of every route from the source table.
+    """
+    date_format = '%Y-%m-%d %H:%M:%S.%f'
+    sqlite_max_vars = 900  # Maximum number of bind parameter in a single statement.
+
+    def __init__(self, db_path):
+        """
+        Class initialization.
+        :param db_path: The SQLite change log file path.
+        """
+        self.db_path = db_path
+
+        con = self.connect()
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS route_change "
+                        "(table_name TEXT, route TEXT, data_type TEXT, year TEXT, semester TEXT, update_date TEXT, "
+                        "PRIMARY KEY (table_name, route, year, semester))")
+            con.execute("CREATE INDEX IF NOT EXISTS route_change_type "
+                        "ON route_change (data_type, year, semester, route)")
+            con.execute("CREATE TABLE IF NOT EXISTS tracked_table (table_name TEXT PRIMARY KEY, seed_date TEXT)")
+        con.close()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    @staticmethod
+    def _key(value):
+        """
+        The year or semester key value, None is stored as an empty string so the primary key stays unique. A whole
+        float value (read from a table column with null value) is stored as an integer.
+        """
+        if (value is None) or pd.isnull(value):
+            return ''
+        elif isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        else:
+            return str(value)
+
+    def record(self, table_name, routes, update_date=None, data_type=None, year=None, semester=None):
+        """
+        Record the update date of the written routes.
+        :param table_name: The written table name.
+        :param routes: The written routes.
+        :param update_date: The update date written to the table, if None then the current time is used.
+        :param data_type: The data type of the written table.
+        :param year: The data year of the written rows.
+        :param semester: The data semester of the written rows.
+        :return:
+        """
+        if update_date is None:
+            update_date = datetime.datetime.now()
+
+        rows = [(str(table_name).upper(), str(route), self._key(data_type), self._key(year), self._key(semester),
+                 update_date.strftime(self.date_format)) for route in routes]
+
+        con = self.connect()
+        with con:
+            con.executemany("INSERT OR REPLACE INTO route_change VALUES (?, ?, ?, ?, ?, ?)", rows)
+        con.close()
+
+        return self
+
+    def seed(self, table_name, route_dates, routes='ALL'):
+        """
+        Record the route update date read from the table itself, used for a table which was written before the change
+        log exists. If every route is seeded then the table is marked as tracked, so a route which is missing from the
+        log does not exist in the table.
+        :param table_name: The table name.
+        :param route_dates: List of (route, year, semester, update date), the update date is the latest update date of
+        the route rows with the year and semester. The year and semester is None if the table does not have the year
+        or semester column.
+        :param routes: The seeded route selection, 'ALL' or list of route.
+        :return:
+        """
+        table_name = str(table_name).upper()
+        rows = [(table_name, str(route), '', self._key(year), self._key(semester),
+                 pd.Timestamp(date).strftime(self.date_format))
+                for route, year, semester, date in route_dates if pd.notnull(date)]
+
+        con = self.connect()
+        with con:
+            con.executemany("INSERT OR IGNORE INTO route_change VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+            if routes == 'ALL':
+                con.execute("INSERT OR REPLACE INTO tracked_table VALUES (?, ?)",
+                            (table_name, datetime.datetime.now().strftime(self.date_format)))
+        con.close()
+
+        return self
+
+    def is_tracked(self, table_name):
+        """
+        Check if every route of the table is recorded in the change log.
+        :param table_name: The table name.
+        :return: Boolean.
+        """
+        con = self.connect()
+        row = con.execute("SELECT 1 FROM tracked_table WHERE table_name = ?", (str(table_name).upper(),)).fetchone()
+        con.close()
+
+        return row is not None
+
+    def route_dates(self, table_name, routes='ALL', year=None, semester=None):
+        """
+        The last update date of every requested route in the table.
+        :param table_name: The table name.
+        :param routes: 'ALL' or list of route.
+        :param year: If not None then only the rows written for the year are used.
+        :param semester: If not None then only the rows written for the semester are used.
+        :return: DataFrame with 'route' and 'update_date' column.
+        """
+        statement = "SELECT route, MAX(update_date) FROM route_change WHERE table_name = ?"
+        params = [str(table_name).upper()]
+
+        if year is not None:
+            statement += " AND year = ?"
+            params.append(self._key(year))
+        if semester is not None:
+            statement += " AND semester = ?"
+            params.append(self._key(semester))
+
+        con = self.connect()
+
+        if routes == 'ALL':
+            rows = con.execute(statement + " GROUP BY route", params).fetchall()
+        else:
+            routes = [str(x) for x in routes]
+            rows = list()
+
+            for i in range(0, len(routes), self.sqlite_max_vars):  # The route IN list is split into chunks.
+                chunk = routes[i: i+self.sqlite_max_vars]
+                chunk_statement = statement + " AND route IN ({0}) GROUP BY route".format(','.join('?'*len(chunk)))
+                rows += con.execute(chunk_statement, params + chunk).fetchall()
+
+        con.close()
+
+        df = pd.DataFrame(rows, columns=['route', 'update_date'])
+        df['update_date'] = pd.to_datetime(df['update_date'], format=self.date_format)
+
+        return df
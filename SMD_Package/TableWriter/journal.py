@@ -0,0 +1,89 @@
+from pandas.util import hash_pandas_object
+import hashlib
+import sqlite3
+import datetime
+
+
+class WriteJournal(object):
+    """
+    Local SQLite journal which records every committed route batch of a table write job. If a write job fails, the
+    retried job (with the same input) will skip the already committed batches. The job records are removed when the
+    job is finished.
+    """
+    def __init__(self, db_path):
+        """
+        Class initialization.
+        :param db_path: The SQLite journal file path.
+        """
+        self.db_path = db_path
+
+        con = self.connect()
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS committed_batch "
+                        "(job_id TEXT, table_name TEXT, batch_index INTEGER, routes TEXT, commit_date TEXT, "
+                        "PRIMARY KEY (job_id, batch_index))")
+        con.close()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    @staticmethod
+    def job_id(workspace, table_name, dataframe, columns, replace_key=None, batch_size=None):
+        """
+        Create the job ID from the target workspace, the target table and the written DataFrame content.
+        :param workspace: The target table workspace.
+        :param table_name: The target table name.
+        :param dataframe: The written DataFrame.
+        :param columns: The written columns.
+        :param replace_key: The replace key used by the writer.
+        :param batch_size: The route batch size.
+        :return: Job ID string.
+        """
+        md5 = hashlib.md5()
+        md5.update(str([workspace, table_name, sorted(columns), replace_key, batch_size]))
+        md5.update(hash_pandas_object(dataframe[sorted(columns)], index=False).values.tobytes())
+
+        return md5.hexdigest()
+
+    def committed_batches(self, job_id):
+        """
+        List all committed batch index of a job.
+        :param job_id: The job ID.
+        :return: Set of batch index.
+        """
+        con = self.connect()
+        rows = con.execute("SELECT batch_index FROM committed_batch WHERE job_id = ?", (job_id,)).fetchall()
+        con.close()
+
+        return set([row[0] for row in rows])
+
+    def commit(self, job_id, table_name, batch_index, routes):
+        """
+        Record a committed batch.
+        :param job_id: The job ID.
+        :param table_name: The target table name.
+        :param batch_index: The batch index.
+        :param routes: The routes in the batch.
+        :return:
+        """
+        con = self.connect()
+        with con:
+            con.execute("INSERT OR REPLACE INTO committed_batch VALUES (?, ?, ?, ?, ?)",
+                        (job_id, table_name, batch_index, ','.join([str(x) for x in routes]),
+                         datetime.datetime.now().isoformat()))
+        con.close()
+
+        return self
+
+    def finish(self, job_id):
+        """
+        Remove all the job record after all of the batches are committed.
+        :param job_id: The job ID.
+        :return:
+        """
+        con = self.connect()
+        with con:
+            con.execute("DELETE FROM committed_batch WHERE job_id = ?", (job_id,))
+        con.close()
+
+        return self
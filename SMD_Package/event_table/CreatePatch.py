@@ -3,8 +3,9 @@ This script will create a patch for end gap in a Event Table
 """
 
 import numpy as np
-from arcpy import env, da
+from arcpy import env, AddWarning
 from pandas import concat
+from SMD_Package.event_table.lrs import cached_route
 
 
 def create_patch(input_df, lrs_network, lrs_routeid, routeid_col='LINKID', from_m_col='STA_FROM', to_m_col='STA_TO',
@@ -42,14 +43,16 @@ def create_patch(input_df, lrs_network, lrs_routeid, routeid_col='LINKID', from_
     for route in input_routes:
         df_route = df.loc[df[routeid_col] == route]  # Create route DataFrame
 
-        # Access the LRS Network to get LRS geometry for current route
-        with da.SearchCursor(lrs_network, 'SHAPE@', where_clause="{0}='{1}'".format(lrs_routeid, route)) as cursor:
-            for row in cursor:
-                lrs_geom = row[0]
+        # Get the LRS geometry for current route from the geometry cache
+        lrs_geom = cached_route(route, lrs_network, lrs_routeid, date_query=False)
+
+        if lrs_geom is None:  # The route does not exist in the LRS Network
+            AddWarning("Rute {0} tidak terdapat pada LRS Network, patch tidak dibuat untuk rute ini.".format(route))
+            continue
 
         # Check if route data is shorter than LRS
         route_data_max = df_route[to_m_col].max()
-        lrs_max = lrs_geom.lastPoint.M
+        lrs_max = lrs_geom.max_m
         max_diff = lrs_max - route_data_max
         if route_data_max < lrs_max:  # If the route event data is shorter than LRS max m value.
 
@@ -84,7 +87,7 @@ def create_patch(input_df, lrs_network, lrs_routeid, routeid_col='LINKID', from_
                         _to_m = new_from_m[index]+increment  # The to measure of new row
                         _lane_code = lane  # The lane code of new row
 
-                        _point_geom = lrs_geom.positionAlongLine(_from_m*to_meters).projectAs('4326')
+                        _point_geom = lrs_geom.position_along_line(_from_m*to_meters, projection='4326')
                         _x_coords = _point_geom.lastPoint.X
                         _y_coords = _point_geom.lastPoint.Y
                         _z_val = _point_geom.lastPoint.Z
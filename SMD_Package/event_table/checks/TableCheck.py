@@ -2,12 +2,17 @@ from arcpy import env, da
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from SMD_Package.FCtoDataFrame import event_fc_to_df
 from SMD_Package.event_table.kemantapan.kemantapan import Kemantapan
 from SMD_Package.event_table.RNITable import RNIRouteDetails, add_rni_data
 from SMD_Package.load_config import SMDConfigs
 from SMD_Package.event_table.rni.summary import RNISummary
+from SMD_Package.event_table.prefetch import RoutePrefetch
+from SMD_Package.event_table import lrs
+from SMD_Package.event_table.reference_length import ReferenceLength
 import coordinate
+from violation import ViolationStore
 
 
 class EventValidation(object):
@@ -26,8 +31,9 @@ class EventValidation(object):
         self.sde_connection = db_conn  # The specifier gdb connection incl db version and username
 
         self.error_list = []  # List for storing the error message for all checks
-        self.route_results = {}
+        self.violations = ViolationStore()  # The check result of every route
         self.df_valid = None  # df_valid is pandas DataFrame which has the correct data type and value for all columns
+        self.error_mask = None  # Boolean DataFrame of the data type error for every column, shared by all checks
         self.header_check_result = self.header_check()  # The header checking result
         self.dtype_check_result = self.dtype_check(write_error=True)  # The data type checking result
         self.missing_route = []  # List for storing all route which is not in the balai route domain
@@ -35,6 +41,7 @@ class EventValidation(object):
         self.config = SMDConfigs()
         self.rni_mfactor = 1
         self._coordinate_status = dict()  # For storing route's coordinate status
+        self.prefetch = RoutePrefetch(db_conn)  # Bulk loaded reference data for the valid routes
 
         if self.header_check_result is None:
             self.capitalize_string()  # Capitalize every column with string data type
@@ -81,17 +88,31 @@ class EventValidation(object):
         """
         error_list = []
 
+        # The error message for every data type, (column message, route message).
+        dtype_messages = {
+            "numeric": ('{0} memiliki nilai bukan angka (integer/decimal) pada baris {1}.',
+                        'Rute {0} pada kolom {1} memiliki nilai non-numeric pada baris {2}.'),
+            "date": ('{0} memiliki tanggal yang tidak sesuai dengan format (dd/mm/yyyy) pada baris{1}.',
+                     'Rute {0} pada kolom {1} memiliki tanggal yang tidak sesuai dengan format baris{2}.'),
+            "string": ('{0} memiliki baris yang tidak diisi (Null/kosong) pada baris {1}.',
+                       'Rute {0} pada kolom {1} memiliki baris yang tidak diisi pada baris {2}.')
+        }
+
         # Run the header check method
         self.header_check()
         if self.header_check_result is None:  # If there is no problem with the header then continue
 
-            df = self.df_string.copy(deep=True)
+            df_string = self.df_string
+            typed_cols = dict()  # The converted column
+            error_mask = OrderedDict()  # The error mask for every column
+            route_ids = df_string[routeid_col].values
+
             for col in self.column_details:  # Iterate over every column in required col dict
                 col_name = col  # Column name
                 col_dtype = self.column_details[col]['dtype']  # Column data types
                 allow_null = False  # If True then Null value from input will not raise an error.
                 raise_error = True  # If False then no error message will be written.
-                null_input = df[col_name].isnull()  # Row with null input
+                null_input = df_string[col_name].isnull().values  # Row with null input
 
                 if 'allow_null' in self.column_details[col].keys():  # If there is 'allow_null' key in the JSON
                     allow_null = self.column_details[col]['allow_null']
@@ -103,89 +124,56 @@ class EventValidation(object):
 
                     # Convert the column to numeric
                     # If the column contain non numerical value, then change that value to Null
-                    df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
-                    error_null = df[col_name].isnull()  # Null value from the coerce
+                    converted = pd.to_numeric(df_string[col_name], errors='coerce')
 
                     if 'decimals' in self.column_details[col].keys():  # If there is 'decimal' key in the JSON
                         decimal_places = int(self.column_details[col]['decimals'])
-                        df[col_name] = df[col_name].round(decimals=decimal_places)
+                        converted = converted.round(decimals=decimal_places)
 
-                    if allow_null:
-                        error_row = df.loc[~null_input & error_null, [routeid_col, col_name]]  # Null value from the coerce not from the input
-                    else:
-                        error_row = df.loc[error_null, [routeid_col, col_name]]  # Find the row with Null value
-
-                    # If there is an error
-                    if len(error_row) != 0 and raise_error:
-                        excel_i = [x + 2 for x in error_row.index.tolist()]
-                        error_message = '{0} memiliki nilai bukan angka (integer/decimal) pada baris {1}.'\
-                            .format(col_name, str(excel_i))
-                        error_list.append(error_message)
-
-                        if write_error:
-                            for index, row in error_row.iterrows():
-                                result = 'Rute {0} pada kolom {1} memiliki nilai non-numeric pada baris {2}.'. \
-                                    format(row[routeid_col], col_name, index + 2)
-                                self.insert_route_message(row[routeid_col], "error", result)
-
-                            self.error_list.append(error_message)
+                    typed_cols[col_name] = converted
+                    error_null = converted.isnull().values  # Null value from the coerce
+                    messages = dtype_messages['numeric']
 
                 elif col_dtype == 'date':  # Check for date column
 
                     # Convert the column to a date data type
                     # If the column contain an invalid date format, then change that value to Null
-                    df[col_name] = pd.to_datetime(df[col_name], errors='coerce', format='%d/%m/%Y')
-                    error_null = df[col_name].isnull()
-
-                    if allow_null:
-                        error_row = df.loc[~null_input & error_null, [routeid_col, col_name]]  # Null value from the coerce not from the input
-                    else:
-                        error_row = df.loc[error_null, [routeid_col, col_name]]  # Find the row with Null value
-
-                    error_i = error_row.index.tolist()  # Find the index of the null
-
-                    # If there is an error
-                    if len(error_i) != 0 and raise_error:
-                        excel_i = [x + 2 for x in error_i]
-                        error_message = '{0} memiliki tanggal yang tidak sesuai dengan format (dd/mm/yyyy) pada baris{1}.'\
-                            .format(col_name, str(excel_i))
-                        error_list.append(error_message)
-
-                        if write_error:
-                            for index, row in error_row.iterrows():
-                                result = 'Rute {0} pada kolom {1} memiliki tanggal yang tidak sesuai dengan format baris{2}.'. \
-                                    format(row[routeid_col], col_name, index + 2)
-                                self.insert_route_message(row[routeid_col], "error", result)
-
-                            self.error_list.append(error_message)
+                    converted = pd.to_datetime(df_string[col_name], errors='coerce', format='%d/%m/%Y')
+                    typed_cols[col_name] = converted
+                    error_null = converted.isnull().values
+                    messages = dtype_messages['date']
 
                 elif col_dtype == 'string':
+                    error_null = null_input
+                    messages = dtype_messages['string']
 
-                    if allow_null:
-                        continue
-                    elif col_name == routeid_col:
-                        error_row = df.loc[null_input, [col_name]]
-                    else:
-                        error_row = df.loc[null_input, [routeid_col, col_name]]  # Find the row with Null value
+                else:
+                    continue
+
+                if allow_null:
+                    error_mask[col_name] = ~null_input & error_null  # Null value from the coerce not from the input
+                else:
+                    error_mask[col_name] = error_null
 
-                    error_i = error_row.index.tolist()  # Find the index of the null
+                error_ind = np.flatnonzero(error_mask[col_name])  # The position of the row with error
 
-                    # If there is an error
-                    if len(error_i) != 0 and raise_error:
-                        excel_i = [x + 2 for x in error_i]
-                        error_message = '{0} memiliki baris yang tidak diisi (Null/kosong) pada baris {1}.'\
-                            .format(col_name, str(excel_i))
-                        error_list.append(error_message)
+                # If there is an error
+                if len(error_ind) != 0 and raise_error:
+                    excel_i = (df_string.index[error_ind] + 2).tolist()
+                    error_message = messages[0].format(col_name, str(excel_i))
+                    error_list.append(error_message)
 
-                        if write_error:
-                            for index, row in error_row.iterrows():
-                                result = 'Rute {0} pada kolom {1} memiliki baris yang tidak diisi pada baris {2}.'. \
-                                    format(row[routeid_col], col_name, index + 2)
-                                self.insert_route_message(row[routeid_col], "error", result)
+                    if write_error:
+                        for route, row_i in zip(route_ids[error_ind], excel_i):
+                            result = messages[1].format(route, col_name, row_i)
+                            self.insert_route_message(route, "error", result)
 
-                            self.error_list.append(error_message)
+                        self.error_list.append(error_message)
 
-            self.df_valid = df  # Assign the df (the check result) as self.df_valid
+            # Single copy of the input table, with the converted column replacing the string column.
+            self.df_valid = pd.DataFrame(OrderedDict((col, typed_cols.get(col, df_string[col])) for col in df_string),
+                                         index=df_string.index, columns=df_string.columns)
+            self.error_mask = pd.DataFrame(error_mask, index=df_string.index, columns=list(error_mask), dtype=bool)
 
             # If the check does not detect error then return None
             if len(error_list) == 0:
@@ -310,6 +298,7 @@ class EventValidation(object):
                 result = "Rute {0} bukan kewenangan balai {1}.".format(missing_route, balai_code)
                 self.insert_route_message(missing_route, 'error', result)
 
+        self.prefetch.set_routes(self.valid_route)  # Prefetch the reference data for all valid routes
         return self
 
     def route_selection(self, selection='ALL'):
@@ -320,7 +309,7 @@ class EventValidation(object):
         :return:
         """
         if selection == 'ALL':
-            return self
+            pass
         else:
             if type(selection) == str or type(selection) == unicode:
                 route_exist = np.any(np.in1d(self.valid_route, selection))
@@ -344,13 +333,19 @@ class EventValidation(object):
                         self.insert_route_message(missing_route, 'error', error_message)
                         self.valid_route = list()  # Return an empty list
 
+        self.prefetch.set_routes(self.valid_route)  # Prefetch the reference data for the selected routes
         return self
 
     def range_domain_check(self, routes='ALL', routeid_col='LINKID', from_m_col='STA_FROM', to_m_col='STA_TO',
                            lane_code='LANE_CODE', **kwargs):
         """
         This function checks every value in a specified data column, to match the specified range value defined by
-        parameter upper and lower (lower < [value] < upper).
+        parameter upper and lower (lower < [value] < upper) and the specified domain value.
+
+        All of the range and domain rules is evaluated as a single columnar pass which produces a violation table
+        (row index, column, rule, status). Every (column, rule, status) group of the violation table is inserted in
+        batch to the violation store, the message is rendered from the group template only when the message is
+        requested.
         :param routes: Route selection.
         :param routeid_col: The Route ID column in the input table.
         :param from_m_col: The From Measure column in the input table.
@@ -358,182 +353,171 @@ class EventValidation(object):
         :param lane_code: The lane code column in the input table.
         :return: self
         """
-        df = self.copy_valid_df()
-
-        if routes == 'ALL':
-            pass
-        else:
-            df = self.selected_route_df(df, routes, routeid_col=routeid_col)
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col, copy=False)  # The DataFrame is not modified
+        violation_cols = ['row', 'column', 'rule', 'status']
+        violations = list()
 
         for column in self.column_details.keys():
             allow_null = self.column_details[column].get('allow_null')
+            not_null = df[column].notnull().values
 
             if 'range' in self.column_details[column].keys():
                 range_details = self.column_details[column]['range']
-                upper_bound = range_details['upper']  # The range upper bound
-                lower_bound = range_details['lower']  # The range lower bound
-                eq_upper = range_details['eq_upper']  # Equal with the upper bound
-                eq_lower = range_details['eq_lower']  # Equal with the lower bound
-                review = range_details['review']  # As To Be Reviewed message or as an Error Message
-                status_col = '_status'
-                df[status_col] = pd.Series(None)  # Create an empty column for storing row status
-
-                # The upper value mask
-                if upper_bound is None:
-                    upper_mask = False
-                else:
-                    if eq_upper:
-                        upper_mask = df[column] > upper_bound
-                    else:
-                        upper_mask = df[column] >= upper_bound
-
-                # The lower value mask
-                if lower_bound is None:
-                    lower_mask = False
-                else:
-                    if eq_lower:
-                        lower_mask = df[column] < lower_bound
-                    else:
-                        lower_mask = df[column] <= lower_bound
-
-                # Give the error status for the lower and upper mask
-                df.loc[upper_mask | lower_mask, [status_col]] = 'error'
-
-                # Check the review condition
-                if review is True:
-                    df.loc[upper_mask | lower_mask, [status_col]] = 'ToBeReviewed'
-                elif review == 'upper':
-                    df.loc[upper_mask, [status_col]] = 'ToBeReviewed'
-                elif review == 'lower':
-                    df.loc[lower_mask, [status_col]] = 'ToBeReviewed'
-                elif type(review) == dict:
-                    rev_upper = review['upper']
-                    rev_lower = review['lower']
-                    rev_eq_upper = review['eq_upper']
-                    rev_eq_lower = review['eq_lower']
-                    direction = review['direction']
-
-                    # Give the ToBeReviewed Status
-                    # Does not override any 'error' status
-                    if direction == 'inward':
-                        # The upper value mask
-                        if rev_eq_upper:
-                            rev_upper_mask = df[column] <= rev_upper
-                        else:
-                            rev_upper_mask = df[column] < rev_upper
-
-                        # The lower value mask
-                        if rev_eq_lower:
-                            rev_lower_mask = df[column] >= rev_lower
-                        else:
-                            rev_lower_mask = df[column] > rev_lower
-
-                        df.loc[rev_upper_mask & rev_lower_mask & df[status_col].isnull(), [status_col]] = 'ToBeReviewed'
-
-                    if direction == 'outward':
-                        # The upper value mask
-                        if rev_eq_upper:
-                            rev_upper_mask = df[column] >= rev_upper
-                        else:
-                            rev_upper_mask = df[column] > rev_upper
-
-                        # The lower value mask
-                        if rev_eq_lower:
-                            rev_lower_mask = df[column] <= rev_lower
-                        else:
-                            rev_lower_mask = df[column] < rev_lower
-
-                        df.loc[(rev_upper_mask | rev_lower_mask) & df[status_col].isnull(), [status_col]] = 'ToBeReviewed'
+                status = self._range_status(df[column], range_details)
 
                 if allow_null:
-                    error_row = df.loc[(df[status_col].notnull()) & (df[column].notnull())]
-                else:
-                    error_row = df.loc[df[status_col].notnull()]  # Find the faulty row
+                    status[~not_null] = None
+
+                flagged = pd.notnull(status)
 
-                if len(error_row) != 0:
+                if flagged.any():
                     # Create error message
-                    excel_i = [x + 2 for x in error_row.index.tolist()]  # Create row for excel file index
+                    excel_i = (df.index[flagged] + 2).tolist()  # Create row for excel file index
                     error_message = '{0} memiliki nilai yang berada di luar rentang ({1}<{0}<{2}), pada baris {3}'. \
-                        format(column, lower_bound, upper_bound, excel_i)
+                        format(column, range_details['lower'], range_details['upper'], excel_i)
                     self.error_list.append(error_message)  # Append to the error message
 
-                    for index, row in error_row.iterrows():
-                        msg_status = row[status_col]
-
-                        if (msg_status == 'error') or ((msg_status == 'ToBeReviewed') and (review is True)):
-                            if from_m_col is None or to_m_col is None:
-                                result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({2}<{1}<{3}), pada baris {4}.".\
-                                    format(row[routeid_col], column, lower_bound, upper_bound, index+2)
-                            else:
-                                result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({2}<{1}<{3}), pada segmen {4}-{5} lane {6} yaitu {7}". \
-                                    format(row[routeid_col], column, lower_bound, upper_bound, row[from_m_col],
-                                           row[to_m_col], row[lane_code], row[column])
-
-                        elif (msg_status == 'ToBeReviewed') and review == 'upper':
-                            if from_m_col is None or to_m_col is None:
-                                result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({1}>{3}), pada baris {4}.".\
-                                    format(row[routeid_col], column, lower_bound, upper_bound, index+2)
-                            else:
-                                result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({1}>{3}), pada segmen {4}-{5} {6} yaitu {7}". \
-                                    format(row[routeid_col], column, lower_bound, upper_bound, row[from_m_col],
-                                           row[to_m_col], row[lane_code], row[column])
-
-                        elif (msg_status == 'ToBeReviewed') and review == 'lower':
-                            if from_m_col is None or to_m_col is None:
-                                result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({1}<{2}), pada baris {4}.".\
-                                    format(row[routeid_col], column, lower_bound, upper_bound, index+2)
-                            else:
-                                result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({1}<{2}), pada segmen {4}-{5} lane {6} yaitu {7}". \
-                                    format(row[routeid_col], column, lower_bound, upper_bound, row[from_m_col],
-                                           row[to_m_col], row[lane_code], row[column])
-
-                        elif (msg_status == 'ToBeReviewed') and type(review) == dict:
-                            if direction == 'outward':
-                                if from_m_col is None or to_m_col is None:
-                                    result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({1}<{2} atau {1}>{3}), pada baris {4}.". \
-                                        format(row[routeid_col], column, rev_lower, rev_upper, index + 2)
-                                else:
-                                    result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({1}<{2} atau {1}>{3}), pada segmen {4}-{5} lane {6} yaitu {7}". \
-                                        format(row[routeid_col], column, rev_lower, rev_upper, row[from_m_col],
-                                               row[to_m_col], row[lane_code], row[column])
-
-                            if direction == 'inward':
-                                if from_m_col is None or to_m_col is None:
-                                    result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({2}<{1}<{3}), pada baris {4}.". \
-                                        format(row[routeid_col], column, rev_lower, rev_upper, index + 2)
-                                else:
-                                    result = "Rute {0} memiliki nilai {1} yang berada di luar rentang ({2}<{1}<{3}), pada segmen {4}-{5} lane {6} yaitu {7}". \
-                                        format(row[routeid_col], column, rev_lower, rev_upper, row[from_m_col],
-                                               row[to_m_col], row[lane_code], row[column])
-
-                        # Insert the error message depend on the message status (as an Error or Review)
-                        self.insert_route_message(row[routeid_col], msg_status, result)
+                    violations.append(pd.DataFrame({'row': df.index[flagged], 'column': column, 'rule': 'range',
+                                                    'status': status[flagged]}, columns=violation_cols))
 
             if 'domain' in self.column_details[column].keys():
                 val_domain = self.column_details[column]['domain']  # The domain list
+                flagged = ~df[column].isin(val_domain).values
 
                 if allow_null:
-                    error_row = df.loc[(~df[column].isin(val_domain)) & (df[column].notnull())]
-                else:
-                    error_row = df.loc[~df[column].isin(val_domain)]  # Find the faulty row
+                    flagged = flagged & not_null
 
-                if len(error_row) != 0:
-                    for index, row in error_row.iterrows():
+                if flagged.any():
+                    violations.append(pd.DataFrame({'row': df.index[flagged], 'column': column, 'rule': 'domain',
+                                                    'status': 'error'}, columns=violation_cols))
 
-                        if (from_m_col is None) or (to_m_col is None):
-                            result = "Rute {0} memiliki nilai {1} yang tidak termasuk di dalam domain, pada baris {2}.".\
-                                format(row[routeid_col], column, index + 2)
-                        else:
-                            result = "Rute {0} memiliki nilai {1} yang tidak termasuk di dalam domain, pada segmen {2}-{3} {4} yaitu {5}.".\
-                                format(row[routeid_col], column, row[from_m_col], row[to_m_col], row[lane_code],
-                                       row[column])
+        if len(violations) == 0:
+            return self
 
-                        self.insert_route_message(row[routeid_col], 'error', result)
+        violation_df = pd.concat(violations, ignore_index=True)
+        segment_msg = (from_m_col is not None) and (to_m_col is not None)
+
+        # The message order in every route status list is (column, rule, row), same as the row by row iteration.
+        for (column, rule, status), group in violation_df.groupby(['column', 'rule', 'status'], sort=False):
+            rows = df.loc[group['row'].values]
+            template, bounds = self._range_domain_template(column, rule, status, segment_msg)
+
+            route_ids = rows[routeid_col].values
+
+            if segment_msg:
+                from_m, to_m, lanes = rows[from_m_col].values, rows[to_m_col].values, rows[lane_code].values
+                args = [dict(bounds, route=route, column=column, from_m=from_m[i], to_m=to_m[i], lane=lanes[i],
+                             value=value) for i, (route, value) in enumerate(zip(route_ids, rows[column].values))]
+                self.insert_route_messages(route_ids, status, template, args=args, check=rule, from_m=from_m,
+                                           to_m=to_m, lane=lanes)
+            else:
+                args = [dict(bounds, route=route, column=column, row=index+2)
+                        for route, index in zip(route_ids, rows.index)]
+                self.insert_route_messages(route_ids, status, template, args=args, check=rule)
 
         return self
 
+    @staticmethod
+    def _range_status(values, range_details):
+        """
+        This static method evaluates the range rule of a column and returns the status of every row.
+        :param values: The column Series.
+        :param range_details: The column range details from the data config.
+        :return: Array of row status, 'error', 'ToBeReviewed' or None.
+        """
+        upper_bound = range_details['upper']  # The range upper bound
+        lower_bound = range_details['lower']  # The range lower bound
+        review = range_details['review']  # As To Be Reviewed message or as an Error Message
+        status = np.full(len(values), None, dtype=object)  # Empty row status
+
+        # The upper value mask
+        if upper_bound is None:
+            upper_mask = np.zeros(len(values), dtype=bool)
+        elif range_details['eq_upper']:
+            upper_mask = (values > upper_bound).values
+        else:
+            upper_mask = (values >= upper_bound).values
+
+        # The lower value mask
+        if lower_bound is None:
+            lower_mask = np.zeros(len(values), dtype=bool)
+        elif range_details['eq_lower']:
+            lower_mask = (values < lower_bound).values
+        else:
+            lower_mask = (values <= lower_bound).values
+
+        # Give the error status for the lower and upper mask
+        status[upper_mask | lower_mask] = 'error'
+
+        # Check the review condition
+        if review is True:
+            status[upper_mask | lower_mask] = 'ToBeReviewed'
+        elif review == 'upper':
+            status[upper_mask] = 'ToBeReviewed'
+        elif review == 'lower':
+            status[lower_mask] = 'ToBeReviewed'
+        elif type(review) == dict:
+            direction = review['direction']
+
+            # Give the ToBeReviewed Status
+            # Does not override any 'error' status
+            if direction == 'inward':
+                rev_upper_mask = (values <= review['upper']) if review['eq_upper'] else (values < review['upper'])
+                rev_lower_mask = (values >= review['lower']) if review['eq_lower'] else (values > review['lower'])
+                status[(rev_upper_mask & rev_lower_mask).values & pd.isnull(status)] = 'ToBeReviewed'
+
+            if direction == 'outward':
+                rev_upper_mask = (values >= review['upper']) if review['eq_upper'] else (values > review['upper'])
+                rev_lower_mask = (values <= review['lower']) if review['eq_lower'] else (values < review['lower'])
+                status[(rev_upper_mask | rev_lower_mask).values & pd.isnull(status)] = 'ToBeReviewed'
+
+        return status
+
+    def _range_domain_template(self, column, rule, status, segment_msg):
+        """
+        This method returns the message template of a range/domain violation group.
+        :param column: The violated column.
+        :param rule: 'range' or 'domain'.
+        :param status: The violation status, 'error' or 'ToBeReviewed'.
+        :param segment_msg: If True then the message contains the segment, otherwise the message contains the excel row.
+        :return: Tuple of message template and the template bound value dictionary.
+        """
+        if segment_msg:
+            location = "pada segmen {from_m}-{to_m} lane {lane} yaitu {value}"
+        else:
+            location = "pada baris {row}."
+
+        if rule == 'domain':
+            if segment_msg:
+                location = "pada segmen {from_m}-{to_m} {lane} yaitu {value}."
+
+            return "Rute {route} memiliki nilai {column} yang tidak termasuk di dalam domain, " + location, dict()
+
+        range_details = self.column_details[column]['range']
+        review = range_details['review']
+        bounds = {'lower': range_details['lower'], 'upper': range_details['upper']}
+        template = "Rute {route} memiliki nilai {column} yang berada di luar rentang "
+
+        if (status == 'error') or (review is True):
+            template += "({lower}<{column}<{upper}), "
+        elif review == 'upper':
+            template += "({column}>{upper}), "
+
+            if segment_msg:
+                location = "pada segmen {from_m}-{to_m} {lane} yaitu {value}"
+        elif review == 'lower':
+            template += "({column}<{lower}), "
+        elif review['direction'] == 'outward':
+            template += "({column}<{lower} atau {column}>{upper}), "
+            bounds = {'lower': review['lower'], 'upper': review['upper']}
+        else:
+            template += "({lower}<{column}<{upper}), "
+            bounds = {'lower': review['lower'], 'upper': review['upper']}
+
+        return template + location, bounds
+
     def survey_year_check(self, data_year, survey_date_col='SURVEY_DATE', routeid_col='LINKID', from_m_col='STA_FROM',
-                          to_m_col='STA_TO', lane_code='LANE_CODE', **kwargs):
+                          to_m_col='STA_TO', lane_code='LANE_CODE', routes='ALL', **kwargs):
         """
         This function checks for consistency between the stated data year and survey date year.
         :param survey_date_col:
@@ -542,9 +526,10 @@ class EventValidation(object):
         :param from_m_col:
         :param to_m_col:
         :param lane_code:
+        :param routes: The requested routes.
         :return:
         """
-        df = self.copy_valid_df()
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)
         df['_year'] = pd.DatetimeIndex(df[survey_date_col]).year  # Create a year column
         error_rows = df.loc[df['_year'] != data_year]
 
@@ -596,7 +581,8 @@ class EventValidation(object):
                           to_m_col='STA_TO', lane_code='LANE_CODE', length_col='SEGMENT_LENGTH', **kwargs):
         """
         This function check for every segment length. The segment length has to be 100 meters, and stated segment length
-        has to match the stated From Measure and To Measure.
+        has to match the stated From Measure and To Measure. All of the route and lane is checked in a single pass, the
+        last segment of every route and lane is found with a groupby over the whole DataFrame.
         :param segment_len: Required segment length, the default value is 100 meters
         :param from_m_col: From Measure column
         :param to_m_col: To Measure column
@@ -608,77 +594,76 @@ class EventValidation(object):
         :return: self
         """
         env.workspace = self.sde_connection  # Setting up the env.workspace
-        df = self.copy_valid_df()  # Create a copy of the valid DataFrame
-        orig_df = self.copy_valid_df()  # The unmodified DataFrame.
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)  # Create a copy of the valid DataFrame
+        df = df.loc[df[lane_code].notnull()]
 
-        df[from_m_col] = pd.Series(df[from_m_col] / 100)  # Convert the from measure to Km
-        df[to_m_col] = pd.Series(df[to_m_col] / 100)  # Convert the to measure to Km
-        df['diff'] = pd.Series(df[to_m_col] - df[from_m_col])  # Create a diff column for storing from-to difference
+        if len(df) == 0:
+            return self
 
-        if routes == 'ALL':
-            pass
-        else:
-            df = self.selected_route_df(df, routes, routeid_col=routeid_col)
-
-        for route, lane in self.route_lane_tuple(df, routeid_col, lane_code):  # Iterate over all route and lane
-
-                df_route_lane = df.loc[(df[lane_code] == lane) & (df[routeid_col] == route)]
-                max_to_ind = df_route_lane[from_m_col].idxmax()
-
-                # Rounded
-                last_segment_len = np.round(df_route_lane.at[max_to_ind, 'diff'], 2)  # The last segment real length
-                last_segment_statedlen = df_route_lane.at[max_to_ind, length_col]  # The last segment stated len
-                last_from = df_route_lane.at[max_to_ind, from_m_col]*100  # Last segment from measure in Decameters
-                last_to = df_route_lane.at[max_to_ind, to_m_col]*100  # Last segment to measure in Decameters
-                last_interval = '{0}-{1}'.format(last_from, last_to)  # The interval value in string
-
-                # Find the row with segment len error, find the index
-                # Exclude the last segment (segment with the largest from_m).
-                error_i = df_route_lane.loc[(~np.isclose(df_route_lane['diff'], df_route_lane[length_col], atol=0.02) |
-                                            (~np.isclose(df_route_lane[length_col], segment_len, atol=0.02))) &
-                                            ~(df_route_lane[from_m_col] == df_route_lane.at[max_to_ind, from_m_col])].index
-
-                # Pop the last segment from the list of invalid segment
-                # error_i_pop_last = np.setdiff1d(error_i, max_to_ind)
-
-                if len(error_i) != 0:
-                    for error_index in error_i:
-                        excel_i = error_index + 2  # Create the index for excel table
-                        from_m = df_route_lane.at[error_index, from_m_col]  # The from m value
-                        to_m = df_route_lane.at[error_index, to_m_col]  # The to m value
-                        segment_real_len = df_route_lane.at[error_index, length_col]
-                        # Create error message
-                        error_message = 'Segmen pada baris {2} memiliki {0}-{1} ({4}-{5}) dan panjang segmen ({3}) yang tidak konsisten atau memiliki panjang segmen yang tidak sama dengan {6}.'.\
-                            format(from_m_col, to_m_col, excel_i, segment_real_len, from_m, to_m, segment_len)
-                        self.error_list.append(error_message)  # Append the error message
-                        self.insert_route_message(route, 'error', error_message)
-
-                # Check whether the stated length for the last segment match the actual length
-                len_statedlen_diff = abs(last_segment_len - last_segment_statedlen)
-
-                if np.isclose(last_segment_len, 0):  # Prevent last segment from having same from-to value.
-                    error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memililki nilai {3}-{4} yang sama (panjang = 0).'.\
-                        format(last_interval, route, lane, from_m_col, to_m_col)
-                    self.insert_route_message(route, 'error', error_message)
-                else:
-                    if len_statedlen_diff > 0.01 and (last_segment_statedlen > last_segment_len):
-                        # Create error message
-                        error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memiliki panjang yang berbeda dengan yang tertera pada kolom {3} yaitu ({4}).'.\
-                            format(last_interval, route, lane, length_col, last_segment_statedlen)
-                        self.error_list.append(error_message)
-                        self.insert_route_message(route, 'error', error_message)
-
-                    if last_segment_len > segment_len and (not np.isclose(last_segment_len, segment_len, atol=0.001)):
-                        # Create error message
-                        error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memiliki panjang segmen ({3}) yang melebihi {4}km.'.\
-                            format(last_interval, route, lane, last_segment_len, segment_len)
-                        self.insert_route_message(route, 'error', error_message)
-
-                # Check if the last TO_M is integer OR has .0 decimal.
-                if not last_to.is_integer():
-                    error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memiliki nilai {3}={4} yang bukan merupakan bilangan bulat(integer).'.\
-                        format(last_interval, route, lane, to_m_col, last_to)
-                    self.insert_route_message(route, 'error', error_message)
+        from_m = (df[from_m_col] / 100).values  # Convert the from measure to Km
+        to_m = (df[to_m_col] / 100).values  # Convert the to measure to Km
+        diff = to_m - from_m  # The from-to difference
+        stated_len = df[length_col].values
+        route_ids = df[routeid_col].values
+        lanes = df[lane_code].values
+
+        # The (route, lane) group, the groups are ordered by the route then the lane first appearance.
+        group_id = df.groupby([routeid_col, lane_code], sort=False).ngroup().values
+        group_key = pd.factorize(route_ids)[0]*(group_id.max()+1) + group_id
+
+        # The segment with the largest from measure in every route and lane is the last segment.
+        max_from = pd.Series(from_m).groupby(group_id).transform('max').values
+        is_last = from_m == max_from
+        last_candidate = np.flatnonzero(is_last)
+        last_pos = last_candidate[np.unique(group_id[last_candidate], return_index=True)[1]]
+
+        entries = list()  # The (sort key, route, message, append to error list) entries
+
+        # Find the row with segment len error, exclude the last segment (segment with the largest from_m).
+        error_pos = np.flatnonzero((~np.isclose(diff, stated_len, atol=0.02) |
+                                    ~np.isclose(stated_len, segment_len, atol=0.02)) & ~is_last)
+
+        for pos, excel_i in zip(error_pos, df.index[error_pos] + 2):
+            error_message = 'Segmen pada baris {2} memiliki {0}-{1} ({4}-{5}) dan panjang segmen ({3}) yang tidak konsisten atau memiliki panjang segmen yang tidak sama dengan {6}.'.\
+                format(from_m_col, to_m_col, excel_i, stated_len[pos], from_m[pos], to_m[pos], segment_len)
+            entries.append(((group_key[pos], 0, pos), str(route_ids[pos]), error_message, True))
+
+        last_len = np.round(diff[last_pos], 2)  # The last segment real length
+        last_stated = stated_len[last_pos]  # The last segment stated len
+        last_from = from_m[last_pos]*100  # Last segment from measure in Decameters
+        last_to = to_m[last_pos]*100  # Last segment to measure in Decameters
+
+        zero_len = np.isclose(last_len, 0)  # Prevent last segment from having same from-to value.
+        stated_diff = ~zero_len & (np.abs(last_len - last_stated) > 0.01) & (last_stated > last_len)
+        exceed_len = ~zero_len & (last_len > segment_len) & ~np.isclose(last_len, segment_len, atol=0.001)
+        not_integer = ~(np.floor(last_to) == last_to)  # Check if the last TO_M is integer OR has .0 decimal.
+
+        for i, pos in enumerate(last_pos):
+            route = str(route_ids[pos])
+            lane = lanes[pos]
+            last_interval = '{0}-{1}'.format(last_from[i], last_to[i])  # The interval value in string
+
+            if zero_len[i]:
+                error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memililki nilai {3}-{4} yang sama (panjang = 0).'.\
+                    format(last_interval, route, lane, from_m_col, to_m_col)
+                entries.append(((group_key[pos], 1, 0), route, error_message, False))
+
+            if stated_diff[i]:
+                error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memiliki panjang yang berbeda dengan yang tertera pada kolom {3} yaitu ({4}).'.\
+                    format(last_interval, route, lane, length_col, last_stated[i])
+                entries.append(((group_key[pos], 1, 1), route, error_message, True))
+
+            if exceed_len[i]:
+                error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memiliki panjang segmen ({3}) yang melebihi {4}km.'.\
+                    format(last_interval, route, lane, last_len[i], segment_len)
+                entries.append(((group_key[pos], 1, 2), route, error_message, False))
+
+            if not_integer[i]:
+                error_message = 'Segmen akhir {0} di rute {1} pada lane {2} memiliki nilai {3}={4} yang bukan merupakan bilangan bulat(integer).'.\
+                    format(last_interval, route, lane, to_m_col, last_to[i])
+                entries.append(((group_key[pos], 1, 3), route, error_message, False))
+
+        self._insert_sorted_messages(entries)
 
         return self
 
@@ -688,7 +673,8 @@ class EventValidation(object):
                           end_only=False, max_m='to_m', **kwargs):
         """
         This function checks all event segment measurement value (from and to) for gaps, uneven increment, and final
-        measurement should match the route M-value where the event is assigned to.
+        measurement should match the route M-value where the event is assigned to. All of the route is checked in a
+        single pass, the gap and overlap is detected with a sort and groupby-shift over the whole DataFrame.
         :param routes: Route selection.
         :param from_m_col: From Measurement column.
         :param to_m_col: To Measurment column.
@@ -700,198 +686,185 @@ class EventValidation(object):
         :param tolerance: Tolerance used for detecting error (in Meters).
         :param end_only: If True then the function only checks for error located at the end of inputted data (Data
         measurement should start at 0 and the final measurement are within the comparison max value tolerance).
+        :param max_m: 'to_m' to use the largest To Measure as the route length, 'segment_len' to use the largest lane
+        total segment length.
         :param kwargs:
         :return:
         """
         env.workspace = self.sde_connection  # Setting up the env.workspace
-        df = self.copy_valid_df()  # Create a valid DataFrame with matching DataType with requirement
-        groupby_cols = [routeid_col, from_m_col, to_m_col]
+        df = self.copy_valid_df(routes=routes)  # Create a valid DataFrame with matching DataType with requirement
 
-        rni_table = self.config.table_names['rni']
-        rni_routeid = self.config.table_fields['rni']['route_id']
-        rni_to_m = self.config.table_fields['rni']['to_measure']
-
-        if routes == 'ALL':  # Only process selected routes, if 'ALL' then process all routes in input table
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
+        if compare_to not in ['RNI', 'LRS']:
+            raise ValueError("{0} is not a correct M-Value comparison parameter (LRS or RNI only)".format(compare_to))
 
-        # Iterate over valid row in the input table
-        for route in df[routeid_col].unique().tolist():
-            # Create a route DataFrame
-            df_route = df.loc[df[routeid_col] == route, [routeid_col, from_m_col, to_m_col, lane_code, length_col]]
+        if max_m not in ['to_m', 'segment_len']:
+            raise TypeError('max_m parameter "{0}" is not valid.'.format(max_m))
 
-            if lane_code is not None:
-                df_groupped = df_route.groupby(by=groupby_cols)[lane_code].unique().\
-                    reset_index()  # Group the route df
-            else:
-                df_groupped = df_route
-
-            # Sort the DataFrame based on the RouteId and FromMeasure
-            df_groupped.sort_values(by=[routeid_col, from_m_col, to_m_col], inplace=True)
-            df_groupped.reset_index(drop=True)
-
-            max_to_ind = df_groupped[to_m_col].idxmax()  # The index of segment with largest To Measure
-            if max_m == 'to_m':
-                max_to_meas = float(df_groupped.at[max_to_ind, to_m_col]) / 100  # The largest To Measure value
-            elif max_m == 'segment_len':
-                pivot = df_route.pivot_table(length_col, None, lane_code, 'sum')
-                max_to_meas = pivot.max()
-            else:
-                raise TypeError('max_m parameter "{0}" is not valid.'.format(max_m))
+        route_list = df[routeid_col].unique().tolist()
 
-            min_from_ind = df_groupped[from_m_col].idxmin()  # The index of segment with smallest From Measure
-            min_from_meas = float(df_groupped.at[min_from_ind, from_m_col]) / 100  # The smallest From Measure value
+        if len(route_list) == 0:
+            return self
 
-            # Comparison based on the 'compare_to' parameter
-            if compare_to == 'RNI':
-                # Get the RNI Max Measurement
-                rni_df = event_fc_to_df(rni_table, [rni_routeid, rni_to_m], route, rni_routeid, self.sde_connection,
-                                        is_table=False, include_all=True)  # The RNI DataFrame
+        route_rank = pd.Series(np.arange(len(route_list)), index=route_list)
+        route_group = df.groupby(routeid_col)
 
-                if len(rni_df) == 0:  # If the RNI Table does not exist for a route
-                    comparison = None  # The comparison value will be None
-                else:
-                    rni_max_m = rni_df.at[rni_df[rni_to_m].argmax(), rni_to_m]  # The Route RNI maximum measurement
-                    comparison = float(rni_max_m)/float(100/self.rni_mfactor)
+        if max_m == 'to_m':
+            max_to_meas = (route_group[to_m_col].max().astype(float) / 100)  # The largest To Measure value
+        else:
+            # The largest total segment length of all lanes
+            max_to_meas = df.groupby([routeid_col, lane_code])[length_col].sum().max(level=0)
+
+        max_to_meas = max_to_meas.reindex(route_list).values
+        min_from_meas = (route_group[from_m_col].min().astype(float) / 100).reindex(route_list).values
+        comparison = self._reference_max_m(route_list, compare_to)  # NaN if the comparison value is not available
+
+        with np.errstate(invalid='ignore'):  # The NaN comparison value is excluded below
+            if compare_to == 'LRS':
+                round_comp = np.round(comparison, decimals=2)
+                less_than_reference = max_to_meas < round_comp
+                more_than_reference = max_to_meas > round_comp
+                close_to_reference = np.isclose(max_to_meas, round_comp, atol=tolerance)
+            else:
+                less_than_reference = max_to_meas < comparison
+                more_than_reference = max_to_meas > comparison
+                close_to_reference = np.isclose(max_to_meas, comparison)
 
-            elif compare_to == 'LRS':
-                # Get the LRS Network route length
-                lrs_route_len = self.route_geometry(route, self.lrs_network, self.lrs_routeid).lastPoint.M
-                comparison = lrs_route_len
+        not_close = ~np.isnan(comparison) & ~close_to_reference
+        end_gap = not_close & less_than_reference & (not ignore_end_gap)
+        exceed_ref = not_close & more_than_reference & (not ignore_exceed_ref)
+        not_zero = ~np.isclose(min_from_meas, 0) & start_at_zero
 
-            else:
-                raise ValueError("{0} is not a correct M-Value comparison parameter (LRS or RNI only)".
-                                 format(compare_to))
+        entries = list()  # The (sort key, route, message, append to error list) entries
 
-            # If the comparison value is not available.
-            if comparison is None:
-                pass
-            else:
+        for i, route in enumerate(route_list):
+            if end_gap[i]:
                 if compare_to == 'LRS':
-                    round_comp = np.round(comparison, decimals=2)
-                    less_than_reference = max_to_meas < round_comp
-                    more_than_reference = max_to_meas > round_comp
-                    close_to_reference = np.isclose(max_to_meas, round_comp, atol=tolerance)
+                    # Create an error message
+                    msg = 'Data survey pada rute {0} adalah {1}, masih lebih pendek daripada panjang datar'.\
+                        format(route, max_to_meas[i])
                 else:
-                    less_than_reference = max_to_meas < comparison
-                    more_than_reference = max_to_meas > comparison
-                    close_to_reference = np.isclose(max_to_meas, comparison)
-
-                if not close_to_reference:
-                    if less_than_reference and (not ignore_end_gap):
-                        if compare_to == 'LRS':
-                            # Create an error message
-                            msg = 'Data survey pada rute {0} adalah {1}, masih lebih pendek daripada panjang datar'.\
-                                format(route, max_to_meas)
-                        else:
-                            msg = "Tidak ditemukan data survey pada rute {0} dari km {1} hingga {2}. (Terdapat gap di akhir ruas).".\
-                                format(route, max_to_meas, comparison)
-                        self.error_list.append(msg)
-                        self.insert_route_message(route, 'error', msg)
-
-                    elif more_than_reference and (not ignore_exceed_ref):
-                        msg = 'Rute {0} memiliki panjang yang melebihi data referensi yaitu {1} Km.'.\
-                            format(route, max_to_meas)
-                        self.insert_route_message(route, 'error', msg)
-
-            if not np.isclose(min_from_meas, 0) and (start_at_zero):
-                error_message = 'Data survey pada rute {0} tidak dimulai dari 0.'.format(route)
-                self.error_list.append(error_message)
-                self.insert_route_message(route, 'error', error_message)
+                    msg = "Tidak ditemukan data survey pada rute {0} dari km {1} hingga {2}. (Terdapat gap di akhir ruas).".\
+                        format(route, max_to_meas[i], comparison[i])
+                entries.append(((i, 0), route, msg, True))
 
-            if not end_only:  # If end_only is False then checks for all error at the middle of inputted data.
-                if (kwargs.get('first_lane_only_gap') is None) or (not kwargs.get('first_lane_only_gap')):
+            elif exceed_ref[i]:
+                msg = 'Rute {0} memiliki panjang yang melebihi data referensi yaitu {1} Km.'.\
+                    format(route, max_to_meas[i])
+                entries.append(((i, 0), route, msg, False))
 
-                    if lane_code is not None:
-                        lane_group = df_route.groupby(by=[str(lane_code)])
-                    else:
-                        lane_group = df_route.groupby(by=[str(routeid_col)])
-
-                    error_rows = None
-                    for name, group_df in lane_group:
-                        g_sorted = group_df.sort_values(by=from_m_col).reset_index()
-                        g_sorted['SHIFTED_FROM_M'] = g_sorted[from_m_col].shift(-1)
-                        g_sorted['TO-FROM_GAP'] = g_sorted[to_m_col] - g_sorted['SHIFTED_FROM_M']  # Detect gap/overlap
-
-                        g_sorted.loc[g_sorted['TO-FROM_GAP'] < 0, 'MIDDLE_GAP'] = True
-                        g_sorted.loc[g_sorted['TO-FROM_GAP'] > 0, 'OVERLAP'] = True
-                        g_sorted.loc[g_sorted[from_m_col] > g_sorted[to_m_col], 'FROM>TO'] = True  # From M > To M
-
-                        if error_rows is None:
-                            error_rows = g_sorted.loc[g_sorted['MIDDLE_GAP'] |
-                                                      g_sorted['OVERLAP'] |
-                                                      g_sorted['FROM>TO']]
-                        else:
-                            error_rows = error_rows.append(g_sorted.loc[g_sorted['MIDDLE_GAP'] |
-                                                           g_sorted['OVERLAP'] |
-                                                           g_sorted['FROM>TO']])
+            if not_zero[i]:
+                error_message = 'Data survey pada rute {0} tidak dimulai dari 0.'.format(route)
+                entries.append(((i, 1), route, error_message, True))
 
+        if not end_only:  # If end_only is False then checks for all error at the middle of inputted data.
+            if (kwargs.get('first_lane_only_gap') is None) or (not kwargs.get('first_lane_only_gap')):
+                if lane_code is not None:
+                    lane_col = lane_code
+                    segments = df.loc[df[lane_code].notnull(), [routeid_col, from_m_col, to_m_col, lane_code]]
                 else:
-                    segment_group = df_route.loc[(df_route[lane_code] == 'L1') | (df_route[lane_code] == 'R1')].\
-                                    groupby(by=[from_m_col, to_m_col])[lane_code].unique().reset_index()
+                    lane_col = routeid_col
+                    segments = df[[routeid_col, from_m_col, to_m_col]]
 
-                    if segment_group.empty:
-                        error_msg = "Rute {0} tidak memiliki lane L1 atau R1.".format(route)
-                        self.insert_route_message(route, "error", error_msg)
-                        continue
+                # Every lane segments is sorted by the from measure, the lanes is sorted by the lane code.
+                segments = segments.sort_values([routeid_col, lane_col, from_m_col], kind='mergesort')
+                shift_group = [routeid_col, lane_col]
+            else:
+                first_lane = df.loc[(df[lane_code] == 'L1') | (df[lane_code] == 'R1')]
+                segments = first_lane.groupby(by=[routeid_col, from_m_col, to_m_col])[lane_code].unique().\
+                    reset_index()
+                shift_group = [routeid_col]
+
+                if segments.empty:
+                    segments = first_lane[[routeid_col, from_m_col, to_m_col, lane_code]]
+
+                for route in np.setdiff1d(route_list, segments[routeid_col].unique()):
+                    error_msg = "Rute {0} tidak memiliki lane L1 atau R1.".format(route)
+                    entries.append(((route_rank[route], 2), route, error_msg, False))
+
+            shifted = segments.groupby(shift_group)[[from_m_col, to_m_col]].shift(-1)
+            gap = segments[to_m_col].values - shifted[from_m_col].values  # Detect gap/overlap
+
+            with np.errstate(invalid='ignore'):  # The last segment of every lane does not have any next segment
+                middle_gap = gap < 0
+                overlap = gap > 0
+            reversed_segment = (segments[from_m_col] > segments[to_m_col]).values  # From M > To M
+            error_pos = np.flatnonzero(middle_gap | overlap | reversed_segment)
+
+            for pos in error_pos:
+                route = segments[routeid_col].values[pos]
+                from_m = segments[from_m_col].values[pos]
+                to_m = segments[to_m_col].values[pos]
+                next_from_m = shifted[from_m_col].values[pos]
+                key = (route_rank[route], 2, pos)
+
+                if lane_code is None:
+                    lane = None
+                else:
+                    lane = segments[lane_code].values[pos]
 
-                    g_sorted = segment_group.sort_values(by=from_m_col).reset_index()
-                    g_sorted['SHIFTED_FROM_M'] = g_sorted[from_m_col].shift(-1)
-                    g_sorted['TO-FROM_GAP'] = g_sorted[to_m_col] - g_sorted['SHIFTED_FROM_M']  # Detect gap/overlap
+                if middle_gap[pos]:
+                    if lane is None:
+                        error_message = 'Tidak ditemukan data survey pada rute {0} dari Km {1} hingga {2}. (Terdapat gap di tengah ruas)'. \
+                            format(route, to_m, next_from_m)
+                    else:
+                        error_message = 'Tidak ditemukan data survey pada rute {0} dari Km {1} hingga {2} pada lane {3}. (Terdapat gap di tengah ruas)'. \
+                            format(route, to_m, next_from_m, lane)
 
-                    g_sorted.loc[g_sorted['TO-FROM_GAP'] < 0, 'MIDDLE_GAP'] = True
-                    g_sorted.loc[g_sorted['TO-FROM_GAP'] > 0, 'OVERLAP'] = True
-                    g_sorted.loc[g_sorted[from_m_col] > g_sorted[to_m_col], 'FROM>TO'] = True  # From M > To M
+                    entries.append((key + (0,), route, error_message, True))
 
-                    error_rows = g_sorted.loc[g_sorted['MIDDLE_GAP'] |
-                                              g_sorted['OVERLAP'] |
-                                              g_sorted['FROM>TO']]
+                if overlap[pos]:
+                    next_to_m = shifted[to_m_col].values[pos]
+                    if lane is None:
+                        error_message = 'Terdapat tumpang tindih antara segmen {0}-{1} dengan {2}-{3} pada rute {4}.'. \
+                            format(next_from_m, next_to_m, from_m, to_m, route)
+                    else:
+                        error_message = 'Terdapat tumpang tindih antara segmen {0}-{1} dengan {2}-{3} pada rute {4} di jalur {5}'. \
+                            format(next_from_m, next_to_m, from_m, to_m, route, lane)
 
-                for index, row in error_rows.iterrows():
-                    from_m = row[from_m_col]
-                    to_m = row[to_m_col]
+                    entries.append((key + (1,), route, error_message, True))
 
-                    if lane_code is None:
-                        lane = None
+                if reversed_segment[pos]:
+                    if lane is None:
+                        error_message = 'Segmen {0}-{1} pada rute {2} memiliki arah segmen yang terbalik, {3} > {4} lane.'. \
+                            format(to_m, from_m, route, from_m_col, to_m_col)
                     else:
-                        lane = row[lane_code]
+                        error_message = 'Segmen {0}-{1} pada rute {2} memiliki arah segmen yang terbalik, {3} > {4} lane {5}.'.\
+                            format(to_m, from_m, route, from_m_col, to_m_col, lane)
 
-                    next_from_m = row['SHIFTED_FROM_M']
+                    entries.append((key + (2,), route, error_message, True))
 
-                    if row['MIDDLE_GAP'] is True:
-                        if lane is None:
-                            error_message = 'Tidak ditemukan data survey pada rute {0} dari Km {1} hingga {2}. (Terdapat gap di tengah ruas)'. \
-                                format(route, to_m, next_from_m)
-                        else:
-                            error_message = 'Tidak ditemukan data survey pada rute {0} dari Km {1} hingga {2} pada lane {3}. (Terdapat gap di tengah ruas)'. \
-                                format(route, to_m, next_from_m, lane)
+        self._insert_sorted_messages(entries)
 
-                        self.error_list.append(error_message)
-                        self.insert_route_message(route, 'error', error_message)
+        return self
 
-                    if row['OVERLAP'] is True:
-                        next_to_m = g_sorted.at[index + 1, to_m_col]
-                        if lane is None:
-                            error_message = 'Terdapat tumpang tindih antara segmen {0}-{1} dengan {2}-{3} pada rute {4}.'. \
-                                format(next_from_m, next_to_m, from_m, to_m, route)
-                        else:
-                            error_message = 'Terdapat tumpang tindih antara segmen {0}-{1} dengan {2}-{3} pada rute {4} di jalur {5}'. \
-                                format(next_from_m, next_to_m, from_m, to_m, route, lane)
+    def _reference_max_m(self, routes, compare_to):
+        """
+        This method returns the reference maximum measurement (in Km) of every route from the reference length table.
+        :param routes: The route list.
+        :param compare_to: 'RNI' or 'LRS'.
+        :return: Array of maximum measurement, NaN if the route does not exist in the reference.
+        """
+        if compare_to == 'RNI':
+            lengths = ReferenceLength().lengths(routes, columns=['RNI_MAX_M']).reindex([str(x) for x in routes])
+            max_m = lengths['RNI_MAX_M'].astype(float)/float(100/self.rni_mfactor)
+        else:
+            lengths = ReferenceLength().lengths(routes, columns=['LRS_MAX_M']).reindex([str(x) for x in routes])
+            max_m = lengths['LRS_MAX_M'].astype(float)  # The LRS Network route length
 
-                        self.error_list.append(error_message)
-                        self.insert_route_message(route, 'error', error_message)
+        return max_m.values
 
-                    if row['FROM>TO'] is True:
-                        if lane is None:
-                            error_message = 'Segmen {0}-{1} pada rute {2} memiliki arah segmen yang terbalik, {3} > {4} lane.'. \
-                                format(to_m, from_m, route, from_m_col, to_m_col)
-                        else:
-                            error_message = 'Segmen {0}-{1} pada rute {2} memiliki arah segmen yang terbalik, {3} > {4} lane {5}.'.\
-                                format(to_m, from_m, route, from_m_col, to_m_col, lane)
+    def _insert_sorted_messages(self, entries, message_type='error'):
+        """
+        This method inserts the (sort key, route, message, append to error list) entries in the sort key order.
+        :param entries: List of entry tuple.
+        :param message_type: The message type.
+        :return:
+        """
+        for key, route, message, to_error_list in sorted(entries, key=lambda x: x[0]):
+            if to_error_list:
+                self.error_list.append(message)
 
-                        self.error_list.append(error_message)
-                        self.insert_route_message(route, 'error', error_message)
+            self.insert_route_message(route, message_type, message)
 
         return self
 
@@ -922,7 +895,7 @@ class EventValidation(object):
         :return:
         """
         env.workspace = self.sde_connection  # Setting up the env.workspace
-        df = self.copy_valid_df()
+        df = self.copy_valid_df(routes=routes)
         rni_table = self.config.table_names['rni']
         rni_routeid = self.config.table_fields['rni']['route_id']
         rni_from_m = self.config.table_fields['rni']['from_measure']
@@ -933,11 +906,6 @@ class EventValidation(object):
         rni_lane_width = self.config.table_fields['rni']['lane_width']
         initial_comparison = comparison
 
-        if routes == 'ALL':  # Only process selected routes, if 'ALL' then process all routes in input table
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
-
         # Iterate for every requested routes
         for route in self.route_lane_tuple(df, routeid_col, lane_code, route_only=True):
             # Create a selected route DF
@@ -946,12 +914,24 @@ class EventValidation(object):
             df_route = df.loc[df[routeid_col] == route, (column_selection+added_cols)]
 
             # Get LRS route geometry
-            route_geom = self.route_geometry(route, self.lrs_network, self.lrs_routeid)
+            route_entry = self.prefetch.route_entry(route, self.lrs_network, self.lrs_routeid)
+
+            if route_entry is None:  # The route does not exist in the LRS Network
+                msg = "Rute {0} tidak terdapat pada LRS Network.".format(route)
+                self.insert_route_message(route, 'error', msg)
+                continue
+
+            route_geom = route_entry.geometry
+
+            # Project the input coordinate to WGS84 used by the distance engine
+            df_route[long_col], df_route[lat_col] = coordinate.to_wgs84(df_route[long_col].values,
+                                                                        df_route[lat_col].values, spatial_ref)
 
             if comparison != 'LRS':
                 # Get the RNI table
-                rni_df = event_fc_to_df(rni_table, [rni_from_m, rni_to_m, rni_lane, rni_long, rni_lat, rni_lane_width],
-                                        route, rni_routeid, self.sde_connection, True)
+                rni_df = self.prefetch.table_df(rni_table,
+                                                [rni_from_m, rni_to_m, rni_lane, rni_long, rni_lat, rni_lane_width],
+                                                route, rni_routeid, True)
                 rni_df[rni_from_m] = pd.Series(rni_df[rni_from_m] * self.rni_mfactor, index=rni_df.index).astype(int)
                 rni_df[rni_to_m] = pd.Series(rni_df[rni_to_m] * self.rni_mfactor, index=rni_df.index).astype(int)
             else:
@@ -971,7 +951,7 @@ class EventValidation(object):
                 prev_lat_col = kwargs_comparison.get('lat_col')
 
                 prev_cols = [prev_routeid, prev_from_m, prev_to_m, prev_lane_code, prev_long_col, prev_lat_col]
-                prev_df = event_fc_to_df(previous_year_table, prev_cols, route, routeid_col, self.sde_connection, True)
+                prev_df = self.prefetch.table_df(previous_year_table, prev_cols, route, routeid_col, True)
 
                 if prev_df.empty is False:  # If the data available is not empty then do the conversion
                     prev_df[[prev_from_m, prev_to_m]] = prev_df[[prev_from_m, prev_to_m]].\
@@ -1006,79 +986,36 @@ class EventValidation(object):
                 comparison = 'LRS'
 
             # Add distance column based on the comparison request
+            route_line = coordinate.RouteLine.from_route(route_entry)  # The LRS vertex array for distance engine
+            segment_kwargs = {'from_m_col': from_m_col, 'to_m_col': to_m_col, 'lane_col': lane_code,
+                              'previous_df': prev_df, 'kwargs_comparison': kwargs_comparison}
+            rni_kwargs = {'rni_df': rni_df, 'rni_from_m': rni_from_m, 'rni_to_m': rni_to_m, 'rni_lane_code': rni_lane,
+                          'rni_lat': rni_lat, 'rni_long': rni_long}
+
             if segment_data and (comparison == 'LRS'):
-                df_route[added_cols] = df_route.apply(lambda _x: coordinate.distance_series(_x[lat_col],
-                                                                                            _x[long_col],
-                                                                                            route_geom,
-                                                                                            from_m=_x[from_m_col],
-                                                                                            to_m=_x[to_m_col],
-                                                                                            lane=_x[lane_code],
-                                                                                            projections=spatial_ref,
-                                                                                            at_start=at_start,
-                                                                                            previous_df=prev_df,
-                                                                                            kwargs_comparison=kwargs_comparison)
-                                                      , axis=1)
+                df_route[added_cols] = coordinate.distance_frame(df_route, lat_col, long_col, route_line,
+                                                                 **segment_kwargs)
             if segment_data and (comparison == 'RNIseg-LRS'):
-                df_route[added_cols] = df_route.apply(lambda _x: coordinate.distance_series(_x[lat_col],
-                                                                                            _x[long_col],
-                                                                                            route_geom,
-                                                                                            from_m=_x[from_m_col],
-                                                                                            to_m=_x[to_m_col],
-                                                                                            lane=_x[lane_code],
-                                                                                            projections=spatial_ref,
-                                                                                            at_start=at_start,
-                                                                                            rni_df=rni_df,
-                                                                                            rni_from_m=rni_from_m,
-                                                                                            rni_to_m=rni_to_m,
-                                                                                            rni_lane_code=rni_lane,
-                                                                                            rni_lat=rni_lat,
-                                                                                            rni_long=rni_long,
-                                                                                            previous_df=prev_df,
-                                                                                            kwargs_comparison=kwargs_comparison)
-                                                      , axis=1)
+                segment_kwargs.update(rni_kwargs)
+                df_route[added_cols] = coordinate.distance_frame(df_route, lat_col, long_col, route_line,
+                                                                 **segment_kwargs)
             if segment_data and (comparison == 'RNIline-LRS'):
                 rni_line = coordinate.to_polyline(rni_df, rni_from_m, rni_long, rni_lat, rni_to_m, projections=spatial_ref)
-                df_route[added_cols] = df_route.apply(lambda _x: coordinate.distance_series(_x[lat_col],
-                                                                                            _x[long_col],
-                                                                                            route_geom,
-                                                                                            from_m=_x[from_m_col],
-                                                                                            to_m=_x[to_m_col],
-                                                                                            lane=_x[lane_code],
-                                                                                            projections=spatial_ref,
-                                                                                            at_start=at_start,
-                                                                                            rni_df=rni_df,
-                                                                                            rni_from_m=rni_from_m,
-                                                                                            rni_to_m=rni_to_m,
-                                                                                            rni_lane_code=rni_lane,
-                                                                                            rni_lat=rni_lat,
-                                                                                            rni_long=rni_long,
-                                                                                            rni_polyline=rni_line,
-                                                                                            previous_df=prev_df,
-                                                                                            kwargs_comparison=kwargs_comparison)
-                                                      , axis=1)
+                segment_kwargs.update(rni_kwargs)
+                segment_kwargs['rni_line'] = self._rni_route_line(rni_line, route_line)
+                df_route[added_cols] = coordinate.distance_frame(df_route, lat_col, long_col, route_line,
+                                                                 **segment_kwargs)
 
             if not segment_data and (comparison == 'LRS'):
-                df_route[added_cols] = df_route.apply(lambda _x: coordinate.distance_series(_x[lat_col],
-                                                                                            _x[long_col],
-                                                                                            route_geom,
-                                                                                            projections=spatial_ref,
-                                                                                            ), axis=1)
+                df_route[added_cols] = coordinate.distance_frame(df_route, lat_col, long_col, route_line)
             if not segment_data and (comparison == 'RNIline_LRS'):
                 rni_line = coordinate.to_polyline(rni_df, rni_from_m, rni_long, rni_lat, rni_to_m, projections=spatial_ref)
-                df_route[added_cols] = df_route.apply(lambda _x: coordinate.distance_series(_x[lat_col],
-                                                                                            _x[long_col],
-                                                                                            route_geom,
-                                                                                            projections=spatial_ref,
-                                                                                            rni_polyline=rni_line
-                                                                                            ), axis=1)
+                df_route[added_cols] = coordinate.distance_frame(df_route, lat_col, long_col, route_line,
+                                                                 rni_line=self._rni_route_line(rni_line, route_line))
 
             if comparison == 'RNIPoint-LRS':
-                df_route[added_cols] = df_route.apply(lambda _x: coordinate.distance_series(_x[lat_col],
-                                                                                            _x[long_col],
-                                                                                            route_geom,
-                                                                                            rni_df=rni_df,
-                                                                                            rni_lat=rni_lat,
-                                                                                            rni_long=rni_long), axis=1)
+                df_route[added_cols] = coordinate.distance_frame(df_route, lat_col, long_col, route_line,
+                                                                 rni_df=rni_df, rni_lat=rni_lat, rni_long=rni_long)
 
             elif comparison not in ['LRS', 'RNIline-LRS', 'RNIseg-LRS', 'RNIPoint-LRS']:
                 raise TypeError("Comparison is invalid.")
@@ -1147,6 +1084,18 @@ class EventValidation(object):
 
         return self
 
+    @staticmethod
+    def _lane_side_number(lanes):
+        """
+        Parse the lane code (such as L1 or R2) into the lane side and the lane number.
+        :param lanes: The lane code Series.
+        :return: (side Series, lane number Series), the lane number is Null if the lane code is not valid.
+        """
+        side = lanes.str[0]
+        number = pd.to_numeric(lanes.str[1:], errors='coerce')
+
+        return side, number
+
     def lane_sequence_check(self, routes='ALL', routeid_col='LINKID', from_m_col='STA_FROM',
                             to_m_col='STA_TO', lane_code='LANE_CODE', **kwargs):
         """
@@ -1155,8 +1104,7 @@ class EventValidation(object):
         :param lane_code: The lane code column.
         :return:
         """
-        df = self.copy_valid_df()
-        df = self.selected_route_df(df, routes)
+        df = self.copy_valid_df(routes=routes)
 
         # Check if all lane code is correct within the specified domain
         lane_domains = self.column_details.get('LANE_CODE').get('domain')
@@ -1166,30 +1114,34 @@ class EventValidation(object):
             if not all_correct:  # If there is invalid value then don't proceed.
                 return self
 
-        df['SIDE'] = df[lane_code].apply(lambda x: str(x[0]))
-        segment_g = df.groupby([routeid_col, from_m_col, to_m_col, 'SIDE'])[lane_code].unique().reset_index()
+        side, lane_number = self._lane_side_number(df[lane_code])
+        df = df.assign(SIDE=side.astype(str), LANE_NUMBER=lane_number,
+                       FIRST_LANE=df[lane_code].isin(['L1', 'R1']))
 
-        segment_g['FIRST_LANE_EXIST'] = segment_g[lane_code].\
-            apply(lambda x: np.any((np.array(x) == 'R1') | (np.array(x) == 'L1')))
+        group_keys = [routeid_col, from_m_col, to_m_col, 'SIDE']
+        grouped = df.groupby(group_keys)
 
-        segment_g['LANE_SEQ'] = segment_g[lane_code].\
-            apply(lambda x: np.sort([int(_[1:]) for _ in x]))
+        # The sequence is correct if the unique lane numbers are consecutive.
+        lane_count = grouped[lane_code].nunique()
+        number_count = grouped['LANE_NUMBER'].nunique()
+        number_range = grouped['LANE_NUMBER'].max() - grouped['LANE_NUMBER'].min()
 
-        segment_g['CORRECT_SEQ'] = segment_g['LANE_SEQ'].\
-            apply(lambda x: np.all(np.abs(np.diff(x)) == 1))
+        first_lane_exist = grouped['FIRST_LANE'].any().values
+        correct_seq = ((number_count == lane_count) & (number_range == lane_count - 1)).values
+        error_groups = np.flatnonzero(~(first_lane_exist | correct_seq))
 
-        error_rows = segment_g.loc[~(segment_g['FIRST_LANE_EXIST'] | segment_g['CORRECT_SEQ'])]
+        if len(error_groups) == 0:
+            return self
 
-        for index, row in error_rows.iterrows():
-            first_lane_exist = row['FIRST_LANE_EXIST']
-            correct_seq = row['CORRECT_SEQ']
-            route = row[routeid_col]
-            from_m = row[from_m_col]
-            to_m = row[to_m_col]
-            side = row['SIDE']
-            lanes = row[lane_code]
+        group_id = grouped.ngroup()
+        error_rows = df.loc[group_id.isin(error_groups)]
+        error_lanes = error_rows.groupby(group_id.loc[error_rows.index])[lane_code].unique()
 
-            if not first_lane_exist:
+        for g in error_groups:
+            route, from_m, to_m, side = lane_count.index[g]
+            lanes = error_lanes[g]
+
+            if not first_lane_exist[g]:
                 if side == 'L':
                     first_lane = 'L1'
                 else:
@@ -1199,7 +1151,7 @@ class EventValidation(object):
                     format(route, from_m, to_m, side, first_lane)
                 self.insert_route_message(route, 'error', error_msg)
 
-            if not correct_seq:
+            if not correct_seq[g]:
                 error_msg = 'Rute {0} pada segmen {1}-{2} di sisi {3} memiliki kode lajur yang tidak berurutan yaitu {4}.'.\
                     format(route, from_m, to_m, side, lanes)
                 self.insert_route_message(route, 'error', error_msg)
@@ -1211,21 +1163,16 @@ class EventValidation(object):
         """
         This function checks the lane code combination for all segment in the input table, the segment interval value
         has to be the same with interval value in the RNI Table.
-        :param rni_table: RNI event table
         :param routes: requested routes, if 'ALL' then all routes in the input table will be processed
         :param lane_code: lane code column in the input table
         :param routeid_col: The Route ID column in the input table.
         :param from_m_col: Column in the input table which contain the From Measurement value.
         :param to_m_col: Column in the input table which  contain the To Measurement value.
-        :param rni_routeid: The Route ID column in the RNI Table.
-        :param rni_from_col: The From Measure column in the RNI Table.
-        :param rni_to_col: The To Measure column in the RNI Table.
-        :param rni_lane_code: The lane code column in the RNI Table.
         :param find_no_match: If True this method will create an error message if there is unmatched interval in the
         input table.
         :return:
         """
-        df = self.copy_valid_df()  # Get a copy of valid DataFrame
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)  # Get a copy of the requested routes
         df[from_m_col] = pd.Series(df[from_m_col]).astype(int)
         df[to_m_col] = pd.Series(df[to_m_col]).astype(int)
         env.workspace = self.sde_connection  # Setting up the SDE Connection workspace
@@ -1236,125 +1183,100 @@ class EventValidation(object):
         rni_to_col = self.config.table_fields['rni']['to_measure']
         rni_lane_col = self.config.table_fields['rni']['lane_code']
 
-        if routes == 'ALL':  # If 'ALL' then process all available route in input table
-            pass
-        else:
-            # Else then only process the selected routes
-            df = self.selected_route_df(df, routes)
+        route_list = self.route_lane_tuple(df, routeid_col, lane_code, route_only=True)
+        route_order = {route: i for i, route in enumerate(route_list)}
+        segment_keys = ['_route', from_m_col, to_m_col]
+        lane_keys = segment_keys + [lane_code]
+        entries = list()  # The (sort key, route, message, append to error list) entries
 
-        # Iterate over all requested routes
-        for route in self.route_lane_tuple(df, routeid_col, lane_code, route_only=True):
-            df_route = df.loc[df[routeid_col] == route]  # Create a DataFrame containing only selected routes
+        # The RNI lane of every requested route, in the input table column names
+        search_field = [rni_routeid, rni_from_col, rni_to_col, rni_lane_col]
+        rni_dfs = list()
 
-            # The RNI DataFrame
-            search_field = [rni_routeid, rni_from_col, rni_to_col, rni_lane_col]
-            df_rni = event_fc_to_df(rni_table, search_field, route, rni_routeid, self.sde_connection, is_table=True)
-            df_rni[rni_from_col] = pd.Series(df_rni[rni_from_col]*self.rni_mfactor).round(2).astype(int)
-            df_rni[rni_to_col] = pd.Series(df_rni[rni_to_col]*self.rni_mfactor).round(2).astype(int)
+        for route in route_list:
+            df_rni = self.prefetch.table_df(rni_table, search_field, route, rni_routeid, is_table=True)
 
             if len(df_rni) == 0:  # Check if the route exist in the RNI Table
                 error_message = "Ruas {0} tidak terdapat pada table RNI.".format(route)  # Create an error message
-                self.error_list.append(error_message)
-                self.insert_route_message(route, 'error', error_message)
-            else:
-                # Create the join key for both DataFrame
-                input_merge_key = [routeid_col, from_m_col, to_m_col]
-                rni_merge_key = [rni_routeid, rni_from_col, rni_to_col]
-
-                # Create a groupby DataFrame
-                input_groupped = df_route.groupby(by=input_merge_key)[lane_code].unique().reset_index()
-                rni_groupped = df_rni.groupby(by=rni_merge_key)[rni_lane_col].unique().reset_index()
-
-                # Start the merge process between the input table
-                df_merge = pd.merge(input_groupped, rni_groupped, how='outer', left_on=input_merge_key,
-                                    right_on=rni_merge_key, indicator=True, suffixes=['_INPUT', '_RNI'])
-                df_both = df_merge.loc[df_merge['_merge'] == 'both']  # Interval found on both input table and RNI
-                df_input_only = df_merge.loc[df_merge['_merge'] == 'left_only']  # Interval found only on the input
-
-                if len(df_input_only) != 0 and find_no_match:
-                    missing_segments = df_input_only.groupby(by=[from_m_col, to_m_col]).groups.keys()
-                    str_segment = [str(x).replace(', ', '-') for x in missing_segments]
-                    error_message = "Segmen di rute {0} pada interval {1} tidak memiliki pasangan pada table RNI.".\
-                        format(route, str(str_segment).strip('[]'))
-                    self.error_list.append(error_message)
-                    self.insert_route_message(route, 'error', error_message)
+                entries.append(((route_order[route], 0), route, error_message, True))
+                continue
 
-                if len(df_both) == 0:
-                    error_message = "Rute {0} tidak memiliki interval segmen yang cocok dengan data RNI".format(route)
-                    self.insert_route_message(route, 'error', error_message)
-                    continue
+            rni_dfs.append(pd.DataFrame({
+                '_route': route,
+                from_m_col: pd.Series(df_rni[rni_from_col]*self.rni_mfactor).round(2).astype(int).values,
+                to_m_col: pd.Series(df_rni[rni_to_col]*self.rni_mfactor).round(2).astype(int).values,
+                lane_code: df_rni[rni_lane_col].values
+            }))
 
-                # Modify the lane_code variable
-                if lane_code == rni_lane_col:
-                    input_lane_code = lane_code+'_INPUT'
-                    merge_rni_lane_col = rni_lane_col+'_RNI'
-                else:
-                    input_lane_code = lane_code
-                    merge_rni_lane_col = rni_lane_col
-
-                # Create a column containing intersection count of lane code combination
-                # between the input table and RNI Table
-                df_both.loc[:, 'lane_intersect_count'] = pd.Series([len(set(a).intersection(b)) for a, b in
-                                                                    zip(df_both[input_lane_code], df_both[merge_rni_lane_col])],
-                                                                   index=df_both.index)
-
-                # Create a column containing the lane diff of Input - RNI
-                df_both.loc[:, 'input-RNI'] = pd.Series([np.setdiff1d(a, b) for a, b in
-                                                         zip(df_both[input_lane_code], df_both[merge_rni_lane_col])],
-                                                        index=df_both.index)
-
-                # Create a column containing the lane diff of RNI - Input
-                df_both.loc[:, 'RNI-input'] = pd.Series([np.setdiff1d(b, a) for a, b in
-                                                         zip(df_both[input_lane_code], df_both[merge_rni_lane_col])],
-                                                        index=df_both.index)
-
-                df_both[from_m_col] = pd.Series(df_both[from_m_col]).astype(str)
-                df_both[to_m_col] = pd.Series(df_both[to_m_col]).astype(str)
-                df_both['segment'] = pd.Series((df_both[from_m_col])+'-'+(df_both[to_m_col]))
-                df_both.set_index(['segment'], inplace=True)  # Make segment as the index
+        if len(rni_dfs) == 0:
+            self._insert_sorted_messages(entries)
+            return self
 
+        rni_lanes = pd.concat(rni_dfs, sort=False)[lane_keys].drop_duplicates()
+        input_lanes = df.assign(_route=df[routeid_col].astype(str))
+        input_lanes = input_lanes.loc[input_lanes['_route'].isin(rni_lanes['_route']), lane_keys].drop_duplicates()
+
+        # Segment interval found on both input table and RNI, or only on the input table
+        df_segment = pd.merge(input_lanes[segment_keys].drop_duplicates(), rni_lanes[segment_keys].drop_duplicates(),
+                              how='left', on=segment_keys, indicator=True).sort_values(segment_keys)
+        input_only = df_segment.loc[df_segment['_merge'] == 'left_only']
+        both_routes = set(df_segment.loc[df_segment['_merge'] == 'both', '_route'])
+
+        for route in input_lanes['_route'].unique():
+            if find_no_match and route in set(input_only['_route']):
+                missing_segments = input_only.loc[input_only['_route'] == route].\
+                    groupby(by=[from_m_col, to_m_col]).groups.keys()
+                str_segment = [str(x).replace(', ', '-') for x in missing_segments]
+                error_message = "Segmen di rute {0} pada interval {1} tidak memiliki pasangan pada table RNI.".\
+                    format(route, str(str_segment).strip('[]'))
+                entries.append(((route_order[route], 1), route, error_message, True))
+
+            if route not in both_routes:
+                error_message = "Rute {0} tidak memiliki interval segmen yang cocok dengan data RNI".format(route)
+                entries.append(((route_order[route], 2), route, error_message, False))
+
+        # The lane of every matching segment, 'both' is the lane intersection, 'left_only' is the input excess lane and
+        # 'right_only' is the input missing lane.
+        both_segments = df_segment.loc[df_segment['_merge'] == 'both', segment_keys]
+        df_lane = pd.merge(pd.merge(input_lanes, both_segments, on=segment_keys),
+                           pd.merge(rni_lanes, both_segments, on=segment_keys),
+                           how='outer', on=lane_keys, indicator=True).sort_values(lane_keys)
+        df_lane[lane_code] = df_lane[lane_code].astype(str)
+
+        intersect_count = (df_lane['_merge'] == 'both').groupby([df_lane[x] for x in segment_keys]).sum()
+        segment_lanes = {key: (rows.loc[rows['_merge'] == 'left_only', lane_code].tolist(),
+                               rows.loc[rows['_merge'] == 'right_only', lane_code].tolist())
+                         for key, rows in df_lane.loc[df_lane['_merge'] != 'both'].groupby(segment_keys)}
+
+        for i, (route, from_m, to_m) in enumerate(intersect_count.index):
+            segment = '{0}-{1}'.format(from_m, to_m)
+            excess_lane, missing_lane = segment_lanes.get((route, from_m, to_m), (list(), list()))
+
+            if intersect_count.iat[i] == 0:
                 # Zero match mean there is no intersection between input and RNI segment
-                zero_match_i = df_both.loc[df_both['lane_intersect_count'] == 0].index.tolist()
-                for i in zero_match_i:
-                    error_message = 'Segmen {0} pada rute {1} memiliki kombinasi lane yang tidak cocok dengan RNI.'.\
-                        format(i, route)
-                    self.error_list.append(error_message)
-                    self.insert_route_message(route, 'error', error_message)
-
-                # 1st partial match case is where there is a partial match and input have excess lane
-                # and also missing lane
-                partial_1st = df_both.loc[(df_both['lane_intersect_count'] != 0) &
-                                          (df_both['RNI-input'].str.len() != 0) &
-                                          (df_both['input-RNI'].str.len() != 0)].index.tolist()
-                for i in partial_1st:
-                    excess_lane = [str(x) for x in df_both.at[i, 'input-RNI']]
-                    missing_lane = [str(x) for x in df_both.at[i, 'RNI-input']]
-                    error_message = 'Segmen {0} pada rute {1} tidak memiliki lane {2} dan memiliki lane {3} yang tidak terdapat pada tabel RNI.'.\
-                        format(i, route, missing_lane, excess_lane)
-                    self.error_list.append(error_message)
-                    self.insert_route_message(route, 'error', error_message)
+                error_message = 'Segmen {0} pada rute {1} memiliki kombinasi lane yang tidak cocok dengan RNI.'.\
+                    format(segment, route)
+                category = 3
+            elif excess_lane and missing_lane:
+                # 1st partial match case, input have excess lane and also missing lane
+                error_message = 'Segmen {0} pada rute {1} tidak memiliki lane {2} dan memiliki lane {3} yang tidak terdapat pada tabel RNI.'.\
+                    format(segment, route, missing_lane, excess_lane)
+                category = 4
+            elif excess_lane:
+                # 2nd partial match case, input have excess lane
+                error_message = 'Lane {0} pada segmen {1} di rute {2} tidak terdapat pada tabel RNI.'.\
+                    format(excess_lane, segment, route)
+                category = 5
+            elif missing_lane:
+                # 3rd partial match case, input have a missing lane
+                error_message = 'Segmen {0} pada rute {1} tidak memiliki lane {2}.'.format(segment, route, missing_lane)
+                category = 6
+            else:
+                continue
 
-                # 2nd partial match case is where there is a partial match and input have excess lane
-                partial_2nd = df_both.loc[(df_both['lane_intersect_count'] != 0) &
-                                          (df_both['RNI-input'].str.len() == 0) &
-                                          (df_both['input-RNI'].str.len() != 0)].index.tolist()
-                for i in partial_2nd:
-                    excess_lane = [str(x) for x in df_both.at[i, 'input-RNI']]
-                    error_message = 'Lane {0} pada segmen {1} di rute {2} tidak terdapat pada tabel RNI.'.\
-                        format(excess_lane, i, route)
-                    self.error_list.append(error_message)
-                    self.insert_route_message(route, 'error', error_message)
+            entries.append(((route_order[route], category, i), route, error_message, True))
 
-                # 3rd partial match case is where there is a partial match and input have a missing lane
-                partial_3rd = df_both.loc[(df_both['lane_intersect_count'] != 0) &
-                                          (df_both['RNI-input'].str.len() != 0) &
-                                          (df_both['input-RNI'].str.len() == 0)].index.tolist()
-                for i in partial_3rd:
-                    missing_lane = [str(x) for x in df_both.at[i, 'RNI-input']]
-                    error_message = 'Segmen {0} pada rute {1} tidak memiliki lane {2}.'. \
-                        format(i, route, missing_lane)
-                    self.error_list.append(error_message)
-                    self.insert_route_message(route, 'error', error_message)
+        self._insert_sorted_messages(entries)
 
         return self
 
@@ -1372,13 +1294,7 @@ class EventValidation(object):
         :param direction_col: The direction column in the input DataFrame.
         :return:
         """
-        df = self.copy_valid_df()  # Create a valid DataFrame copy
-
-        # If there is a route selection request
-        if routes == 'ALL':
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
+        df = self.copy_valid_df(routes=routes)  # Create a valid DataFrame copy
 
         # The False row
         false_row_l = df.loc[(df[lane_code].str.startswith("L")) & (df[direction_col] == "O")]  # The L lane with O dir
@@ -1405,13 +1321,7 @@ class EventValidation(object):
         :param rni_route_col: The RNI Table RouteID column.
         :return:
         """
-        df = self.copy_valid_df()  # Create a valid DataFrame copy
-
-        # If there is a route selection request
-        if routes == 'ALL':
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
+        df = self.copy_valid_df(routes=routes)  # Create a valid DataFrame copy
 
         input_routes = df[routeid_col]  # The routes in the input table in np.array format
         rni_df = event_fc_to_df(rni_table, rni_route_col, input_routes.tolist(), rni_route_col, self.sde_connection,
@@ -1438,69 +1348,108 @@ class EventValidation(object):
         :param road_type_col: The road type column in the RNI DataFrame.
         :return:
         """
-        df = self.copy_valid_df()
-
-        if routes == 'ALL':
-            pass
-        elif len(routes) == 0:
+        if (routes != 'ALL') and (len(routes) == 0):
             return self
-        else:
-            df = self.selected_route_df(df, routes)  # Create the DataFrame with only requested routes
 
-        # The groupped DataFrame by RouteID, FromMeasure, and ToMeasure
-        df_groupped = df.groupby(by=[routeid_col, from_m_col, to_m_col]).\
-            agg({lane_codes: ['nunique', 'unique'], median_col: ['sum', 'nunique'],
-                 road_type_col: ['unique', 'nunique']}).reset_index()
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)  # Only copy the requested routes
 
-        for index, row in df_groupped.iterrows():
-            route = str(row[routeid_col][0])
-            from_m = str(row[from_m_col][0])
-            to_m = str(row[to_m_col][0])
-            road_type_code_list = row[road_type_col]['unique']  # Get the road type list
-            road_type_count = int(row[road_type_col]['nunique'])
+        segment_keys = [routeid_col, from_m_col, to_m_col]
+        df = df.dropna(subset=segment_keys)
 
-            # If the road type is more than one in a single segment then give error message
-            if road_type_count == 1:
+        if df.empty:
+            return self
 
-                road_type_code = str(road_type_code_list[0])  # The road type in string
-                if road_type_code not in road_type_details.keys():
-                    continue
+        side = self._lane_side_number(df[lane_codes])[0]
+        grouped = df.assign(_side=side).groupby(segment_keys)
+
+        # The segment summary, the road type is taken from the first row of the segment.
+        segments = pd.DataFrame({
+            'lane_count': grouped[lane_codes].nunique(),
+            'direction': grouped['_side'].nunique(),
+            'median_sum': grouped[median_col].sum(),
+            'median_count': grouped[median_col].nunique(),
+            'type_count': grouped[road_type_col].nunique()
+        })
+        first_rows = df.loc[~df.duplicated(segment_keys)].set_index(segment_keys)
+        segments['road_type'] = first_rows[road_type_col].reindex(segments.index).astype(str)
+
+        # The road type lookup table joined to every segment
+        lookup = pd.DataFrame.from_dict(road_type_details, orient='index').\
+            reindex(columns=['lane_count', 'direction', 'median']).add_prefix('type_')
+        segments = segments.join(lookup, on='road_type')
+
+        known_type = (segments['type_count'] == 1) & segments['road_type'].isin(lookup.index)
+        median_exist = segments['type_median'].map(bool)
+
+        lane_error = known_type & (segments['lane_count'] != segments['type_lane_count'])
+        direction_error = known_type & (segments['direction'] != segments['type_direction'])
+        median_error = known_type & ((median_exist & (segments['median_sum'] == 0)) |
+                                     (~median_exist & (segments['median_sum'] != 0)))
+        median_count_error = known_type & (segments['median_count'] > 1)
+        type_error = segments['type_count'] != 1
+
+        error_groups = np.flatnonzero((lane_error | direction_error | median_error | median_count_error | type_error).
+                                      values)
+
+        if len(error_groups) == 0:
+            return self
 
-                lane_count = road_type_details[road_type_code]['lane_count']  # The required lane count for specified type
-                direction = road_type_details[road_type_code]['direction']  # The direction required
-                median_exist = road_type_details[road_type_code]['median']  # The median existence requirement
-
-                input_lane_count = row[lane_codes]['nunique']  # The lane count from the input
-                input_direction = len(set([x[0] for x in row[lane_codes]['unique']]))  # The direction from input 1 or 2 dir
-                input_median = row[median_col]['sum']  # The total median from the input
-                input_median_count = row[median_col]['nunique']
-
-                if input_lane_count != lane_count:
-                    result = "Rute {0} pada segmen {1}-{2} memiliki jumlah lane ({3} lane) yang tidak sesuai dengan road type {4} ({5} lane).".\
-                        format(route, from_m, to_m, input_lane_count, road_type_code, lane_count)
-                    self.insert_route_message(route, 'error', result)
-
-                if input_direction != direction:
-                    result = "Rute {0} pada segmen {1}-{2} memiliki arah ({3} arah) yang tidak sesuai dengan road type {4} ({5} arah).".\
-                        format(route, from_m, to_m, input_direction, road_type_code, direction)
-                    self.insert_route_message(route, 'error', result)
-
-                if (median_exist and (input_median == 0)) or (not median_exist and (input_median != 0)):
-                    result = "Rute {0} pada segmen {1}-{2} memiliki median yang tidak sesuai dengan road type {3}.".\
-                        format(route, from_m, to_m, road_type_code)
-                    self.insert_route_message(route, 'error', result)
-
-                if input_median_count > 1:
-                    msg = "Rute {0} pada segmen {1}-{2} memiliki nilai median yang tidak konsisten.".\
-                        format(route, from_m, to_m)
-                    self.insert_route_message(route, 'error', msg)
-            else:
+        type_error_groups = error_groups[type_error.values[error_groups]]
+        group_id = grouped.ngroup()
+        type_rows = df.loc[group_id.isin(type_error_groups)]
+        road_type_list = type_rows.groupby(group_id.loc[type_rows.index])[road_type_col].unique()
+
+        for g in error_groups:
+            route, from_m, to_m = [str(x) for x in segments.index[g]]
+            road_type_code = segments['road_type'].iat[g]
+            input_lane_count = segments['lane_count'].iat[g]
+            input_direction = segments['direction'].iat[g]
+
+            if type_error.iat[g]:
                 result = "Rute {0} pada segmen {1}-{2} memiliki road type yang tidak konsisten {3}.".\
-                    format(route, from_m, to_m, road_type_code_list)
+                    format(route, from_m, to_m, road_type_list[g])
                 self.insert_route_message(route, 'error', result)
+                continue
+
+            lane_count = road_type_details[road_type_code]['lane_count']  # The required lane count for specified type
+            direction = road_type_details[road_type_code]['direction']  # The direction required
+
+            if lane_error.iat[g]:
+                result = "Rute {0} pada segmen {1}-{2} memiliki jumlah lane ({3} lane) yang tidak sesuai dengan road type {4} ({5} lane).".\
+                    format(route, from_m, to_m, input_lane_count, road_type_code, lane_count)
+                self.insert_route_message(route, 'error', result)
+
+            if direction_error.iat[g]:
+                result = "Rute {0} pada segmen {1}-{2} memiliki arah ({3} arah) yang tidak sesuai dengan road type {4} ({5} arah).".\
+                    format(route, from_m, to_m, input_direction, road_type_code, direction)
+                self.insert_route_message(route, 'error', result)
+
+            if median_error.iat[g]:
+                result = "Rute {0} pada segmen {1}-{2} memiliki median yang tidak sesuai dengan road type {3}.".\
+                    format(route, from_m, to_m, road_type_code)
+                self.insert_route_message(route, 'error', result)
+
+            if median_count_error.iat[g]:
+                msg = "Rute {0} pada segmen {1}-{2} memiliki nilai median yang tidak konsisten.".\
+                    format(route, from_m, to_m)
+                self.insert_route_message(route, 'error', msg)
 
         return self
 
+    @staticmethod
+    def _rtc_groups(df, routeid_col='LINKID', direction_col='SURVEY_DIREC'):
+        """
+        The (route, direction) group order of the RTC checks, the route is in the route first appearance order and the
+        direction is in the direction first appearance order within the route.
+        :param df: The input DataFrame.
+        :return: Pandas Series of the group order for every row.
+        """
+        route_order = df[routeid_col].map({route: i for i, route in enumerate(df[routeid_col].unique())})
+        pair_order = df.groupby([routeid_col, direction_col], sort=False).ngroup()
+        group_key = route_order.values * (pair_order.max() + 1) + pair_order.values
+
+        return pd.Series(pd.factorize(group_key, sort=True)[0], index=df.index)
+
     def rtc_duration_check(self, duration=3, routes='ALL', routeid_col='LINKID', surv_date_col='SURVEY_DATE',
                            hours_col='SURVEY_HOURS', minute_col='SURVEY_MINUTE', direction_col='SURVEY_DIREC',
                            interval=15, **kwargs):
@@ -1516,55 +1465,31 @@ class EventValidation(object):
         :param interval: The interval duration in minutes.
         :return:
         """
-        def timestamp_col(date, hour, minute, col='_timestamp'):
-            """
-            This function will populate a column with a timestamp data for every row.
-            :param date: Date column of the input table.
-            :param hour: Hour column of the input table.
-            :param minute: Minute column of the input table.
-            :param col: The timestamp column.
-            :return:
-            """
-            for index, row in df_route_dir.iterrows():
-                row_date = row[date]
-                row_hour = row[hour]
-                row_minute = row[minute]
-                df_route_dir.loc[index, [col]] = self.rtc_time_stamp(row_date, row_hour, row_minute)
-
-            df_route_dir[col] = pd.to_datetime(df_route_dir[col])
-
-        df = self.copy_valid_df()  # Create a copy of input table DataFrame
-        df['_timestamp'] = pd.Series(None)
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)  # Only copy the requested routes
 
-        if routes == 'ALL':
-            pass
-        else:
-            df = self.selected_route_df(df, routes)  # If there is a route request then only process the selected route
-
-        for route, direction in self.route_lane_tuple(df, routeid_col, direction_col):  # Iterate over all available route
-            df_route_dir = df.loc[(df[routeid_col] == route) & (df[direction_col] == direction)].reset_index()  # Create a route and lane DataFrame
-            timestamp_col(surv_date_col, hours_col, minute_col)
-
-            survey_start_index = df_route_dir['_timestamp'].idxmin()  # The survey start row index
-            survey_start_date = df_route_dir.at[survey_start_index, surv_date_col]  # The survey start date
-            survey_start_hour = df_route_dir.at[survey_start_index, hours_col]  # The survey start hours
-            survey_start_minutes = df_route_dir.at[survey_start_index, minute_col] - interval  # The survey start minutes
-            start_timestamp = self.rtc_time_stamp(survey_start_date, survey_start_hour, survey_start_minutes)
-
-            survey_end_index = df_route_dir['_timestamp'].idxmax()  # The survey end row index
-            survey_end_date = df_route_dir.at[survey_end_index, surv_date_col]  # The survey end date
-            survey_end_hour = df_route_dir.at[survey_end_index, hours_col]  # The survey end hours
-            survey_end_minutes = df_route_dir.at[survey_end_index, minute_col]  # The survey end minutes
-            end_timestamp = self.rtc_time_stamp(survey_end_date, survey_end_hour, survey_end_minutes)
-
-            required_delta = timedelta(minutes=duration*24*60)  # The required survey duration
-
-            if end_timestamp < (required_delta+start_timestamp):
-                actual_delta = abs((end_timestamp-(required_delta+start_timestamp)).total_seconds()/60)  # The actual survey duration in minutes
-                duration_in_h = duration*24  # The required survey duration in hours
-                result = "Rute {0} pada arah {1} memiliki kekurangan durasi survey RTC sebanyak {2} menit dari total {3} jam yang harus dilakukan.".\
-                    format(route, direction, actual_delta, duration_in_h)
-                self.insert_route_message(route, 'error', result)
+        df = df.dropna(subset=[routeid_col, direction_col])
+
+        if df.empty:
+            return self
+
+        df['_group'] = self._rtc_groups(df, routeid_col, direction_col)
+        df['_timestamp'] = self.rtc_timestamps(df, surv_date_col, hours_col, minute_col)
+        grouped = df.groupby('_group')
+
+        # The survey start is the earliest row timestamp minus the interval duration.
+        survey = pd.DataFrame({'route': grouped[routeid_col].first(), 'direction': grouped[direction_col].first(),
+                               'start': grouped['_timestamp'].min() - timedelta(minutes=interval),
+                               'end': grouped['_timestamp'].max()})
+        required_delta = timedelta(minutes=duration*24*60)  # The required survey duration
+        survey['shortage'] = required_delta - (survey['end'] - survey['start'])
+        error_rows = survey.loc[survey['shortage'] > timedelta(0)]
+
+        for route, direction, shortage in zip(error_rows['route'], error_rows['direction'], error_rows['shortage']):
+            actual_delta = shortage.total_seconds()/60  # The shortage in minutes
+            duration_in_h = duration*24  # The required survey duration in hours
+            result = "Rute {0} pada arah {1} memiliki kekurangan durasi survey RTC sebanyak {2} menit dari total {3} jam yang harus dilakukan.".\
+                format(route, direction, actual_delta, duration_in_h)
+            self.insert_route_message(route, 'error', result)
 
         return self
 
@@ -1572,7 +1497,8 @@ class EventValidation(object):
                                 hours_col='SURVEY_HOURS', minute_col='SURVEY_MINUTE', direction_col='SURVEY_DIREC',
                                 **kwargs):
         """
-        This class method will check the RTC survey time interval.
+        This class method will check the RTC survey time interval. The consecutive survey rows which does not have the
+        required interval are reported as a single run.
         :param interval: The survey interval time (in minutes), the default value is 15 minutes.
         :param routeid_col: The RouteID column in the event DataFrame.
         :param surv_date_col: The survey date column in the event DataFrame.
@@ -1581,46 +1507,55 @@ class EventValidation(object):
         :param direction_col: The direction column in the event DataFrame.
         :return:
         """
-        df = self.copy_valid_df()
-
-        if routes == 'ALL':
-            pass
-        else:
-            df = self.selected_route_df(df, routes)  # If there is a route request then only process the selected route
-
-        for route, direction in self.route_lane_tuple(df, routeid_col, direction_col):  # Iterate over all available route
-            df_route_dir = df.loc[(df[routeid_col] == route) & (df[direction_col] == direction)]
-            df_route_dir.sort_values([surv_date_col, hours_col, minute_col], inplace=True)
-            df_route_dir.reset_index(inplace=True)  # Reset the index
-
-            for index, row in df_route_dir.iterrows():
-                row_date = row[surv_date_col]
-                row_hour = row[hours_col]
-                row_minute = row[minute_col]
-
-                row_timestamp = self.rtc_time_stamp(row_date, row_hour, row_minute)
-                row_timestamp_start = self.rtc_time_stamp(row_date, row_hour, (row_minute-interval))
-                date_timestamp_isof = row[surv_date_col].date().isoformat()
-                row_timestamp_isof = row_timestamp_start.date().isoformat()
-
-                if index == 0:
-                    pass
-                else:
-                    delta_start_end = (row_timestamp - start_timestamp).total_seconds()/60  # Interval in minutes
-
-                    if delta_start_end != interval:  # If the delta does not match the requirement
-                        end_time_str = row_timestamp.strftime('%d/%m/%Y %H:%M')  # Start time in string format
-                        start_time_str = start_timestamp.strftime('%d/%m/%Y %H:%M')  # End time in string format
-                        result = "Survey RTC di rute {0} pada arah {1} di interval survey {2} - {3} tidak berjarak {4} menit.".\
-                            format(route, direction, start_time_str, end_time_str, interval)
-                        self.insert_route_message(route, 'error', result)
+        df = self.copy_valid_df(routes=routes)
+        df = df.dropna(subset=[routeid_col, direction_col])
 
-                if date_timestamp_isof != row_timestamp_isof:  # Find the date which does not match with the hours
-                    result = "Waktu survey RTC di rute {0} {1} pada tanggal {2} jam {3} menit {4} seharusnya memiliki tanggal {5}.".\
-                        format(route, direction, date_timestamp_isof, row_hour, row_minute, row_timestamp_isof)
-                    self.insert_route_message(route, 'error', result)
+        if df.empty:
+            return self
 
-                start_timestamp = row_timestamp
+        df['_group'] = self._rtc_groups(df, routeid_col, direction_col)
+        df['_timestamp'] = self.rtc_timestamps(df, surv_date_col, hours_col, minute_col)
+        df = df.sort_values(['_group', surv_date_col, hours_col, minute_col], kind='mergesort')
+
+        group = df['_group'].values
+        timestamp = df['_timestamp']
+        previous = timestamp.shift(1)
+        first_row = np.insert(group[1:] != group[:-1], 0, True)  # The first row of every (route, direction)
+
+        delta = (timestamp - previous).dt.total_seconds()/60  # Interval in minutes
+        bad_interval = ~first_row & (delta != interval).values
+
+        # The run of consecutive bad interval, a run never crosses the group because the first row is never bad.
+        run_start = bad_interval & ~np.insert(bad_interval[:-1], 0, False)
+        run_id = np.cumsum(run_start)
+        entries = list()  # The (sort key, route, message, append to error list) entries
+
+        if bad_interval.any():
+            positions = np.flatnonzero(bad_interval)
+            runs = pd.DataFrame({'first': positions, 'last': positions}).groupby(run_id[bad_interval]).\
+                agg({'first': 'min', 'last': 'max'})
+
+            for first, last in zip(runs['first'], runs['last']):
+                route = df[routeid_col].iat[first]
+                direction = df[direction_col].iat[first]
+                start_time_str = previous.iat[first].strftime('%d/%m/%Y %H:%M')  # Start time in string format
+                end_time_str = timestamp.iat[last].strftime('%d/%m/%Y %H:%M')  # End time in string format
+                result = "Survey RTC di rute {0} pada arah {1} di interval survey {2} - {3} tidak berjarak {4} menit.".\
+                    format(route, direction, start_time_str, end_time_str, interval)
+                entries.append(((first, 0), route, result, False))
+
+        # The row date should be the same with the interval start date.
+        start_date = (timestamp - timedelta(minutes=interval)).dt.normalize()
+        wrong_date = (pd.to_datetime(df[surv_date_col]).dt.normalize() != start_date).values
+
+        for pos in np.flatnonzero(wrong_date):
+            route = df[routeid_col].iat[pos]
+            result = "Waktu survey RTC di rute {0} {1} pada tanggal {2} jam {3} menit {4} seharusnya memiliki tanggal {5}.".\
+                format(route, df[direction_col].iat[pos], df[surv_date_col].iat[pos].date().isoformat(),
+                       df[hours_col].iat[pos], df[minute_col].iat[pos], start_date.iat[pos].date().isoformat())
+            entries.append(((pos, 1), route, result, False))
+
+        self._insert_sorted_messages(entries)
 
         return self
 
@@ -1633,11 +1568,7 @@ class EventValidation(object):
         :param not_allowed:
         :return:
         """
-        df = self.copy_valid_df()
-        if routes == "ALL":
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
+        df = self.copy_valid_df(routes=routes)
 
         rni_table = self.config.table_names['rni']
         rni_routeid = self.config.table_fields['route_id']
@@ -1669,7 +1600,7 @@ class EventValidation(object):
         :param routes: The requested routes
         :return:
         """
-        df = self.selected_route_df(self.copy_valid_df(), routes)  # Create a copy of valid DataFrame
+        df = self.copy_valid_df(routes=routes)  # Create a copy of valid DataFrame
         route_list = self.route_lane_tuple(df, routeid_col, None, True)  # List of all route in the input DataFrame.
 
         for route in route_list:
@@ -1735,12 +1666,12 @@ class EventValidation(object):
         :param routes: The requested routes.
         :return:
         """
-        df = self.selected_route_df(self.copy_valid_df(), routes)  # Create a valid DataFrame copy
+        df = self.copy_valid_df(routes=routes)  # Create a valid DataFrame copy
         route_list = self.route_lane_tuple(df, routeid_col, None, True)
 
         for route in route_list:  # Iterate over all available route in the input table.
-            df_comp = event_fc_to_df(comp_fc, [comp_route_col, comp_from_col, comp_to_col, comp_lane_width], route,
-                                     comp_route_col, self.sde_connection, is_table=False, include_all=True)
+            df_comp = self.prefetch.table_df(comp_fc, [comp_route_col, comp_from_col, comp_to_col, comp_lane_width],
+                                             route, comp_route_col, is_table=False, include_all=True)
             df_route = self.selected_route_df(df, route)
 
             if len(df_comp) == 0:
@@ -1804,7 +1735,7 @@ class EventValidation(object):
         :param surftype_col: Surface type column.
         :return:
         """
-        df = self.selected_route_df(self.copy_valid_df(), routes)  # Route selection
+        df = self.copy_valid_df(routes=routes)  # Route selection
         grouped = df.groupby([routeid_col, from_m_col, lane_code])
         group_surface_count = grouped[surftype_col].nunique().reset_index()  # Count of surface type unique value
         error_row = group_surface_count.loc[group_surface_count[surftype_col] > 1]
@@ -1838,7 +1769,7 @@ class EventValidation(object):
         :param empty_as_null: If True then empty value is recognized as Null, otherwise recognized as 0.
         :return:
         """
-        df = self.selected_route_df(self.copy_valid_df(), routes)  # Route selection
+        df = self.copy_valid_df(routes=routes)  # Route selection
         filtered = df.groupby([routeid_col, to_m_col, from_m_col]).filter(lambda x: np.any(x[r_shwidth].notnull()) &
                                                                                     np.any(x[l_shwidth].notnull()) &
                                                                                     np.any(x[median_col].notnull()))
@@ -1891,6 +1822,52 @@ class EventValidation(object):
 
         return self
 
+    def _rni_merge(self, df, added_column, routeid_col='LINKID', from_m_col='STA_FROM', to_m_col='STA_TO',
+                   lane_code='LANE_CODE'):
+        """
+        Merge the requested RNI column to the input DataFrame for all routes at once. The RNI rows are read from the
+        prefetched RNI table.
+        :param df: The input DataFrame.
+        :param added_column: The requested RNI column.
+        :return: (merged DataFrame, list of route without RNI data). The merged DataFrame is sorted by the route order
+        and the input row order, the route order is stored in the '_route_order' column.
+        """
+        rni_table = self.config.table_names['rni']
+        rni_routeid = self.config.table_fields['rni']['route_id']
+        rni_from_col = self.config.table_fields['rni']['from_measure']
+        rni_to_col = self.config.table_fields['rni']['to_measure']
+        rni_lane_col = self.config.table_fields['rni']['lane_code']
+        input_key = [routeid_col, from_m_col, to_m_col, lane_code]
+
+        route_list = self.route_lane_tuple(df, routeid_col, lane_code, route_only=True)
+        search_field = [rni_routeid, rni_from_col, rni_to_col, rni_lane_col, added_column]
+        rni_dfs = list()
+        missing_routes = list()
+
+        for route in route_list:
+            df_rni = self.prefetch.table_df(rni_table, search_field, route, rni_routeid, is_table=True)
+
+            if len(df_rni) == 0:
+                missing_routes.append(route)
+            else:
+                rni_dfs.append(df_rni)
+
+        df_rni = pd.concat(rni_dfs or [pd.DataFrame(columns=search_field)], sort=False)
+        df_rni = pd.DataFrame({
+            routeid_col: df_rni[rni_routeid].astype(str).values,
+            from_m_col: (df_rni[rni_from_col]*self.rni_mfactor).astype(int).values,
+            to_m_col: (df_rni[rni_to_col]*self.rni_mfactor).astype(int).values,
+            lane_code: df_rni[rni_lane_col].values,
+            added_column: df_rni[added_column].values
+        })
+
+        route_order = {route: i for i, route in enumerate(route_list)}
+        df = df.assign(_route_order=df[routeid_col].astype(str).map(route_order), _row=np.arange(len(df)))
+        df = df.assign(**{routeid_col: df[routeid_col].astype(str)})
+        merged = pd.merge(df, df_rni, on=input_key)
+
+        return merged.sort_values(['_route_order', '_row'], kind='mergesort'), missing_routes
+
     def pci_asp_check(self, routes='ALL', asp_pref='AS_', routeid_col='LINKID', from_m_col='STA_FROM',
                       to_m_col='STA_TO', lane_code='LANE_CODE', segment_len='SEGMENT_LENGTH', **kwargs):
         """
@@ -1901,50 +1878,118 @@ class EventValidation(object):
         :param routes: The route selections.
         :return:
         """
-        df = self.copy_valid_df()  # Create a valid DataFrame copy
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)  # Only copy the requested routes
 
-        col_list = df.columns.tolist()
-        col_mask2 = np.char.startswith(col_list, asp_pref)
+        asp_cols = [col for col in df.columns if col.startswith(asp_pref)]
         rni_lane_width = self.config.table_fields['rni']['lane_width']
 
-        if not col_mask2.any():
+        if len(asp_cols) == 0:
             return self  # The specified prefix does not match any column.
 
-        if routes == 'ALL':  # Check for route request
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
+        merge, missing_routes = self._rni_merge(df, rni_lane_width, routeid_col, from_m_col, to_m_col, lane_code)
+        entries = list()  # The (sort key, route, message, append to error list) entries
 
-        route_list = self.route_lane_tuple(df, routeid_col, lane_code, route_only=True)
-        for route in route_list:
-            df_route = df.loc[df[routeid_col] == route]
-            merge = add_rni_data(df_route, routeid_col, from_m_col, to_m_col, lane_code, self.sde_connection,
-                                 added_column=rni_lane_width, mfactor=self.rni_mfactor)
+        for route in missing_routes:  # The RNI DataFrame is empty.
+            error_message = "Data RNI rute {0} tidak tersedia".format(route)
+            entries.append(((route, -1, 0), route, error_message, False))
 
-            if merge is None:  # If the RNI DataFrame is empty.
-                error_message = "Data RNI rute {0} tidak tersedia".format(route)
-                self.insert_route_message(route, 'error', error_message)
-                continue
+        calc_val = (merge[segment_len]*merge[rni_lane_width]*1000).values  # The segment area
+        asp_values = merge[asp_cols].values.astype(float)
 
-            calc_asp_col = '_calc'
-            merge[calc_asp_col] = pd.Series(None)
-            merge.loc[:, [calc_asp_col]] = merge[segment_len]*merge[rni_lane_width]*1000
+        with np.errstate(invalid='ignore'):
+            exceed = ~np.isnan(asp_values) & ~(asp_values <= calc_val[:, None])
 
-            for index, row in merge.iterrows():
-                calc_val = row[calc_asp_col]
-                from_m = row[from_m_col]
-                to_m = row[to_m_col]
-                lane = row[lane_code]
-                asp_series = row[col_mask2].mask(row[col_mask2] <= calc_val)
-                asp_series.dropna(inplace=True)
+        for row, col in zip(*np.nonzero(exceed)):
+            route = merge[routeid_col].iat[row]
+            error_message = 'Rute {0} pada segmen {1}-{2} {3} memiliki nilai {4} ({5}) yang melebihi nilai luas segmen ({6}).'.\
+                format(route, merge[from_m_col].iat[row], merge[to_m_col].iat[row], merge[lane_code].iat[row],
+                       asp_cols[col], merge[asp_cols[col]].iat[row], calc_val[row])
+            entries.append(((route, row, col), route, error_message, False))
 
-                for col, value in asp_series.iteritems():
-                    error_message = 'Rute {0} pada segmen {1}-{2} {3} memiliki nilai {4} ({5}) yang melebihi nilai luas segmen ({6}).'.\
-                        format(route, from_m, to_m, lane, col, value, calc_val)
-                    self.insert_route_message(route, 'error', error_message)
+        route_order = {route: i for i, route in enumerate(self.route_lane_tuple(df, routeid_col, lane_code, True))}
+        self._insert_sorted_messages([((route_order[key[0]],) + key[1:], route, msg, to_error_list)
+                                      for key, route, msg, to_error_list in entries])
 
         return self
 
+    def _pci_value_rules(self, df, value_cols, damage_cols, min_value=0, max_value=100, check_null=True,
+                         routeid_col='LINKID', from_m_col='STA_FROM', to_m_col='STA_TO', lane_code='LANE_CODE',
+                         order=0):
+        """
+        The PCI value consistency kernel. Every value column (such as PCI or SEV_AS_x) is checked against its damage
+        column group (such as VOL_AS_x), the rules are evaluated for all rows and all value columns at once as 2-D
+        arrays.
+        :param df: The input DataFrame.
+        :param value_cols: List of value column.
+        :param damage_cols: List of damage column list, the damage columns of every value column.
+        :param min_value: The minimum value of the value column.
+        :param max_value: The maximum value of the value column.
+        :param check_null: Check for consistency between the value and the damage columns if the value is Null.
+        :param order: The first item of the message sort key.
+        :return: List of (sort key, route, message, append to error list) entries.
+        """
+        if (min_value is None) and (max_value is None):
+            raise TypeError("max_value and min_value could not be None at the same time.")
+
+        row_count = len(df)
+        no_match = np.zeros(row_count, dtype=bool)
+
+        # The value block (rows x value columns)
+        value_null = df[value_cols].isnull().values
+        is_min = np.column_stack([no_match if min_value is None else (df[col] == min_value).values
+                                  for col in value_cols] or [no_match])
+        is_max = np.column_stack([no_match if max_value is None else (df[col] == max_value).values
+                                  for col in value_cols] or [no_match])
+
+        # The damage block reduced to (rows x value columns), a value column without damage column is all Null.
+        all_null = np.ones((row_count, len(value_cols)), dtype=bool)
+        all_zero = np.ones((row_count, len(value_cols)), dtype=bool)
+        damage_block = df[[col for cols in damage_cols for col in cols]]
+        damage_null = damage_block.isnull().values
+        damage_zero = damage_null | (damage_block == 0).values
+        start = 0
+
+        for i, cols in enumerate(damage_cols):
+            stop = start + len(cols)
+            all_null[:, i] = damage_null[:, start:stop].all(axis=1)
+            all_zero[:, i] = damage_zero[:, start:stop].all(axis=1)
+            start = stop
+
+        # The checked rows are the rows with min or max value, and the rows with Null value if check_null is True.
+        selected = is_min | is_max | (value_null & check_null)
+        rules = [
+            (selected & is_min & all_zero,
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4}={5} namun nilai kerusakan perkerasan aspal ataupun rigid yang sepenuhnya bernilai 0.'),
+            (selected & is_max & ~all_zero,
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4}={6} namun nilai kerusakan perkerasan aspal ataupun rigid yang tidak sepenuhnya bernilai 0.')
+        ]
+
+        if check_null:
+            rules += [
+                (selected & is_max & ~all_zero & ~all_null,
+                 'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4}={6} namun nilai kerusakan perkerasan aspal ataupun rigid yang tidak sepenuhnya bernilai 0.'),
+                (selected & value_null & ~all_null,
+                 'Rute {0} pada segmen {1}-{2} lane {3} tidak memiliki nilai {4} namun memiliki nilai kerusakan aspal atau rigid.'),
+                (selected & ~value_null & ~is_max & all_null,
+                 'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4} yang bukan {6} atau Null namun tidak memiliki nilai kerusakan aspal atau rigid.')
+            ]
+
+        route_list = self.route_lane_tuple(df, routeid_col, lane_code, route_only=True)
+        route_order = {route: i for i, route in enumerate(route_list)}
+        entries = list()
+
+        for rule_index, (error, template) in enumerate(rules):
+            for row, col in zip(*np.nonzero(error)):
+                route = str(df[routeid_col].iat[row])
+                error_message = template.format(route, df[from_m_col].iat[row], df[to_m_col].iat[row],
+                                                df[lane_code].iat[row], value_cols[col], min_value, max_value)
+
+                # The Null value rows are checked after the min and max value rows.
+                key = (order + col, route_order[route], value_null[row, col], row, rule_index)
+                entries.append((key, route, error_message, False))
+
+        return entries
+
     def pci_val_check(self, rg_pref='RG_', asp_pref='AS_', pci_col='PCI', routeid_col='LINKID', from_m_col='STA_FROM',
                       to_m_col='STA_TO', lane_code='LANE_CODE', routes='ALL', min_value=0, max_value=100,
                       check_null=True, **kwargs):
@@ -1963,86 +2008,43 @@ class EventValidation(object):
         :param check_null: Check for consistency between asp_ and rg_ column if the pci_col value is Null.
         :return:
         """
-        df = self.copy_valid_df()  # Create the valid DataFrame copy
-
-        if routes == 'ALL':  # Check for route request
-            pass
-        else:
-            df = self.selected_route_df(df, routes)  # Create a DataFrame with selected route
+        df = self.copy_valid_df(routes=routes)  # Create the valid DataFrame copy
+        damage_cols = [col for col in df.columns if col.startswith(rg_pref) or col.startswith(asp_pref)]
 
-        col_list = df.columns.tolist()
-        rg_mask = np.char.startswith(col_list, rg_pref)
-        asp_mask = np.char.startswith(col_list, asp_pref)
+        entries = self._pci_value_rules(df, [pci_col], [damage_cols], min_value, max_value, check_null, routeid_col,
+                                        from_m_col, to_m_col, lane_code)
+        self._insert_sorted_messages(entries)
 
-        route_list = self.route_lane_tuple(df, routeid_col, lane_code, route_only=True)
-        for route in route_list:
-            df_route = df.loc[df[routeid_col] == route]
-            pci_all_null = np.all(df_route[pci_col].isnull())
-            df_pci = pd.DataFrame()
-
-            if not pci_all_null:
-                # Check for the consistency for min and max value.
-                if (min_value is not None) and (max_value is not None):
-                    df_pci = df_route.loc[(df_route[pci_col] == min_value) |
-                                          (df_route[pci_col] == max_value)]
-                elif (min_value is None) and (max_value is not None):
-                    df_pci = df_route.loc[df_route[pci_col] == max_value]
-                elif (max_value is None) and (min_value is not None):
-                    df_pci = df_route.loc[df_route[pci_col] == min_value]
-                else:
-                    raise TypeError("max_value and min_value could not be None at the same time.")
-
-            if check_null:
-                null_pci = df_route.loc[df_route[pci_col].isnull()]
-
-                if pci_all_null:
-                    df_pci = df_route
-                else:
-                    if df_pci.empty:
-                        df_pci = null_pci
-                    else:
-                        df_pci = df_pci.append(null_pci)
-
-            for index, row in df_pci.iterrows():
-                from_m = row[from_m_col]
-                to_m = row[to_m_col]
-                lane = row[lane_code]
-                pci_val = row[pci_col]
-
-                if (type(pci_val) == str) or (type(pci_val) == unicode):
-                    pci_val = str(pci_val)
-                elif np.isnan(pci_val):  # Convert from numpy nan to python None.
-                    pci_val = None
+        return self
 
-                asp_rg = row[rg_mask | asp_mask]
-                asp_rg_cond = asp_rg.mask(asp_rg == 0)
-                asp_rg_allzero = np.all(asp_rg_cond.isnull())  # True if all value in asp_rg_cond is zero.
-                asp_rg_allnull = np.all(asp_rg.isnull())  # True if all value in asp_rg_cond is Null.
+    def pci_distress_check(self, asphalt_columns, rigid_columns, asp_pref='VOL_AS_', rg_pref='VOL_RG_',
+                           asp_sev_pref='SEV_AS_', rg_sev_pref='SEV_RG_', routeid_col='LINKID',
+                           from_m_col='STA_FROM', to_m_col='STA_TO', lane_code='LANE_CODE', routes='ALL',
+                           min_value=None, max_value='NA', check_null=True, **kwargs):
+        """
+        This class method check for consistency between the severity column and the volume column of every asphalt
+        and rigid distress type (such as SEV_AS_POTHOLE and VOL_AS_POTHOLE), all distress types are checked at once.
+        :param asphalt_columns: The asphalt distress types.
+        :param rigid_columns: The rigid distress types.
+        :param asp_pref: The asphalt volume column prefix.
+        :param rg_pref: The rigid volume column prefix.
+        :param asp_sev_pref: The asphalt severity column prefix.
+        :param rg_sev_pref: The rigid severity column prefix.
+        :param routes: The route selections.
+        :param min_value: The minimum value of the severity column.
+        :param max_value: The maximum value of the severity column.
+        :param check_null: Check for consistency between the severity and the volume column if the severity is Null.
+        :return:
+        """
+        df = self.copy_valid_df(routes=routes)  # Create the valid DataFrame copy
 
-                if (pci_val == min_value) and asp_rg_allzero and (min_value is not None):
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4}={5} namun nilai kerusakan perkerasan aspal ataupun rigid yang sepenuhnya bernilai 0.'.\
-                        format(route, from_m, to_m, lane, pci_col, min_value)
-                    self.insert_route_message(route, 'error', error_message)
-                if (pci_val == max_value) and (not asp_rg_allzero) and (max_value is not None):
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4}={5} namun nilai kerusakan perkerasan aspal ataupun rigid yang tidak sepenuhnya bernilai 0.'.\
-                        format(route, from_m, to_m, lane, pci_col, max_value)
-                    self.insert_route_message(route, 'error', error_message)
+        value_cols = [asp_sev_pref + x for x in asphalt_columns] + [rg_sev_pref + x for x in rigid_columns]
+        damage_cols = [[col for col in df.columns if col.startswith(asp_pref + x)] for x in asphalt_columns] + \
+                      [[col for col in df.columns if col.startswith(rg_pref + x)] for x in rigid_columns]
 
-                if check_null:
-                    if (pci_val == max_value) and (not asp_rg_allzero and not asp_rg_allnull) and (
-                            max_value is not None):
-                        error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4}={5} namun nilai kerusakan perkerasan aspal ataupun rigid yang tidak sepenuhnya bernilai 0.'. \
-                            format(route, from_m, to_m, lane, pci_col, max_value)
-                        self.insert_route_message(route, 'error', error_message)
-
-                    if (pci_val is None) and (not asp_rg_allnull):
-                        error_message = 'Rute {0} pada segmen {1}-{2} lane {3} tidak memiliki nilai {4} namun memiliki nilai kerusakan aspal atau rigid.'.\
-                            format(route, from_m, to_m, lane, pci_col)
-                        self.insert_route_message(route, 'error', error_message)
-                    elif (pci_val is not None and (pci_val != max_value)) and asp_rg_allnull:
-                        error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki nilai {4} yang bukan {5} atau Null namun tidak memiliki nilai kerusakan aspal atau rigid.'.\
-                            format(route, from_m, to_m, lane, pci_col, max_value)
-                        self.insert_route_message(route, 'error', error_message)
+        entries = self._pci_value_rules(df, value_cols, damage_cols, min_value, max_value, check_null, routeid_col,
+                                        from_m_col, to_m_col, lane_code)
+        self._insert_sorted_messages(entries)
 
         return self
 
@@ -2060,81 +2062,49 @@ class EventValidation(object):
         :param pci_col: PCI column
         :return:
         """
-
-        def col_allnull(row_series, mask):
-            """
-            This function will determine whether a row contain only Null value.
-            :param row_series: The row series from a DataFrame.
-            :param mask: Column masking.
-            :return:
-            """
-            row = row_series[mask]
-            result = np.all(row.isnull())  # Check if all column contain only Null value
-
-            return result
-
-        df = self.copy_valid_df()  # Create a valid DataFrame copy
+        df = self.copy_valid_df(routes=routes, routeid_col=routeid_col)  # Only copy the requested routes
         surf_col = '_surface'
         df_surf = self.surftype_df(surf_col)  # DataFrame containing surface group
         rni_surf_type = self.config.table_fields['rni']['surface_type']
 
-        col_list = df.columns.tolist()
-        asp_mask = np.char.startswith(col_list, asp_pref)
-        rg_mask = np.char.startswith(col_list, rg_pref)
+        asp_cols = [col for col in df.columns if col.startswith(asp_pref)]
+        rg_cols = [col for col in df.columns if col.startswith(rg_pref)]
 
-        if (not rg_mask.any()) or (not asp_mask.any()):  # Check if no column was found
+        if (len(rg_cols) == 0) or (len(asp_cols) == 0):  # Check if no column was found
             return self  # The specified prefix does not match any column.
 
-        if routes == 'ALL':  # Check for route request
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
-
-        route_list = self.route_lane_tuple(df, routeid_col, lane_code, route_only=True)
-        for route in route_list:
-            df_route = df.loc[df[routeid_col] == route]
-            merge = add_rni_data(df_route, routeid_col, from_m_col, to_m_col, lane_code, self.sde_connection,
-                                 added_column=rni_surf_type, mfactor=self.rni_mfactor)
+        merge, missing_routes = self._rni_merge(df, rni_surf_type, routeid_col, from_m_col, to_m_col, lane_code)
+        merge_surf = merge.join(df_surf, on=rni_surf_type, how='inner')  # Add surface type to merge result.
 
-            if merge is None:  # If the RNI DataFrame is empty.
-                error_message = "Data RNI rute {0} tidak tersedia".format(route)
-                self.insert_route_message(route, 'error', error_message)
-                continue
-
-            merge_surf = merge.join(df_surf, on=rni_surf_type, how='inner')  # Add surface type to merge result.
-
-            for index, row in merge_surf.iterrows():
-                from_m = row[from_m_col]
-                to_m = row[to_m_col]
-                lane = row[lane_code]
-
-                asp_allnull = col_allnull(row, asp_mask)  # Check if all ASP_ value is null
-                rg_allnull = col_allnull(row, rg_mask)  # Check if all RG_ value is null
-                pci_null = pd.isnull(row[pci_col])  # Check whether PCI value is null
-                surface = row[surf_col]  # The surface type
-
-                if surface == 'asphalt' and (not rg_allnull):
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan aspal namun memiliki nilai kerusakan rigid.'.\
-                        format(route, from_m, to_m, lane)
-                    self.insert_route_message(route, 'error', error_message)
-                if surface == 'rigid' and (not asp_allnull):
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan rigid namun memiliki nilai kerusakan aspal.'. \
-                        format(route, from_m, to_m, lane)
-                    self.insert_route_message(route, 'error', error_message)
-                if surface == 'unpaved' and ((not asp_allnull) or (not rg_allnull)):
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan unpaved namun memiliki nilai kerusakan rigid atau aspal.'. \
-                        format(route, from_m, to_m, lane)
-                    self.insert_route_message(route, 'error', error_message)
+        for route in missing_routes:  # The RNI DataFrame is empty.
+            error_message = "Data RNI rute {0} tidak tersedia".format(route)
+            self.insert_route_message(route, 'error', error_message)
 
-                # Compare the surface type and pci value
-                if (surface in ['asphalt', 'rigid']) and pci_null:
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan {4} namun tidak memiliki nilai PCI.'.\
-                        format(route, from_m, to_m, lane, surface)
-                    self.insert_route_message(route, 'error', error_message)
-                if surface == 'unpaved' and (not pci_null):
-                    error_message = 'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan {4} namun memiliki nilai PCI.'.\
-                        format(route, from_m, to_m, lane, surface)
-                    self.insert_route_message(route, 'error', error_message)
+        surface = merge_surf[surf_col]
+        asp_allnull = merge_surf[asp_cols].isnull().all(axis=1)  # Check if all ASP_ value is null
+        rg_allnull = merge_surf[rg_cols].isnull().all(axis=1)  # Check if all RG_ value is null
+        pci_null = merge_surf[pci_col].isnull()  # Check whether PCI value is null
+
+        rules = [
+            ((surface == 'asphalt') & ~rg_allnull,
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan aspal namun memiliki nilai kerusakan rigid.'),
+            ((surface == 'rigid') & ~asp_allnull,
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan rigid namun memiliki nilai kerusakan aspal.'),
+            ((surface == 'unpaved') & (~asp_allnull | ~rg_allnull),
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan unpaved namun memiliki nilai kerusakan rigid atau aspal.'),
+            (surface.isin(['asphalt', 'rigid']) & pci_null,
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan {4} namun tidak memiliki nilai PCI.'),
+            ((surface == 'unpaved') & ~pci_null,
+             'Rute {0} pada segmen {1}-{2} lane {3} memiliki tipe perkerasan {4} namun memiliki nilai PCI.')
+        ]
+        error = np.column_stack([rule.values for rule, template in rules])
+
+        for row, rule_index in zip(*np.nonzero(error)):  # In the row order
+            route = merge_surf[routeid_col].iat[row]
+            error_message = rules[rule_index][1].format(route, merge_surf[from_m_col].iat[row],
+                                                        merge_surf[to_m_col].iat[row], merge_surf[lane_code].iat[row],
+                                                        surface.iat[row])
+            self.insert_route_message(route, 'error', error_message)
 
         return self
 
@@ -2152,12 +2122,7 @@ class EventValidation(object):
         :param routes: The Routes selection.
         :return:
         """
-        df = self.copy_valid_df()  # Create a copy of valid DataFrame.
-
-        if routes == 'ALL':  # Check for route request
-            pass
-        else:
-            df = self.selected_route_df(df, routes)
+        df = self.copy_valid_df(routes=routes)  # Create a copy of valid DataFrame.
 
         route_list = self.route_lane_tuple(df, routeid_col, None, route_only=True)
         for route in route_list:
@@ -2210,7 +2175,7 @@ class EventValidation(object):
         """
         rni_surface_type = self.config.table_fields['rni']['surface_type']
 
-        df = self.selected_route_df(self.copy_valid_df(), routes)
+        df = self.copy_valid_df(routes=routes)
         df = df.drop(df.loc[df[thickness_col].isnull()].index)  # Drop row with Null Thickness.
         surf_df = self.surftype_df('_surface')  # The surface type DataFrame.
 
@@ -2272,12 +2237,7 @@ class EventValidation(object):
         """
         from SMD_Package.event_table.checks.error_runs import find_runs
 
-        df = self.copy_valid_df()  # Create the valid DataFrame copy
-
-        if routes == 'ALL':  # Check for route request
-            pass
-        else:
-            df = self.selected_route_df(df, routes)  # Create a DataFrame with selected route
+        df = self.copy_valid_df(routes=routes)  # Create the valid DataFrame copy
 
         route_list = self.route_lane_tuple(df, routeid_col, lane_codes, route_only=True)  # Create a route list
         for route in route_list:  # Iterate over all available route
@@ -2285,8 +2245,8 @@ class EventValidation(object):
 
             # Create the comparison DataFrame
             comp_search_field = [comp_route_col, comp_from_col, comp_to_col, comp_grading_col, comp_lane_code]
-            df_comp = event_fc_to_df(comp_fc, comp_search_field, route,
-                                     comp_route_col, self.sde_connection, include_all=True)
+            df_comp = self.prefetch.table_df(comp_fc, comp_search_field, route, comp_route_col, is_table=False,
+                                             include_all=True)
 
             if len(df_comp) == 0:  # Check if the specified route exist in the comparison table.
                 error_message = "Data rute {0} pada tahun sebelumnya tidak tersedia, sehingga perbandingan kemantapan tidak dapat dilakukan.". \
@@ -2353,6 +2313,37 @@ class EventValidation(object):
 
         return self
 
+    @staticmethod
+    def _side_groups(df, routeid_col='LINKID', from_m_col='STA_FROM', to_m_col='STA_TO', lane_code='LANE_CODE',
+                     side_column='side'):
+        """
+        Add the side column (L or R), the segment direction count column 'DIR_COUNT' and the segment side group ID
+        column '_group' to the DataFrame. The group ID follows the sorted (route, from, to, side) order, the rows with
+        Null group key are excluded.
+        :param df: The input DataFrame.
+        :return: Pandas DataFrame.
+        """
+        segment_keys = [routeid_col, from_m_col, to_m_col]
+        df = df.assign(**{side_column: df[lane_code].str[0]})  # The first character of the lane code
+        df = df.dropna(subset=segment_keys + [side_column])
+
+        dir_count = df.groupby(segment_keys)[side_column].transform('nunique')
+        group_id = df.groupby(segment_keys + [side_column]).ngroup()
+
+        return df.assign(DIR_COUNT=dir_count, _group=group_id)
+
+    @staticmethod
+    def _group_first(series, group, first_row):
+        """
+        The value from the first row of every group, broadcast to every row.
+        :param series: The value Series.
+        :param group: The group ID array (0 to group count - 1).
+        :param first_row: Boolean array of the first row of every group.
+        :return: Pandas Series with the same index as the value Series.
+        """
+        first = pd.Series(series.values[first_row], index=group[first_row]).sort_index()
+        return pd.Series(first.values[group], index=series.index)
+
     def side_consistency_check(self, columns, routes='ALL', routeid_col='LINKID', from_m_col='STA_FROM',
                                to_m_col='STA_TO', lane_code='LANE_CODE', empty_as_null=True, wipe=True, fill=True,
                                **kwargs):
@@ -2371,149 +2362,116 @@ class EventValidation(object):
         :param fill: If True then the function will fill all null row with the any value available in the other lane.
         :return:
         """
-        def group_function(series):
-            """
-            This function is used to create new column for group by aggregate result.
-            :param series: Series passed from group by object
-            :return: Pandas Series.
-            """
-            d = dict()
-            side = series['side'].values[0]
-            dir_count = series['DIR_COUNT'].max()  # Just take the maximum value of a segment.
-
-            if side == 'L':
-                other_side = 'R'
-            else:
-                other_side = 'L'
-
-            # In the production version, the side should be a prefix not suffix.
-            check_side_col = side + "_" + column
-            other_side_col = other_side + "_" + column
-
-            if dir_count > 1:
-                d['single_dir'] = False
-
-                if empty_as_null:
-                    d['all_empty'] = np.all(series[check_side_col].isnull())  # If the value is all Null
-                    empty_value = np.nan
-                else:
-                    d['all_empty'] = np.all(series[check_side_col] == 0)
-                    empty_value = 0
-
-                # Check if there is more than 1 value
-                # Null is not counted in
-                value_count = series[check_side_col].nunique(True)
-                d['check_value_count'] = value_count
-                d['inconsistent'] = value_count > 1
-                d['column'] = check_side_col
-
-                if wipe:
-                    self.df_valid.loc[series.index, [other_side_col]] = empty_value
-                if fill and (value_count == 1):
-                    self.df_valid.loc[series.index, [check_side_col]] = series[check_side_col].values[0]
-
-            else:
-                d['single_dir'] = True
-                d['column'] = check_side_col
-
-                if empty_as_null:
-                    check_side_null = np.all(series[check_side_col].isnull())  # If the value in the check col is Null
-                    other_side_null = np.all(series[other_side_col].isnull())  # If the value in the other side col is Null
-                else:
-                    check_side_null = np.all(series[check_side_col] == 0)  # If the value in the check col is Null
-                    other_side_null = np.all(series[other_side_col] == 0)  # If the value in the other side col is Null
-
-                check_side_inconsistent = series[check_side_col].nunique(True) > 1
-                other_side_inconsistent = series[other_side_col].nunique(True) > 1
-
-                if check_side_null:
-                    d['all_empty'] = check_side_col
-                if other_side_null:
-                    d['all_empty'] = other_side_col
-                if check_side_null and other_side_null:
-                    d['all_empty'] = [check_side_col, other_side_col]
-
-                if check_side_inconsistent:
-                    d['incosistent'] = check_side_col
-                if other_side_inconsistent:
-                    d['inconsistent'] = other_side_col
-                if check_side_inconsistent and other_side_inconsistent:
-                    d['inconsistent'] = [check_side_col, other_side_col]
-
-                if fill and not(check_side_inconsistent and other_side_inconsistent):
-                    self.df_valid.loc[series.index, [check_side_col]] = series[check_side_col].values[0]
-                    self.df_valid.loc[series.index, [other_side_col]] = series[other_side_col].values[0]
-
-            return pd.Series(d, index=['all_empty', 'check_value_count', 'inconsistent', 'column', 'single_dir'])
-
-        df = self.selected_route_df(self.copy_valid_df(), routes)
+        df = self.copy_valid_df(routes=routes)
 
         if df.empty:
             return self
 
-        side_column = 'side'
-        df[side_column] = df[[lane_code]].apply(lambda x: x[0][0], axis=1)  # Adding the side column L or R
+        if type(columns) != list:  # Force columns variable as list type.
+            columns = [columns]
 
-        segment_group = df.groupby([routeid_col, from_m_col, to_m_col])[side_column]. \
-            agg({"DIR_COUNT": lambda x: x.nunique()})
-        dir_count_df = segment_group.reset_index()
+        side_column = 'side'
+        df = self._side_groups(df, routeid_col, from_m_col, to_m_col, lane_code, side_column)
+
+        group = df['_group'].values
+        first_row = ~df['_group'].duplicated().values
+        is_left = (df[side_column] == 'L').values
+        row_multi = (df['DIR_COUNT'] > 1).values  # The row is in a segment with both L and R side
+
+        # The (route, from, to, side) of every group, in the group ID order
+        groups = df.loc[first_row, [routeid_col, from_m_col, to_m_col, side_column, 'DIR_COUNT', '_group']].\
+            set_index('_group').sort_index()
+        group_multi = (groups['DIR_COUNT'] > 1).values
+        group_keys = zip(groups[routeid_col].values, groups[from_m_col].values, groups[to_m_col].values,
+                         groups[side_column].values)
+
+        if empty_as_null:
+            empty_value = np.nan
+        else:
+            empty_value = 0
 
-        df = df.merge(dir_count_df, on=[routeid_col, from_m_col, to_m_col], right_index=True)  # Add direction count for every segment.
+        updates = dict()  # {column: new values}, applied to the df_valid after all columns are checked.
+        entries = list()  # The (sort key, route, message, append to error list) entries
 
-        if type(columns) != list:  # Force columns variable as list type.
-            columns = [columns]
+        for col_index, column in enumerate(columns):
+            # In the production version, the side should be a prefix not suffix.
+            left_col = 'L_' + column
+            right_col = 'R_' + column
+            check_values = df[left_col].where(is_left, df[right_col])  # The row side column value
+            other_values = df[right_col].where(is_left, df[left_col])  # The row other side column value
+
+            if empty_as_null:
+                check_empty = check_values.isnull()
+                other_empty = other_values.isnull()
+            else:
+                check_empty = check_values == 0
+                other_empty = other_values == 0
 
-        for column in columns:
-            side_group = df.groupby([routeid_col, from_m_col, to_m_col, side_column]).apply(group_function)
-            side_group.reset_index(inplace=True)  # Reset the group by index
+            # Group reductions, Null is not counted in the value count.
+            check_all_empty = check_empty.groupby(group).all().values
+            other_all_empty = other_empty.groupby(group).all().values
+            check_count = check_values.groupby(group).nunique().values
+            other_count = other_values.groupby(group).nunique().values
 
-            # Start check for any error
-            all_empty = ~side_group['all_empty'].isnull()
-            inconsistent = ~side_group['inconsistent'].isnull()
-            error_rows = side_group.loc[all_empty | inconsistent]
+            if wipe or fill:
+                new_check = check_values
+                new_other = other_values
 
-            for index, row in error_rows.iterrows():
-                route = row[routeid_col]
-                from_m = row[from_m_col]
-                to_m = row[to_m_col]
-                side = row[side_column]
-                empty = row['all_empty']
-                val_count_error = row['inconsistent']
-                error_col = row['column']
-                single_dir = row['single_dir']
-
-                if not single_dir:
-                    if empty:
-                        msg = "Rute {0} pada segmen {1}-{2} di sisi {3} tidak memiliki nilai {4}.".\
-                            format(route, from_m, to_m, side, error_col)
-                        self.insert_route_message(route, 'error', msg)
-
-                    if val_count_error:
-                        msg = "Rute {0} pada segmen {1}-{2} di sisi {3} memiliki nilai {4} yang tidak konsisten di setiap jalur.".\
-                            format(route, from_m, to_m, side, error_col)
-                        self.insert_route_message(route, 'error', msg)
+                if wipe:
+                    new_other = new_other.where(~row_multi, empty_value)
+                if fill:
+                    both_inconsistent = ((check_count > 1) & (other_count > 1))[group]
+                    fill_check = (row_multi & (check_count[group] == 1)) | (~row_multi & ~both_inconsistent)
+                    fill_other = ~row_multi & ~both_inconsistent
+
+                    new_check = new_check.where(~fill_check, self._group_first(check_values, group, first_row))
+                    new_other = new_other.where(~fill_other, self._group_first(other_values, group, first_row))
+
+                updates[left_col] = new_check.where(is_left, new_other)
+                updates[right_col] = new_other.where(is_left, new_check)
+
+            error_groups = np.flatnonzero(check_all_empty | other_all_empty | (check_count > 1) | (other_count > 1))
+
+            for g in error_groups:
+                route, from_m, to_m, side = group_keys[g]
+                other_side = 'R' if side == 'L' else 'L'
+                check_side_col = side + "_" + column
+                other_side_col = other_side + "_" + column
+                messages = list()
+
+                if group_multi[g]:
+                    if check_all_empty[g]:
+                        messages.append("Rute {0} pada segmen {1}-{2} di sisi {3} tidak memiliki nilai {4}.".
+                                        format(route, from_m, to_m, side, check_side_col))
+
+                    if check_count[g] > 1:
+                        messages.append("Rute {0} pada segmen {1}-{2} di sisi {3} memiliki nilai {4} yang tidak konsisten di setiap jalur.".
+                                        format(route, from_m, to_m, side, check_side_col))
                 else:
-                    if empty is not np.nan:
-                        if type(empty) == list:
-                            msg = "Rute {0} pada segmen {1}-{2} di sisi L dan R tidak memiliki nilai {3}.".\
-                                format(route, from_m, to_m, empty)
-                            self.insert_route_message(route, 'error', msg)
-                        else:
-                            side = str(empty).split('_')[0]
-                            msg = "Rute {0} pada segmen {1}-{2} di sisi {3} tidak memiliki nilai {4}".\
-                                format(route, from_m, to_m, side, empty)
-                            self.insert_route_message(route, 'error', msg)
-
-                    if val_count_error is not np.nan:
-                        if type(val_count_error) == list:
-                            msg = "Rute {0} pada segmen {1}-{2} di sisi L dan R memiliki nilai {3} yang tidak konsisten ditiap sisi.".\
-                                format(route, from_m, to_m, empty)
-                            self.insert_route_message(route, 'error', msg)
-                        else:
-                            side = str(val_count_error).split('_')[0]
-                            msg = "Rute {0} pada segmen {1}-{2} di sisi {3} memiliki nilai {4} yang tidak konsisten di setiap jalur.".\
-                                format(route, from_m, to_m, side, val_count_error)
-                            self.insert_route_message(route, 'error', msg)
+                    if check_all_empty[g] and other_all_empty[g]:
+                        messages.append("Rute {0} pada segmen {1}-{2} di sisi L dan R tidak memiliki nilai {3}.".
+                                        format(route, from_m, to_m, [check_side_col, other_side_col]))
+                    elif check_all_empty[g] or other_all_empty[g]:
+                        empty_col = check_side_col if check_all_empty[g] else other_side_col
+                        messages.append("Rute {0} pada segmen {1}-{2} di sisi {3} tidak memiliki nilai {4}".
+                                        format(route, from_m, to_m, str(empty_col).split('_')[0], empty_col))
+
+                    if (check_count[g] > 1) and (other_count[g] > 1):
+                        messages.append("Rute {0} pada segmen {1}-{2} di sisi L dan R memiliki nilai {3} yang tidak konsisten ditiap sisi.".
+                                        format(route, from_m, to_m, [check_side_col, other_side_col]))
+                    elif (check_count[g] > 1) or (other_count[g] > 1):
+                        inconsistent_col = check_side_col if check_count[g] > 1 else other_side_col
+                        messages.append("Rute {0} pada segmen {1}-{2} di sisi {3} memiliki nilai {4} yang tidak konsisten di setiap jalur.".
+                                        format(route, from_m, to_m, str(inconsistent_col).split('_')[0],
+                                               inconsistent_col))
+
+                entries += [((col_index, g, i), route, msg, False) for i, msg in enumerate(messages)]
+
+        if len(updates) != 0:
+            update_df = pd.DataFrame(updates)
+            self.df_valid.loc[update_df.index, update_df.columns] = update_df  # Apply the wipe and fill at once
+
+        self._insert_sorted_messages(entries)
 
         return self
 
@@ -2533,114 +2491,84 @@ class EventValidation(object):
         :param empty_value_type: The type which means other value should be Null/empty.
         :return:
         """
-        def group_function(g_df):
-            d = dict()
-            side = g_df['side'].values[0]
-            dir_count = g_df['DIR_COUNT'].max()
-            single_dir = dir_count == 1
+        df = self.copy_valid_df(routes=routes)
 
-            if dir_count == 1:
-                if side == 'L':
-                    other_side = 'R'
-                else:
-                    other_side = 'L'
-                check_col_side = [side + "_" + column for column in columns]
-                check_col_side = check_col_side + [other_side + "_" + column for column in columns]
-            else:
-                # In the production version, the side should be a prefix not suffix.
-                check_col_side = [side + "_" + column for column in columns]
+        if df.empty:
+            return self
+
+        if type(columns) != list:  # The input columns should be list, otherwise function will not be proceeded.
+            return self
+
+        side_column = 'side'
+        df = self._side_groups(df, routeid_col, from_m_col, to_m_col, lane_code, side_column)
+        group_size = df['_group'].value_counts()
+
+        # Only the segment with both L and R side is reported.
+        df = df.loc[df['DIR_COUNT'] > 1]
+        entries = list()  # The (sort key, route, message, append to error list) entries
+
+        for side, side_df in df.groupby(side_column, sort=False):
+            # In the production version, the side should be a prefix not suffix.
+            check_col_side = [side + "_" + column for column in columns]
+            group = side_df['_group'].values
 
             # Find the type columns
             if type_as_suffix:  # "TYPE" as column suffix
-                type_cols = np.array(check_col_side)[np.char.endswith(check_col_side, in_type_cols)].tolist()
+                type_cols = [x for x in check_col_side if x.endswith(in_type_cols)]
             else:  # "TYPE" as column prefix
-                type_cols = np.array(check_col_side)[np.char.startswith(check_col_side, in_type_cols)].tolist()
+                type_cols = [x for x in check_col_side if x.startswith(in_type_cols)]
+
+            # Type vs value consistency check, True if the group does not have any error.
+            type_value = OrderedDict()
 
-            # Type vs value consistency check.
-            type_value = dict()  # For storing  each type column result.
-            type_value_results = list()  # For storing row's type value check result.
             for type_col in type_cols:
                 if type_as_suffix:
                     type_domain = type_col.split(in_type_cols)[0]
-                    value_col = np.array(check_col_side)[np.char.startswith(check_col_side, type_domain)].\
-                        tolist()
+                    value_col = [x for x in check_col_side if x.startswith(type_domain)]
                 else:
                     type_domain = type_col.split(in_type_cols)[1]
-                    value_col = np.array(check_col_side)[np.char.endswith(check_col_side, type_domain)].\
-                        tolist()
+                    value_col = [x for x in check_col_side if x.endswith(type_domain)]
 
                 value_col.remove(type_col)
-                type_value_error = g_df.loc[((g_df[type_col] == empty_value_type) &
-                                            (np.any(g_df[value_col] != 0, axis=1)) &
-                                            (~g_df[type_col].isnull())) |
-
-                                            ((g_df[type_col] != empty_value_type) &
-                                            (np.any(g_df[value_col] == 0, axis=1)) &
-                                            (~g_df[type_col].isnull()))]
-
-                type_value[type_col] = type_value_error.empty  # If there is no error then True
-                type_value_results.append(type_value_error.empty)  # Append result without type column name
-
-            # The filling pattern check
-            if len(g_df) > 1:
-                null_mask = g_df[check_col_side].apply(lambda x: x.isnull(), axis=1)
-                all_result = [null_mask[check_col_side[0]].equals(null_mask[col]) for col in check_col_side]
-                result = np.all(all_result)  # If all is True.
+                type_values = side_df[type_col]
+                value_df = side_df[value_col]
+
+                type_value_error = ((type_values == empty_value_type) & (value_df != 0).any(axis=1) &
+                                    type_values.notnull()) | \
+                                   ((type_values != empty_value_type) & (value_df == 0).any(axis=1) &
+                                    type_values.notnull())
+                type_value[type_col] = ~type_value_error.groupby(group).any()
+
+            # The filling pattern check, every column in a row should be either Null or not Null.
+            null_mask = side_df[check_col_side].isnull()
+            mixed_null = null_mask.any(axis=1) & ~null_mask.all(axis=1)
+            correct_pattern = ~mixed_null.groupby(group).any() | (group_size.reindex(np.unique(group)) <= 1).values
+
+            if len(type_value) != 0:
+                type_value_results = pd.concat(type_value.values(), axis=1).all(axis=1)
             else:
-                result = True
-
-            d['correct_pattern'] = result
-            d['columns'] = check_col_side
-            d['type_value'] = type_value
-            d['type_value_results'] = np.all(type_value_results)  # True, if all is correct.
-            d['single_dir'] = single_dir
-
-            return pd.Series(d, index=['correct_pattern', 'columns',
-                                       'type_value', 'type_value_results', 'single_dir'])  # Returned row
-
-        df = self.selected_route_df(self.copy_valid_df(), routes)
-
-        if df.empty:
-            return self
-
-        side_column = 'side'
-        df[side_column] = df[[lane_code]].apply(lambda x: x[0][0], axis=1)  # Adding the side column L or R
+                type_value_results = pd.Series(True, index=correct_pattern.index)
 
-        if type(columns) != list:  # The input columns should be list, otherwise function will not be proceeded.
-            return self
+            first_row = ~side_df['_group'].duplicated()
+            group_keys = dict(zip(side_df.loc[first_row, '_group'],
+                                  zip(side_df.loc[first_row, routeid_col], side_df.loc[first_row, from_m_col],
+                                      side_df.loc[first_row, to_m_col])))
 
-        segment_group = df.groupby([routeid_col, from_m_col, to_m_col])[side_column]. \
-            agg({"DIR_COUNT": lambda x: x.nunique()})
-        dir_count_df = segment_group.reset_index()
+            for g in correct_pattern.index[~correct_pattern.values | ~type_value_results.values]:
+                route, from_m, to_m = group_keys[g]
 
-        df = df.merge(dir_count_df, on=[routeid_col, from_m_col, to_m_col])  # Add direction count for every segment.
-        side_group = df.groupby([routeid_col, from_m_col, to_m_col, side_column]).apply(group_function)
-        side_group.reset_index(inplace=True)
-        error_rows = side_group.loc[(~side_group['correct_pattern']) | (~side_group['type_value_results'])]
-
-        for index, row in error_rows.iterrows():
-            route = row[routeid_col]
-            from_m = row[from_m_col]
-            to_m = row[to_m_col]
-            side = row[side_column]
-            columns = row['columns']
-            correct_pattern = row['correct_pattern']
-            correct_type_value = row['type_value_results']
-            type_value = row['type_value']
-            single_dir = row['single_dir']
-
-            if not single_dir:
-                if not correct_pattern:
+                if not correct_pattern[g]:
                     msg = "Rute {0} pada segmen {1}-{2} di sisi {3} memiliki pola pengisian kolom {4} yang tidak konsisten.".\
-                        format(route, from_m, to_m, side, columns)
-                    self.insert_route_message(route, 'error', msg)
+                        format(route, from_m, to_m, side, check_col_side)
+                    entries.append(((g, 0), route, msg, False))
 
-                if not correct_type_value:
+                if not type_value_results[g]:
+                    group_type_value = {type_col: bool(result[g]) for type_col, result in type_value.items()}
                     msg = "Rute {0} pada segmen {1}-{2} di sisi {3} memiliki nilai tipe yang tidak konsisten yaitu {4}.".\
-                        format(route, from_m, to_m, side, type_value)
-                    self.insert_route_message(route, 'error', msg)
-            else:
-                pass
+                        format(route, from_m, to_m, side, group_type_value)
+                    entries.append(((g, 1), route, msg, False))
+
+        self._insert_sorted_messages(entries)
 
         return self
 
@@ -2660,7 +2588,7 @@ class EventValidation(object):
         smd_config = SMDConfigs()
         rni_medwidth = smd_config.table_fields['rni']['median']
 
-        df = self.selected_route_df(self.copy_valid_df(), routes)
+        df = self.copy_valid_df(routes=routes)
 
         if df.empty:  # If the query result returns empty DataFrame.
             return self
@@ -2699,7 +2627,7 @@ class EventValidation(object):
         """
         import copy
 
-        df = self.selected_route_df(self.copy_valid_df(), routes)
+        df = self.copy_valid_df(routes=routes)
 
         if df.empty:
             return self
@@ -2799,7 +2727,7 @@ class EventValidation(object):
         :param to_m_col: To Measure column.
         :return:
         """
-        df = self.selected_route_df(self.copy_valid_df(), routes)
+        df = self.copy_valid_df(routes=routes)
 
         if df.empty:
             return self
@@ -2824,24 +2752,39 @@ class EventValidation(object):
 
         return self
 
-    def copy_valid_df(self, dropna=False, ignore=False):
+    def copy_valid_df(self, dropna=False, ignore=False, routes='ALL', routeid_col='LINKID', exclude_error=False,
+                      copy=True):
         """
         This function create a valid DataFrame from the dtype check class method, which ensures every column match the
         required DataType
+        :param routes: If specified then only the rows from the requested routes will be copied.
+        :param routeid_col: The Route ID column in the input table.
+        :param exclude_error: If True then the rows with any data type error are excluded using the shared error mask,
+        and the converted DataFrame is used even if the data type check fails.
+        :param copy: If False then the selected rows are returned without copying, the result should not be modified.
         :return:
         """
         # If there is a problem with the data type check then return the df_string
         if self.df_valid is None:
             return None
+        elif exclude_error and (self.error_mask is not None):
+            df = self.df_valid
+            error_rows = self.error_mask.any(axis=1)
+            df = df.loc[~error_rows.reindex(df.index, fill_value=False).values]  # Rows without data type error
         elif self.dtype_check_result is None or ignore:
             df = self.df_valid
-            return df.copy(deep=True)
         elif dropna:
             df = self.df_valid.dropna()
-            return df.copy(deep=True)
-        elif not dropna:
+        else:
             df = self.df_string
+
+        if routes != 'ALL':
+            df = self.selected_route_df(df, routes, routeid_col=routeid_col)  # Only the selected rows
+
+        if copy:
             return df.copy(deep=True)
+        else:
+            return df
 
     @staticmethod
     def surftype_df(surface_column):
@@ -2967,27 +2910,29 @@ class EventValidation(object):
     @staticmethod
     def route_geometry(route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE'):
         """
-        This static method return a Polyline object geometry from the LRS Network.
+        This static method return a Polyline object geometry from the LRS Network, the geometry is read from the
+        session geometry cache.
         :param route: The requested route.
         :param lrs_network: LRS Network feature class.
         :param lrs_routeid: The LRS Network feature class RouteID column.
         :return: Arcpy Polyline geometry object if the requested route exist in the LRS Network, if the requested route
         does not exist in the LRS Network then the function will return None.
         """
-        where_statement = "{0}='{1}'".format(lrs_routeid, route)  # The where statement for SearchCursor
-        date_query = "({0} is null or {0}<=CURRENT_TIMESTAMP) and ({1} is null or {1}>CURRENT_TIMESTAMP)".\
-            format(from_date_col, to_date_col)
-        route_exist = False  # Variable for determining if the requested route exist in LRS Network
+        return lrs.route_geometry(route, lrs_network, lrs_routeid, from_date_col, to_date_col, date_query=True)
 
-        with da.SearchCursor(lrs_network, "SHAPE@", where_clause=where_statement+" and "+date_query) as cursor:
-            for row in cursor:
-                route_exist = True
-                route_geom = row[0]  # The Polyline geometry object
-
-        if route_exist:
-            return route_geom
-        if not route_exist:
+    @staticmethod
+    def _rni_route_line(rni_polyline, route_line):
+        """
+        This static method convert the RNI Polyline to RouteLine which uses the same projection origin as the LRS
+        RouteLine.
+        :param rni_polyline: The RNI Polyline geometry created from to_polyline function.
+        :param route_line: The LRS RouteLine object.
+        :return: RouteLine object or None if the RNI Polyline is None.
+        """
+        if rni_polyline is None:
             return None
+        else:
+            return coordinate.RouteLine.from_polyline(rni_polyline, origin=route_line.origin)
 
     @staticmethod
     def rtc_time_stamp(date_time_stamp, hours, minutes):
@@ -3008,28 +2953,90 @@ class EventValidation(object):
 
         return timestamp  # Return the new timestamp
 
-    def insert_route_message(self, route, message_type, message):
+    @staticmethod
+    def rtc_timestamps(df, surv_date_col='SURVEY_DATE', hours_col='SURVEY_HOURS', minute_col='SURVEY_MINUTE'):
         """
-        This static method will insert a result message for specified route
-        :param route:
-        :param message_type:
-        :param message:
+        This static method return the survey TimeStamp of every row, created from the survey date + the survey hours
+        and minutes.
+        :param df: The input DataFrame.
+        :param surv_date_col: The survey date column.
+        :param hours_col: The survey hours column.
+        :param minute_col: The survey minutes column.
+        :return: Pandas Series of TimeStamp.
+        """
+        return pd.to_datetime(df[surv_date_col]) + pd.to_timedelta(df[hours_col], unit='h') + \
+            pd.to_timedelta(df[minute_col], unit='m')
+
+    @property
+    def route_results(self):
+        """
+        The {route: {message type: [message, ...]}} dictionary created from the violation store.
+        """
+        return self.violations.route_results()
+
+    @route_results.setter
+    def route_results(self, route_results):
+        self.violations = ViolationStore.from_route_results(route_results)
+
+    def insert_route_message(self, route, message_type, message, args=None, check=None, from_m=None, to_m=None,
+                             lane=None):
+        """
+        This method will insert a result message for specified route to the violation store.
+        :param route: The route.
+        :param message_type: The message type ('error', 'ToBeReviewed' or 'VerifiedWithWarning').
+        :param message: The message text, or the message template if the args is specified.
+        :param args: The message template args dictionary.
+        :param check: The check ID.
+        :param from_m: The segment from measure.
+        :param to_m: The segment to measure.
+        :param lane: The segment lane code.
+        :return:
+        """
+        self.violations.append(route, message_type, message, args, check, from_m, to_m, lane)
+
+    def insert_route_messages(self, routes, message_type, messages, args=None, check=None, from_m=None, to_m=None,
+                              lane=None):
+        """
+        This method will insert multiple result messages with the same message type.
+        :param routes: The route of every message.
+        :param message_type: The message type.
+        :param messages: The message of every route, or a single message template used by all routes.
+        :param args: The message template args dictionary of every route.
+        :param check: The check ID.
+        :param from_m: The segment from measure of every route.
+        :param to_m: The segment to measure of every route.
+        :param lane: The segment lane code of every route.
         :return:
         """
-        if route not in self.route_results:
-            self.route_results[route] = {
-                "error": [],
-                "ToBeReviewed": [],
-                "VerifiedWithWarning": []
-            }
+        count = len(routes)
+
+        if isinstance(messages, basestring):
+            messages = [messages]*count
+
+        for i in range(count):
+            self.violations.append(routes[i], message_type, messages[i],
+                                   None if args is None else args[i], check,
+                                   None if from_m is None else from_m[i],
+                                   None if to_m is None else to_m[i],
+                                   None if lane is None else lane[i])
+
+    def verified_routes(self, routeid_col='LINKID'):
+        """
+        This method returns all valid route in the valid DataFrame which does not have any message.
+        :param routeid_col: The Route ID column of the input table.
+        :return: List of route.
+        """
+        route_with_msg = self.violations.routes()
 
-        self.route_results[route][message_type].append(message)
+        select_passed = ~self.df_valid[routeid_col].isin(route_with_msg)
+        is_valid_route = self.df_valid[routeid_col].isin(self.valid_route)
+
+        return self.df_valid.loc[select_passed & is_valid_route, routeid_col].unique().tolist()
 
     def altered_route_result(self, routeid_col='LINKID', message_type='error', dict_output=True,
                              include_valid_routes=True):
         """
-        This method will alter route_result dictionary from {'route':['msg', 'msg',...]} to [{'route: 'msg'},
-        {'route':'msg'},...]
+        This method will alter the violation store messages to [{'route: 'msg'}, {'route':'msg'},...]
         :param routeid_col: The Route ID column of the input table.
         :param message_type: The message type will be passed to dictionary object
         :param dict_output: If True then this function will return [{'route: 'msg'}, {'route':'msg'},...] if false
@@ -3037,30 +3044,15 @@ class EventValidation(object):
         dict_output = True
         :return:
         """
-        result_list = []  # The list object to store the dictionary
-        route_with_msg = self.route_results.keys()
+        messages = self.violations.messages(message_type)
 
-        select_failed = ~self.df_valid[routeid_col].isin(route_with_msg)
-        is_valid_route = self.df_valid[routeid_col].isin(self.valid_route)
-        passed_routes_row = self.df_valid.loc[select_failed & is_valid_route, routeid_col].unique().tolist()
-
-        for route in route_with_msg:
-            messages = self.route_results[route][message_type]
-
-            for msg in messages:
-                if dict_output:
-                    # The dictionary object
-                    dict_object = {
-                        "linkid": route,
-                        "status": message_type,
-                        "msg": msg
-                    }
-                    result_list.append(dict_object)  # Append the dictionary object
-                else:
-                    result_list.append(msg)  # Append the message directly to list object
+        if not dict_output:
+            return [msg for route, msg in messages]  # The message directly as list object
+
+        result_list = [{"linkid": route, "status": message_type, "msg": msg} for route, msg in messages]
 
-        if include_valid_routes and dict_output:  # If the output is dictionary and also include the valid route
-            for route in passed_routes_row:
+        if include_valid_routes:  # If the output is dictionary and also include the valid route
+            for route in self.verified_routes(routeid_col):
                 dict_object = {
                     "linkid": route,  # The valid route
                     "status": "verified",  # The status is "verified"
@@ -3074,31 +3066,22 @@ class EventValidation(object):
     def failed_routes(self):
         """
         This property contain a list of all routes that did not passed the verification (with error message not
-        ToBeReviewed message). The route is extracted from the route_result class attribute.
+        ToBeReviewed message). The route is extracted from the violation store route status counter.
         :return:
         """
-        df = pd.DataFrame(self.altered_route_result(include_valid_routes=False))
-        if len(df) != 0:
-            routes = df.loc[df['status'] == 'error']['linkid'].unique().tolist()
-            return routes
-        else:
-            return list()
+        return self.violations.failed_routes
 
     @property
     def passed_routes(self):
         """
         This property contain a list of all routes that passed all the verification and does not require any review.
-        The route is extracted from the route_result class attribute.
+        The route is extracted from the violation store route status counter.
         :return:
         """
-        df = pd.DataFrame(self.altered_route_result(include_valid_routes=True, message_type='VerifiedWithWarning'))
+        routes = [x for x in self.violations.routes() if self.violations.count(x, 'VerifiedWithWarning') != 0]
+        routes += self.verified_routes()
 
-        if len(df) != 0:
-            routes = df['linkid'].unique().tolist()
-            routes_intersect = np.intersect1d(routes, self.valid_route).tolist()
-            return routes_intersect
-        else:
-            return list()
+        return np.intersect1d(routes, self.valid_route).tolist()
 
     @property
     def no_error_route(self):
@@ -3110,7 +3093,5 @@ class EventValidation(object):
         if len(error_routes) != 0:
             intersect = np.setdiff1d(self.valid_route, error_routes).tolist()
             return intersect
-        elif len(error_routes) == 0:
-            return self.valid_route
         else:
-            return list()
+            return self.valid_route
@@ -1,2 +1,4 @@
 from find_error import FindCoordinateError
 from coordinate import distance_series, to_polyline
+from engine import RouteLine, distance_frame, to_wgs84
+from segment_index import SegmentIndex
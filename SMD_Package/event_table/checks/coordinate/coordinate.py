@@ -4,6 +4,7 @@ This script provide the function and class used by coordinate check class method
 from arcpy import Point, PointGeometry, Polyline, Array, SpatialReference
 import numpy as np
 from pandas import Series
+from segment_index import SegmentIndex
 
 
 def distance_series(latitude, longitude, route_geom, projections='4326', from_m=None, to_m=None, lane=None,
@@ -171,7 +172,7 @@ class InputPoint(object):
         :param from_m: From measure value of the input point
         :param to_m: To measure value of the input point
         :param lane: Lane of the input point
-        :param rni_df: The RNI DataFrame
+        :param rni_df: The RNI DataFrame or SegmentIndex built from the RNI DataFrame.
         :param rni_from_m: The RNI from measure column
         :param rni_to_m: The RNI to measure column
         :param rni_lane_code: The RNI lane code column
@@ -179,16 +180,19 @@ class InputPoint(object):
         :param rni_long: The RNI longitude column
         :return:
         """
-        to_m_condition = rni_df[rni_to_m] == to_m
-        from_m_condition = rni_df[rni_from_m] == from_m
-        lane_condition = rni_df[rni_lane_code] == lane
-
-        segment = rni_df.loc[from_m_condition & to_m_condition & lane_condition, [rni_long, rni_lat]]
-
-        if len(segment) != 0:  # If the segment does not exist
-            segment_coords = segment.values[0]
-            segment_x = segment_coords[0]
-            segment_y = segment_coords[1]
+        if isinstance(rni_df, SegmentIndex):  # Use the segment hash index
+            segment_x, segment_y = rni_df.coordinates([from_m], [to_m], [lane])
+            segment = None if np.isnan(segment_x[0]) else [segment_x[0], segment_y[0]]
+        else:
+            to_m_condition = rni_df[rni_to_m] == to_m
+            from_m_condition = rni_df[rni_from_m] == from_m
+            lane_condition = rni_df[rni_lane_code] == lane
+            segment_df = rni_df.loc[from_m_condition & to_m_condition & lane_condition, [rni_long, rni_lat]]
+            segment = segment_df.values[0] if len(segment_df) != 0 else None
+
+        if segment is not None:  # If the segment exist
+            segment_x = segment[0]
+            segment_y = segment[1]
             segment_point = self._point_geom(segment_x, segment_y)
 
             return self.point_geom.angleAndDistanceTo(segment_point)[1]
@@ -0,0 +1,296 @@
+"""
+This script provide the vectorized point to polyline engine used by coordinate check class method in the
+EventValidation Class. All the input points of a route are processed at once using NumPy, the geographic coordinates
+are projected to a Transverse Mercator plane centered at the route, so the distance is in Meters.
+
+Compared to the arcpy geometry methods (queryPointAndDistance, snapToLine and geodesic angleAndDistanceTo) the
+result is within 0.05% of the distance (or 0.1m, whichever is larger) and 0.05% of the measurement value, for route
+extent less than 300 Km in the east-west direction.
+"""
+from arcpy import SpatialReference, Multipoint, Array, Point
+import numpy as np
+from pandas import DataFrame
+from segment_index import SegmentIndex
+
+_a = 6378137.0  # WGS84 semi-major axis
+_f = 1/298.257223563  # WGS84 flattening
+_e2 = _f*(2-_f)
+_ep2 = _e2/(1-_e2)
+_max_block = 2000000  # The maximum number of point x segment pair processed at once
+
+
+def _meridian_arc(lat):
+    """
+    The meridian arc length from the equator to the specified latitude (in radians).
+    """
+    e4 = _e2*_e2
+    e6 = e4*_e2
+    return _a*((1 - _e2/4 - 3*e4/64 - 5*e6/256)*lat -
+               (3*_e2/8 + 3*e4/32 + 45*e6/1024)*np.sin(2*lat) +
+               (15*e4/256 + 45*e6/1024)*np.sin(4*lat) -
+               (35*e6/3072)*np.sin(6*lat))
+
+
+def tm_project(lon, lat, lon0, lat0):
+    """
+    Project geographic coordinates (WGS84) to a Transverse Mercator plane with the specified origin.
+    :param lon: Longitude array.
+    :param lat: Latitude array.
+    :param lon0: The central meridian.
+    :param lat0: The origin latitude.
+    :return: Tuple of (x, y) array in Meters.
+    """
+    phi = np.radians(np.asarray(lat, dtype=float))
+    lam = np.radians(np.asarray(lon, dtype=float) - lon0)
+
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    n = _a/np.sqrt(1-_e2*sin_phi**2)
+    t = np.tan(phi)**2
+    c = _ep2*cos_phi**2
+    a = cos_phi*lam
+
+    x = n*(a + (1-t+c)*a**3/6 + (5-18*t+t**2+72*c-58*_ep2)*a**5/120)
+    y = _meridian_arc(phi) - _meridian_arc(np.radians(lat0)) + \
+        n*np.tan(phi)*(a**2/2 + (5-t+9*c+4*c**2)*a**4/24 + (61-58*t+t**2+600*c-330*_ep2)*a**6/720)
+
+    return x, y
+
+
+def to_wgs84(lon, lat, spatial_ref='4326'):
+    """
+    Project the input coordinates from the specified spatial reference to WGS84 (the coordinate system used by the
+    distance engine). All the valid points are projected with a single Multipoint geometry.
+    :param lon: The X coordinate array.
+    :param lat: The Y coordinate array.
+    :param spatial_ref: The input coordinate system factory code.
+    :return: Tuple of (longitude, latitude) array, the invalid input point is returned as NaN.
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+
+    if int(spatial_ref) == 4326:
+        return lon, lat
+
+    valid = ~(np.isnan(lon) | np.isnan(lat))
+    out_lon = np.full(len(lon), np.nan)
+    out_lat = np.full(len(lat), np.nan)
+
+    if valid.any():
+        points = Array([Point(x, y) for x, y in zip(lon[valid], lat[valid])])
+        projected = Multipoint(points, SpatialReference(int(spatial_ref))).projectAs(SpatialReference(4326))
+        coords = [projected.getPart(i) for i in range(projected.pointCount)]  # Multipoint part is a single Point
+        coords = np.array([[point.X, point.Y] for point in coords], dtype=float).reshape(-1, 2)
+        out_lon[valid] = coords[:, 0]
+        out_lat[valid] = coords[:, 1]
+
+    return out_lon, out_lat
+
+
+class RouteLine(object):
+    """
+    Polyline vertex array (with M-value) in a local Transverse Mercator plane, used for vectorized point to polyline
+    distance and measurement calculation.
+    """
+    def __init__(self, lon, lat, m, part=None, origin=None):
+        """
+        Class initialization.
+        :param lon: The vertex longitude array.
+        :param lat: The vertex latitude array.
+        :param m: The vertex M-value array.
+        :param part: The vertex part index array, if None then the polyline only has a single part.
+        :param origin: The projection origin (lon, lat), if None then the polyline center will be used.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+
+        if origin is None:
+            origin = ((np.nanmin(lon)+np.nanmax(lon))/2, (np.nanmin(lat)+np.nanmax(lat))/2)
+
+        self.origin = origin
+        self.x, self.y = tm_project(lon, lat, origin[0], origin[1])
+        self.m = np.asarray(m, dtype=float)
+
+        if part is None:
+            part = np.zeros(len(lon))
+
+        # The segment between two different parts is not a valid segment.
+        self.valid_segment = np.diff(np.asarray(part)) == 0
+
+    @classmethod
+    def from_polyline(cls, polyline, origin=None):
+        """
+        Create RouteLine from arcpy Polyline object, the polyline will be projected to WGS84 if it uses other spatial
+        reference.
+        :param polyline: Arcpy Polyline object.
+        :param origin: The projection origin (lon, lat).
+        :return: RouteLine object.
+        """
+        spat_ref = polyline.spatialReference
+        if (spat_ref is not None) and (spat_ref.factoryCode != 4326):
+            polyline = polyline.projectAs(SpatialReference(4326))
+
+        vertices = list()
+        for part_ind, part in enumerate(polyline.getPart()):
+            for point in part:
+                if point is None:
+                    continue
+                vertices.append([point.X, point.Y, np.nan if point.M is None else point.M, part_ind])
+
+        vertices = np.array(vertices, dtype=float).reshape(-1, 4)
+
+        return cls(vertices[:, 0], vertices[:, 1], vertices[:, 2], vertices[:, 3], origin=origin)
+
+    @classmethod
+    def from_route(cls, route_entry):
+        """
+        Create RouteLine from the cached LRS RouteGeometry object, the created RouteLine is stored in the cache entry.
+        :param route_entry: RouteGeometry object from the LRS geometry cache.
+        :return: RouteLine object.
+        """
+        line = getattr(route_entry, 'route_line', None)
+
+        if line is None:
+            line = cls.from_polyline(route_entry.geometry)
+            route_entry.route_line = line
+
+        return line
+
+    def project(self, lon, lat):
+        """
+        Project the input geographic coordinates to this RouteLine plane.
+        :return: Tuple of (x, y) array in Meters.
+        """
+        return tm_project(lon, lat, self.origin[0], self.origin[1])
+
+    def locate(self, lon, lat):
+        """
+        Calculate the distance from every input point to the nearest point on the polyline and the measurement value
+        of the nearest point (queryPointAndDistance and snapToLine equivalent).
+        :param lon: The input point longitude array.
+        :param lat: The input point latitude array.
+        :return: Tuple of (distance in Meters, M-value) array.
+        """
+        px, py = self.project(np.atleast_1d(lon), np.atleast_1d(lat))
+        distance = np.full(len(px), np.nan)
+        measure = np.full(len(px), np.nan)
+
+        if len(self.x) < 2:  # The polyline does not have any segment
+            return distance, measure
+
+        x0, y0 = self.x[:-1], self.y[:-1]
+        dx, dy = np.diff(self.x), np.diff(self.y)
+        seg_len_sq = dx**2 + dy**2
+        dm = np.diff(self.m)
+        block = max(1, _max_block//len(x0))  # Number of point processed in a single block
+
+        for start in range(0, len(px), block):
+            bx = px[start:start+block, None]
+            by = py[start:start+block, None]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                t = ((bx-x0)*dx + (by-y0)*dy)/seg_len_sq
+            t = np.where(seg_len_sq == 0, 0, np.clip(t, 0, 1))
+
+            dist = np.hypot(bx-(x0+t*dx), by-(y0+t*dy))
+            dist[:, ~self.valid_segment] = np.inf
+            dist[np.isnan(dist)] = np.inf
+            nearest = np.argmin(dist, axis=1)
+            rows = np.arange(len(nearest))
+
+            distance[start:start+block] = dist[rows, nearest]
+            measure[start:start+block] = self.m[nearest] + t[rows, nearest]*dm[nearest]
+
+        distance[np.isinf(distance)] = np.nan  # Invalid input point coordinate
+
+        return distance, measure
+
+    def point_distance(self, lon, lat, other_lon, other_lat):
+        """
+        Calculate the distance between two sets of geographic points in this RouteLine plane.
+        :return: Distance array in Meters.
+        """
+        px, py = self.project(lon, lat)
+        ox, oy = self.project(other_lon, other_lat)
+
+        return np.hypot(px-ox, py-oy)
+
+
+def df_segment_distance(line, lon, lat, from_m, to_m, lane, ref_df, ref_from_m, ref_to_m, ref_lane, ref_lat,
+                        ref_long):
+    """
+    Calculate the distance from every input point to the reference point with the same from-to measure and lane code.
+    :param ref_df: The reference DataFrame or SegmentIndex built from the reference DataFrame.
+    :return: Distance array in Meters, NaN if the segment does not exist in the reference.
+    """
+    if isinstance(ref_df, SegmentIndex):
+        index = ref_df
+    else:
+        index = SegmentIndex(ref_df, ref_from_m, ref_to_m, ref_lane, ref_long, ref_lat)
+
+    ref_lon, ref_lat = index.coordinates(from_m, to_m, lane)
+
+    return line.point_distance(lon, lat, ref_lon, ref_lat)
+
+
+def distance_frame(df, lat_col, long_col, route_line, from_m_col=None, to_m_col=None, lane_col=None,
+                   rni_df=None, rni_from_m=None, rni_to_m=None, rni_lane_code=None, rni_lat=None, rni_long=None,
+                   rni_line=None, previous_df=None, kwargs_comparison={}):
+    """
+    Vectorized equivalent of distance_series, process all the input points of a route at once.
+    :param df: The input route DataFrame.
+    :param lat_col: The latitude column.
+    :param long_col: The longitude column.
+    :param route_line: The LRS RouteLine object.
+    :param from_m_col: From measure column.
+    :param to_m_col: To measure column.
+    :param lane_col: Lane code column.
+    :param rni_df: RNI DataFrame
+    :param rni_from_m: RNI from measure column
+    :param rni_to_m: RNI to measure column
+    :param rni_lane_code: RNI lane code
+    :param rni_lat: RNI latitude column
+    :param rni_long: RNI longitude column
+    :param rni_line: RNI data as RouteLine.
+    :param previous_df: Previous year DataFrame complete with from-to Measurement and lane code.
+    :return: Pandas DataFrame with the same index and column order as distance_series result.
+    """
+    lon = df[long_col].values.astype(float)
+    lat = df[lat_col].values.astype(float)
+    row_count = len(df)
+
+    lrs_distance, lrs_meas = route_line.locate(lon, lat)
+    meas_value = np.full(row_count, np.nan)
+    segment_distance = np.full(row_count, np.nan)
+    rni_distance = np.full(row_count, np.nan)
+    previous_year = np.full(row_count, np.nan)
+
+    if (from_m_col is not None) or (to_m_col is not None) or (lane_col is not None):
+        meas_value = lrs_meas*1000  # Convert the measurement value to Meters
+        from_m = None if from_m_col is None else df[from_m_col].values
+        to_m = None if to_m_col is None else df[to_m_col].values
+        lane = None if lane_col is None else df[lane_col].values
+        segment_key = (from_m is not None) and (to_m is not None) and (lane is not None)
+
+        if (rni_df is not None) and segment_key:  # Comparison to RNI segment coordinate
+            segment_distance = df_segment_distance(route_line, lon, lat, from_m, to_m, lane, rni_df, rni_from_m,
+                                                   rni_to_m, rni_lane_code, rni_lat, rni_long)
+
+        if (previous_df is not None) and segment_key:  # Comparison to previous year data
+            previous_year = df_segment_distance(route_line, lon, lat, from_m, to_m, lane, previous_df,
+                                                kwargs_comparison.get('from_measure'),
+                                                kwargs_comparison.get('to_measure'),
+                                                kwargs_comparison.get('lane_code'),
+                                                kwargs_comparison.get('lat_col', 'STATO_LAT'),
+                                                kwargs_comparison.get('long_col', 'STATO_LONG'))
+
+    elif rni_df is not None:  # Where the measurement column from the input table is not defined.
+        rni_x = rni_df[rni_long].values[0]
+        rni_y = rni_df[rni_lat].values[0]
+        rni_distance = route_line.point_distance(lon, lat, rni_x, rni_y)
+
+    if rni_line is not None:  # Comparison to RNI as a polyline
+        rni_distance, meas_value = rni_line.locate(lon, lat)
+
+    return DataFrame({0: segment_distance, 1: rni_distance, 2: lrs_distance, 3: meas_value, 4: previous_year},
+                     index=df.index, columns=range(5))
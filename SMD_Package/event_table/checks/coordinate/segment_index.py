@@ -0,0 +1,59 @@
+"""
+This script provide the keyed index over reference (RNI or previous year) segment coordinates used by coordinate check.
+"""
+import numpy as np
+from pandas import MultiIndex
+
+
+class SegmentIndex(object):
+    """
+    Index over reference segment coordinates, a hash index on (from measure, to measure, lane code) for exact segment
+    lookup of all the input segments at once. The index is built once per route.
+    """
+    def __init__(self, ref_df, from_m_col, to_m_col, lane_col, long_col, lat_col):
+        """
+        Class initialization.
+        :param ref_df: The reference DataFrame.
+        :param from_m_col: The reference from measure column.
+        :param to_m_col: The reference to measure column.
+        :param lane_col: The reference lane code column.
+        :param long_col: The reference longitude column.
+        :param lat_col: The reference latitude column.
+        """
+        # Only the first row of every segment is used, similar to the DataFrame mask lookup.
+        ref = ref_df[[from_m_col, to_m_col, lane_col, long_col, lat_col]].\
+            drop_duplicates([from_m_col, to_m_col, lane_col])
+
+        self.keys = MultiIndex.from_arrays([ref[from_m_col].values, ref[to_m_col].values, ref[lane_col].values])
+        self.lon = ref[long_col].values.astype(float)
+        self.lat = ref[lat_col].values.astype(float)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, from_m, to_m, lane):
+        """
+        Find the reference row position for every requested segment.
+        :param from_m: From measure array.
+        :param to_m: To measure array.
+        :param lane: Lane code array.
+        :return: Row position array, -1 if the segment does not exist in the reference.
+        """
+        query = MultiIndex.from_arrays([np.asarray(from_m), np.asarray(to_m), np.asarray(lane)])
+        return self.keys.get_indexer(query)
+
+    def coordinates(self, from_m, to_m, lane):
+        """
+        Return the reference coordinates for every requested segment.
+        :return: Tuple of (longitude, latitude) array, NaN if the segment does not exist in the reference.
+        """
+        pos = self.lookup(from_m, to_m, lane)
+        missing = pos == -1
+
+        if len(self.lon) == 0:  # Empty reference, every segment is missing
+            return np.full(len(pos), np.nan), np.full(len(pos), np.nan)
+
+        lon = np.where(missing, np.nan, self.lon[pos])
+        lat = np.where(missing, np.nan, self.lat[pos])
+
+        return lon, lat
@@ -0,0 +1,192 @@
+"""
+This script provide the check pipeline which is declared in the data config file "check_pipeline" key.
+
+Every pipeline step is a dictionary with the following keys:
+    check       : The EventValidation check method name.
+    args        : The check method positional arguments (optional).
+    kwargs      : The check method keyword arguments (optional), the data config "kwargs" is always included.
+    routes      : 'valid_route' (default) or 'no_error_route', the routes processed by the check.
+    gate        : If 'hard' then the routes which have an error after this step are excluded from the next steps.
+    force_write : If specified then the step is only executed if the service force_write value match (optional).
+    reference   : List of reference data used by the check, the reference data is loaded once for all steps.
+    for_each    : List (or a placeholder) of item, the step is repeated for every item (optional).
+    id          : The step name used by the other step depends list (optional), the default is the check name.
+    depends     : List of the earlier step id which has to be finished before this step (optional). If not specified
+                  then the step depends on all of the earlier steps. The steps which do not depend on each other are
+                  executed concurrently, so a step which modifies the input DataFrame (such as segment_duplicate_check)
+                  should not be declared as independent of the other steps.
+    serial      : If true then the step is not executed concurrently with any other step (optional). The default is
+                  true for the check in ARCPY_CHECKS, because arcpy is not thread-safe.
+
+A string value which starts with '$' is a placeholder for the service context (such as '$data_year' or
+'$compare_table.table_name'), '$item' and '{item}' is replaced by the for_each item.
+"""
+from SMD_Package.load_config import SMDConfigs
+
+ROUTE_ATTRIBUTES = ['valid_route', 'no_error_route']  # EventValidation route list attribute usable as step routes
+# The check which calls arcpy other than the shared reference data, the check is executed serially.
+ARCPY_CHECKS = ['coordinate_check', 'measurement_check', 'rni_availability', 'rtc_lane_vehicle', 'rni_compare_surftype',
+                'rni_compare_surfwidth', 'surf_thickness_check', 'median_direction_check', 'deflection_null_row_check']
+MODIFYING_CHECKS = ['segment_duplicate_check', 'side_consistency_check']  # The check which modifies the df_valid
+
+
+class CheckStep(object):
+    """
+    A single check pipeline step.
+    """
+    def __init__(self, method, args=(), kwargs=None, routes='valid_route', gate=None, reference=(), name=None,
+                 depends=None, serial=None):
+        """
+        Class initialization.
+        :param method: The EventValidation check method name.
+        :param args: The check method positional arguments.
+        :param kwargs: The check method keyword arguments.
+        :param routes: 'valid_route', 'no_error_route' or None if the check method does not have routes parameter.
+        :param gate: If 'hard' then the routes which have an error after this step are excluded from the next steps.
+        :param reference: List of reference table dictionary {'table', 'route_id', 'all_rows'} or 'lrs_network'.
+        :param name: The step name, if None then the method name is used.
+        :param depends: List of the earlier step name required by this step, if None then the step depends on all of
+        the earlier steps.
+        :param serial: If True then the step is not executed concurrently with any other step, if None then the step is
+        serial if the method is in ARCPY_CHECKS.
+        """
+        if (routes is not None) and (routes not in ROUTE_ATTRIBUTES):
+            raise ValueError("{0} is not a valid step routes. Use one of {1}.".format(routes, ROUTE_ATTRIBUTES))
+
+        if gate not in [None, 'hard']:
+            raise ValueError("{0} is not a valid step gate.".format(gate))
+
+        self.method = method
+        self.args = tuple(args)
+        self.kwargs = kwargs or dict()
+        self.routes = routes
+        self.gate = gate
+        self.reference = list(reference)
+        self.name = name or method
+        self.depends = None if depends is None else list(depends)
+        self.serial = (method in ARCPY_CHECKS) if serial is None else bool(serial)
+
+    def __repr__(self):
+        return "CheckStep({0})".format(self.method)
+
+
+class CheckPipeline(object):
+    """
+    The check pipeline built from the data config file.
+    """
+    def __init__(self, pipeline, context, force_write=None):
+        """
+        Class initialization.
+        :param pipeline: The list of step dictionary from the data config file.
+        :param context: The placeholder value dictionary.
+        :param force_write: The service force_write value, the step with different force_write value is skipped.
+        """
+        self.context = context
+        self.steps = list()
+        declared = list()  # All of the earlier step name, including the skipped step
+
+        for step in pipeline:
+            depends = step.get('depends')
+
+            for name in depends or list():
+                if name not in declared:
+                    raise ValueError("{0} depends on {1} which is not an earlier step.".format(step['check'], name))
+
+            declared.append(step.get('id', step['check']))
+
+            if ('force_write' in step) and (str(step['force_write']).lower() != str(force_write).lower()):
+                continue
+
+            if 'for_each' in step:
+                items = self.resolve(step['for_each'])
+            else:
+                items = [None]
+
+            for item in items:
+                kwargs = dict(context.get('kwargs', dict()))
+                kwargs.update(self.resolve(step.get('kwargs', dict()), item))
+
+                self.steps.append(CheckStep(step['check'], self.resolve(step.get('args', list()), item), kwargs,
+                                            routes=step.get('routes', 'valid_route'), gate=step.get('gate'),
+                                            reference=[self.reference(x) for x in step.get('reference', list())],
+                                            name=step.get('id'), depends=depends, serial=step.get('serial')))
+
+    @classmethod
+    def from_config(cls, data_config, context, force_write=None):
+        """
+        Create the check pipeline from the data config "check_pipeline" key.
+        :param data_config: The data config object.
+        :param context: The placeholder value dictionary, the data config keys is also included.
+        :param force_write: The service force_write value.
+        :return: CheckPipeline class instance.
+        """
+        pipeline = getattr(data_config, 'check_pipeline', None)
+
+        if pipeline is None:
+            raise ValueError("The data config does not have the check_pipeline key.")
+
+        config_context = dict(vars(data_config))
+        config_context.update(context)
+
+        return cls(pipeline, config_context, force_write)
+
+    def resolve(self, value, item=None):
+        """
+        Replace the placeholder in the requested value.
+        :param value: The value (string, list or dictionary).
+        :param item: The for_each item.
+        :return: The resolved value.
+        """
+        if isinstance(value, list):
+            return [self.resolve(x, item) for x in value]
+        elif isinstance(value, dict):
+            return {str(key): self.resolve(x, item) for key, x in value.items()}
+        elif not isinstance(value, basestring):
+            return value
+        elif value == '$item':
+            return item
+        elif value.startswith('$'):
+            keys = value[1:].split('.')
+            resolved = self.context[keys[0]]
+
+            for key in keys[1:]:
+                resolved = resolved[key]
+
+            return resolved
+        elif (item is not None) and ('{item}' in value):
+            return value.format(item=item)
+        else:
+            return str(value)
+
+    def reference(self, value):
+        """
+        Create the reference table dictionary. A reference is either a SMD config table name key (such as 'rni'),
+        'lrs_network' or a dictionary with 'table', 'route_id' and 'all_rows' keys.
+        """
+        if isinstance(value, dict):
+            reference = self.resolve(value)
+            reference.setdefault('all_rows', True)
+            return reference
+        elif value == 'lrs_network':
+            return value
+        else:
+            smd_config = SMDConfigs()
+            return {
+                'table': smd_config.table_names[value],
+                'route_id': smd_config.table_fields[value]['route_id'],
+                'all_rows': True
+            }
+
+    def references(self):
+        """
+        All of the unique reference used by the pipeline steps.
+        :return: List of reference.
+        """
+        references = list()
+
+        for step in self.steps:
+            for reference in step.reference:
+                if reference not in references:
+                    references.append(reference)
+
+        return references
@@ -0,0 +1,240 @@
+"""
+This script provide the persisted per-route check result cache used by TableCheckService for incremental validation.
+The cache is stored in a local SQLite file specified in the SMD config file "validation_cache" key, every cache row
+is keyed by the cache key (the output table and the balai code) and the route.
+
+A cached route result is reused if the route rows content hash, the route reference data version and the check
+pipeline hash are not changed since the last run. The route reference data version includes the latest UPDATE_DATE of
+the route in every reference table used by the check pipeline (such as the previous year comparison table). The route
+result which has any message is also invalidated if the route rows is moved to other Excel row, because the message
+may contain the row number.
+"""
+from SMD_Package.load_config import SMDConfigs
+from SMD_Package.FCtoDataFrame import event_fc_to_df
+from SMD_Package.event_table.reference_length import ReferenceLength
+from arcpy import env
+import pandas as pd
+import hashlib
+import sqlite3
+import datetime
+import json
+import os
+
+CACHE_VERSION = 2  # Increment this value if the check result of the same input is changed
+
+
+def _json_default(value):
+    """
+    Convert the numpy scalar to the Python scalar for json.dumps.
+    """
+    if hasattr(value, 'item'):
+        return value.item()
+    else:
+        return str(value)
+
+
+def route_hashes(df, routes, routeid_col='LINKID', from_m_col='STA_FROM', to_m_col='STA_TO', lane_code='LANE_CODE'):
+    """
+    Calculate the content hash of every route rows. The row index is not included in the hash and the route rows is
+    ordered by the lane and measure columns, so the route hash is not changed if other route rows is inserted or the
+    route rows is moved to other Excel row.
+    :param df: The input DataFrame.
+    :param routes: The requested routes.
+    :param routeid_col: The Route ID column in the input DataFrame.
+    :param from_m_col: The From Measure column in the input DataFrame.
+    :param to_m_col: The To Measure column in the input DataFrame.
+    :param lane_code: The lane code column in the input DataFrame.
+    :return: Dictionary of {route: hash string}.
+    """
+    df_route = df.loc[df[routeid_col].isin(routes)]
+    hashes = dict()
+
+    if df_route.empty:
+        return hashes
+
+    keys = [x for x in [routeid_col, lane_code, from_m_col, to_m_col] if x in df_route.columns]
+    df_route = df_route.sort_values(keys, kind='mergesort')
+    row_hash = pd.util.hash_pandas_object(df_route, index=False)  # The content hash of every row
+
+    for route, values in row_hash.groupby(df_route[routeid_col].values, sort=False):
+        hashes[route] = hashlib.md5(values.values.tobytes()).hexdigest()
+
+    return hashes
+
+
+def route_index_hashes(df, routes, routeid_col='LINKID'):
+    """
+    Calculate the hash of every route rows index. The message of some check contains the Excel row number, so the
+    cached route result which has any message is only reused if the route rows index is not changed.
+    :param df: The input DataFrame.
+    :param routes: The requested routes.
+    :param routeid_col: The Route ID column in the input DataFrame.
+    :return: Dictionary of {route: hash string}.
+    """
+    df_route = df.loc[df[routeid_col].isin(routes)]
+    hashes = dict()
+
+    for route, index in pd.Series(df_route.index, index=df_route.index).groupby(df_route[routeid_col].values,
+                                                                               sort=False):
+        hashes[route] = hashlib.md5(index.values.astype('int64').tobytes()).hexdigest()
+
+    return hashes
+
+
+def table_dates(table, routeid_col, routes, chunk_size=500):
+    """
+    Read the latest UPDATE_DATE of every requested route in a reference table.
+    :param table: The reference table.
+    :param routeid_col: The RouteID column in the reference table.
+    :param routes: The requested routes.
+    :param chunk_size: The number of route in a single query.
+    :return: Dictionary of {route: date string}.
+    """
+    columns = ['UPDATE_DATE', routeid_col]
+    dates = dict()
+
+    for chunk in [routes[x: x+chunk_size] for x in range(0, len(routes), chunk_size)]:
+        df = event_fc_to_df(table, columns, chunk, routeid_col, env.workspace, True, sql_prefix='MAX (UPDATE_DATE)',
+                            sql_postfix='GROUP BY ({0})'.format(routeid_col), replace_null=False)
+        dates.update({str(route): str(date) for route, date in zip(df[routeid_col], df['UPDATE_DATE'])
+                      if not pd.isnull(date)})
+
+    return dates
+
+
+def pipeline_hash(steps, column_details):
+    """
+    Calculate the hash of the check pipeline steps and the data config column details.
+    :param steps: List of CheckStep.
+    :param column_details: The data config column details.
+    :return: Hash string.
+    """
+    steps = [[x.method, x.args, x.kwargs, x.routes, x.gate, x.depends] for x in steps]
+    dumped = json.dumps([CACHE_VERSION, steps, column_details], sort_keys=True, default=_json_default)
+
+    return hashlib.md5(dumped).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Persisted per-route check result cache.
+    """
+    def __init__(self, cache_key, config_hash, db_path=None):
+        """
+        Class initialization.
+        :param cache_key: The cache key, such as the output table and the balai code.
+        :param config_hash: The check pipeline hash from pipeline_hash.
+        :param db_path: The SQLite file path, if None then the "validation_cache" "path" value from SMD config file
+        will be used.
+        """
+        if db_path is None:
+            db_path = getattr(SMDConfigs(), 'validation_cache', dict()).get('path', 'validation_cache.sqlite')
+            if not os.path.isabs(db_path):
+                db_path = os.path.join(SMDConfigs.smd_dir(), db_path)
+
+        self.db_path = db_path
+        self.cache_key = cache_key
+        self.config_hash = config_hash
+        self.route_hash = dict()  # {route: rows hash} of the current input
+        self.index_hash = dict()  # {route: rows index hash} of the current input
+        self.reference_hash = dict()  # {route: reference data version} of the current input
+
+        con = self.connect()
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS route_result "
+                        "(cache_key TEXT, route TEXT, row_hash TEXT, reference_hash TEXT, config_hash TEXT, "
+                        "result TEXT, update_date TEXT, PRIMARY KEY (cache_key, route))")
+        con.close()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def load(self, df, routes, routeid_col='LINKID', references=(), from_m_col='STA_FROM', to_m_col='STA_TO',
+             lane_code='LANE_CODE'):
+        """
+        Calculate the current input route hash and reference data version, then read the cached result of every
+        unchanged route.
+        :param df: The input DataFrame.
+        :param routes: The requested routes.
+        :param routeid_col: The Route ID column in the input DataFrame.
+        :param references: List of reference from CheckPipeline.references, the latest UPDATE_DATE of the route in
+        every reference table is included in the reference data version.
+        :param from_m_col: The From Measure column in the input DataFrame.
+        :param to_m_col: The To Measure column in the input DataFrame.
+        :param lane_code: The lane code column in the input DataFrame.
+        :return: Dictionary of {route: [(status, message, check, from_m, to_m, lane), ...]} of the unchanged routes.
+        """
+        routes = list(routes)
+        self.route_hash = route_hashes(df, routes, routeid_col, from_m_col, to_m_col, lane_code)
+        self.index_hash = route_index_hashes(df, routes, routeid_col)
+        self.reference_hash = ReferenceLength().fingerprints(routes) if routes else dict()
+
+        rni_table = SMDConfigs().table_names['rni']  # The RNI version is already included in the fingerprint
+        tables = list()
+        for reference in references:
+            if (reference != 'lrs_network') and (reference['table'] != rni_table) and \
+                    ((reference['table'], reference['route_id']) not in tables):
+                tables.append((reference['table'], reference['route_id']))
+
+        for table, route_id in tables:
+            dates = table_dates(table, route_id, routes)
+            self.reference_hash = {route: '{0}|{1}'.format(self.reference_hash.get(route, ''), dates.get(route))
+                                   for route in routes}
+
+        cached = dict()
+        con = self.connect()
+
+        for chunk in [routes[x: x+500] for x in range(0, len(routes), 500)]:
+            rows = con.execute("SELECT route, row_hash, reference_hash, config_hash, result FROM route_result "
+                               "WHERE cache_key = ? AND route IN ({0})".format(', '.join(['?']*len(chunk))),
+                               [self.cache_key] + chunk).fetchall()
+
+            for route, row_hash, reference_hash, config_hash, result in rows:
+                row_hash, _, index_hash = row_hash.partition('|')
+                records = [tuple(x) for x in json.loads(result)]
+
+                if (row_hash == self.route_hash.get(route)) and \
+                        (reference_hash == self.reference_hash.get(route, '')) and \
+                        (config_hash == self.config_hash) and \
+                        ((index_hash == self.index_hash.get(route)) or (len(records) == 0)):
+                    cached[route] = records
+
+        con.close()
+
+        return cached
+
+    @staticmethod
+    def restore(violations, route, records):
+        """
+        Append the cached route result to the violation store.
+        :param violations: ViolationStore class instance.
+        :param route: The cached route.
+        :param records: The cached route result from load.
+        :return:
+        """
+        for status, message, check, from_m, to_m, lane in records:
+            violations.append(route, status, message, None, check, from_m, to_m, lane)
+
+        return violations
+
+    def store(self, violations, routes):
+        """
+        Store the check result of the requested routes.
+        :param violations: ViolationStore class instance.
+        :param routes: The checked routes.
+        :return:
+        """
+        update_date = datetime.datetime.now().isoformat()
+        rows = [(self.cache_key, route, '{0}|{1}'.format(self.route_hash[route], self.index_hash.get(route)),
+                 self.reference_hash.get(route, ''), self.config_hash, json.dumps(violations.records(route), default=_json_default), update_date)
+                for route in routes if route in self.route_hash]
+
+        if len(rows) == 0:
+            return self
+
+        con = self.connect()
+        with con:
+            con.executemany("INSERT OR REPLACE INTO route_result VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        con.close()
+
+        return self
@@ -0,0 +1,274 @@
+"""
+This script provide the check sequence runner for EventValidation, the independent check steps are executed
+concurrently and the check sequence can be sharded by route across a process pool.
+"""
+from arcpy import env
+from SMD_Package.event_table.prefetch import RoutePrefetch
+from violation import ViolationStore
+from multiprocessing.pool import ThreadPool
+import multiprocessing
+import pandas as pd
+import copy
+import os
+import sys
+
+def share_references(check, references):
+    """
+    Mark the reference data used by the check steps as shared in the EventValidation prefetch and load all of them,
+    so every reference table is loaded once for all steps. The reference data is loaded before the concurrent steps
+    are started, because arcpy is not thread-safe.
+    :param check: EventValidation class instance.
+    :param references: List of reference from CheckPipeline.references.
+    :return:
+    """
+    for reference in references:
+        if reference == 'lrs_network':
+            if check.prefetch.routes:  # Load the LRS Network geometry for all of the prefetched routes
+                check.prefetch.route_entry(check.prefetch.routes[0], check.lrs_network, check.lrs_routeid)
+        else:
+            check.prefetch.share(reference['table'], reference['route_id'], reference['all_rows'])
+
+    check.prefetch.load_shared()
+
+    return
+
+
+def step_levels(steps):
+    """
+    Group the check steps into levels, every step only depends on the steps from the earlier levels so the steps in
+    the same level can be executed concurrently. A step always depends on the earlier hard gate steps. The serial step
+    has its own level, so the level is split at every serial step while keeping the step order.
+    :param steps: List of CheckStep.
+    :return: List of CheckStep list.
+    """
+    step_level = list()
+
+    for i, step in enumerate(steps):
+        if step.depends is None:
+            parents = range(i)
+        else:
+            parents = [j for j in range(i) if (steps[j].name in step.depends) or (steps[j].gate == 'hard')]
+
+        if len(parents) == 0:
+            step_level.append(0)
+        else:
+            step_level.append(max([step_level[j] for j in parents]) + 1)
+
+    levels = [list() for _ in range(max(step_level) + 1)] if steps else list()
+    for step, level in zip(steps, step_level):
+        levels[level].append(step)
+
+    split_levels = list()
+    for level in levels:
+        concurrent = list()  # The consecutive non-serial steps
+
+        for step in level:
+            if not step.serial:
+                concurrent.append(step)
+                continue
+
+            if len(concurrent) != 0:
+                split_levels.append(concurrent)
+                concurrent = list()
+
+            split_levels.append([step])
+
+        if len(concurrent) != 0:
+            split_levels.append(concurrent)
+
+    return split_levels
+
+
+def step_check(check):
+    """
+    Create a copy of the EventValidation class instance with empty results, used for executing a step concurrently.
+    The input DataFrame and the prefetched reference data is shared with the original instance.
+    :param check: EventValidation class instance.
+    :return: EventValidation class instance.
+    """
+    copied = copy.copy(check)
+    copied.error_list = list()
+    copied.violations = ViolationStore()
+    copied._coordinate_status = dict()
+
+    return copied
+
+
+def _run_step(args):
+    """
+    Execute a single check step.
+    """
+    check, step, routes = args
+
+    if routes is None:  # The check method does not have routes parameter
+        getattr(check, step.method)(*step.args, **step.kwargs)
+    else:
+        getattr(check, step.method)(*step.args, **dict(step.kwargs, routes=routes))
+
+    return check
+
+
+def run_steps(check, steps, references=(), threads=None):
+    """
+    Run the check steps level by level. The steps in the same level do not depend on each other and are executed
+    concurrently in a thread pool, the results are merged in the step order. The routes which have an error after a
+    hard gate step are excluded from the next steps.
+    :param check: EventValidation class instance.
+    :param steps: List of CheckStep.
+    :param references: List of reference used by the steps.
+    :param threads: The maximum number of concurrent step, if None then all steps in a level are executed at once.
+    :return: EventValidation class instance.
+    """
+    share_references(check, references)
+    gated = set()  # The routes excluded by the hard gate
+
+    for level in step_levels(steps):
+        jobs = list()
+
+        for step in level:
+            if step.routes is None:
+                jobs.append((step, None))
+            else:
+                routes = [x for x in getattr(check, step.routes) if x not in gated]
+
+                if len(routes) != 0:  # Skip the step if there is no route to be checked
+                    jobs.append((step, routes))
+
+        if len(jobs) == 1:
+            _run_step((check, jobs[0][0], jobs[0][1]))
+        elif len(jobs) > 1:
+            copies = [step_check(check) for _ in jobs]
+            pool = ThreadPool(min(len(jobs), threads or len(jobs)))
+
+            try:
+                pool.map(_run_step, [(copied, step, routes) for copied, (step, routes) in zip(copies, jobs)])
+            finally:
+                pool.close()
+                pool.join()
+
+            for copied in copies:
+                check.violations.extend(copied.violations)
+                check.error_list += copied.error_list
+                check._coordinate_status.update(copied._coordinate_status)
+
+        if any([step.gate == 'hard' for step, _ in jobs]):
+            gated.update(check.failed_routes)
+
+    return check
+
+
+def route_shards(df, routes, shard_count, routeid_col='LINKID'):
+    """
+    Split the routes into shards with balanced row count, the route with the most rows is assigned first to the shard
+    with the least rows.
+    :param df: The input DataFrame.
+    :param routes: The route list.
+    :param shard_count: The number of shard.
+    :param routeid_col: The Route ID column in the input DataFrame.
+    :return: List of route list.
+    """
+    row_count = df.loc[df[routeid_col].isin(routes), routeid_col].value_counts()
+    ordered = sorted(routes, key=lambda x: (-row_count.get(x, 0), x))
+
+    shards = [list() for _ in range(min(shard_count, len(routes)))]
+    shard_rows = [0]*len(shards)
+
+    for route in ordered:
+        ind = shard_rows.index(min(shard_rows))
+        shards[ind].append(route)
+        shard_rows[ind] += row_count.get(route, 0)
+
+    return [sorted(x) for x in shards if len(x) != 0]
+
+
+def shard_check(check, routes, routeid_col='LINKID'):
+    """
+    Create a copy of the EventValidation class instance which only contain the requested routes and empty results.
+    :param check: EventValidation class instance.
+    :param routes: The shard routes.
+    :param routeid_col: The Route ID column in the input table.
+    :return: EventValidation class instance.
+    """
+    shard = copy.copy(check)
+    shard.df_string = check.selected_route_df(check.df_string, routes, routeid_col)
+    shard.df_valid = check.selected_route_df(check.df_valid, routes, routeid_col)
+
+    shard.valid_route = list(routes)
+    shard.missing_route = list()
+    shard.error_list = list()
+    shard.violations = ViolationStore()
+    shard._coordinate_status = dict()
+    shard.prefetch = RoutePrefetch(check.sde_connection, routes=routes)  # Only load the shard routes
+
+    return shard
+
+
+def _run_shard(args):
+    """
+    Process pool worker function.
+    """
+    shard, steps, references = args
+    env.workspace = shard.sde_connection  # The worker process does not inherit the arcpy environment
+    run_steps(shard, steps, references)
+
+    return shard.violations, shard.error_list, shard._coordinate_status, shard.df_valid
+
+
+def merge_results(check, results, routes, routeid_col='LINKID'):
+    """
+    Merge the shard results into the EventValidation class instance, the results are merged in the shard order.
+    :param check: EventValidation class instance.
+    :param results: List of shard result.
+    :param routes: All of the sharded routes.
+    :param routeid_col: The Route ID column in the input table.
+    :return: EventValidation class instance.
+    """
+    shard_dfs = list()
+
+    for violations, error_list, coordinate_status, df_valid in results:
+        check.violations.extend(violations)
+        check.error_list += error_list
+        check._coordinate_status.update(coordinate_status)
+        shard_dfs.append(df_valid)
+
+    # The shard DataFrame replaces the sharded routes rows, because some check modifies the df_valid.
+    other_rows = check.df_valid.loc[~check.df_valid[routeid_col].isin(routes)]
+    check.df_valid = pd.concat([other_rows] + shard_dfs, sort=False).sort_index()
+
+    return check
+
+
+def run_sharded(check, steps, references=(), processes=None, routeid_col='LINKID'):
+    """
+    Run the check sequence with the valid routes sharded across a process pool. Every worker runs the whole check
+    sequence for its route shard. The worker process imports the main module, so this function should only be used if
+    the caller explicitly opts in from a script which guards its entry point with if __name__ == '__main__'.
+    :param check: EventValidation class instance.
+    :param steps: List of CheckStep.
+    :param references: List of reference used by the steps.
+    :param processes: The number of worker process, if None then the number of CPU will be used.
+    :param routeid_col: The Route ID column in the input table.
+    :return: EventValidation class instance.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    routes = list(check.valid_route)
+    shards = route_shards(check.df_valid, routes, processes, routeid_col)
+
+    if len(shards) <= 1:
+        return run_steps(check, steps, references)
+
+    # ArcGIS process (ArcMap/ArcSOC) can not be used to start the worker process.
+    if (sys.platform == 'win32') and not os.path.basename(sys.executable).lower().startswith('python'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
+
+    pool = multiprocessing.Pool(len(shards))
+    try:
+        results = pool.map(_run_shard, [(shard_check(check, shard, routeid_col), steps, references)
+                                         for shard in shards])
+    finally:
+        pool.close()
+        pool.join()
+
+    return merge_results(check, results, routes, routeid_col)
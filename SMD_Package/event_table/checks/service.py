@@ -3,6 +3,10 @@ from SMD_Package import EventValidation, output_message, GetRoutes, gdb_table_wr
     read_input_excel
 from SMD_Package.event_table.measurement.adjustment import Adjust
 from SMD_Package.event_table.deflection.deflection import Deflection
+from pipeline import CheckPipeline, MODIFYING_CHECKS
+from runner import run_steps, run_sharded, shard_check, merge_results
+from result_cache import ResultCache, pipeline_hash
+from violation import ViolationStore
 from arcpy import SetParameterAsText, env, da, Exists
 import pandas as pd
 import numpy as np
@@ -13,7 +17,8 @@ class TableCheckService(object):
     This class provide class method for multiple data type check.
     """
     def __init__(self, input_json, config_path, output_table, output_index=2, smd_dir=None,
-                 table_suffix=None, semester_data=False, year_sem_check=True, **kwargs):
+                 table_suffix=None, semester_data=False, year_sem_check=True, parallel=False, incremental=None,
+                 **kwargs):
         """
         Class initialization.
         :param input_json: The input JSON string.
@@ -23,6 +28,11 @@ class TableCheckService(object):
         :param smd_dir: The root directory of SMD_Script.
         :param table_suffix: Suffix used for the output table. Default is None.
         :param semester_data: Boolean if the data is semester data. Default is False.
+        :param parallel: If True and the "parallel_check" "enabled" value from SMD config file is true, then the check
+        sequence is sharded by route across a process pool. Only set to True from a tool script which guards its entry
+        point with if __name__ == '__main__', because the worker process imports the main module.
+        :param incremental: If True then the unchanged routes since the last upload reuse the cached check result. If
+        None then the "validation_cache" "enabled" value from SMD config file will be used.
         """
         import os
         import sys
@@ -119,9 +129,97 @@ class TableCheckService(object):
         self.output_index = output_index
         self.kwargs = data_config.kwargs
 
+        parallel_config = getattr(smd_config, 'parallel_check', dict())
+        self.parallel = bool(parallel) and parallel_config.get('enabled', False)  # The caller has to opt in
+        self.parallel_processes = parallel_config.get('processes') or None  # If 0 or None then use all CPU
+        self.parallel_min_routes = parallel_config.get('min_routes', 20)
+
+        if incremental is None:
+            incremental = getattr(smd_config, 'validation_cache', dict()).get('enabled', False)
+
+        self.incremental = incremental
+        self.result_cache = None  # The ResultCache used by the last run_checks
+        self.cached_routes = list()  # The routes which reuse the cached check result
+
+    def run_pipeline(self, force_write):
+        """
+        Run the check pipeline declared in the data config file "check_pipeline" key.
+        :param force_write: The force write parameter, the pipeline step with different force_write value is skipped.
+        :return:
+        """
+        context = {
+            'data_year': self.data_year,
+            'data_semester': self.data_semester,
+            'kode_balai': self.kode_balai
+        }
+        pipeline = CheckPipeline.from_config(self.data_config, context, force_write)
+
+        return self.run_checks(pipeline.steps, pipeline.references())
+
+    def run_checks(self, steps, references=()):
+        """
+        Run the check sequence for all valid routes. If the parallel check is enabled and the valid route count
+        exceeds the minimum route count, then the valid routes will be sharded across a process pool. If the
+        incremental validation is enabled, then only the changed routes is checked and the other routes reuse the
+        cached check result.
+        :param steps: List of CheckStep.
+        :param references: List of reference data used by the steps.
+        :return:
+        """
+        routeid_col = self.kwargs.get('routeid_col', 'LINKID')
+        cached = dict()
+
+        if self.incremental:
+            cache_key = '{0}|{1}'.format(self.output_table, self.kode_balai)
+            self.result_cache = ResultCache(cache_key, pipeline_hash(steps, self.column_details))
+            cached = self.result_cache.load(self.check.df_string, self.check.valid_route, routeid_col, references,
+                                            from_m_col=self.kwargs.get('from_m_col', 'STA_FROM'),
+                                            to_m_col=self.kwargs.get('to_m_col', 'STA_TO'),
+                                            lane_code=self.kwargs.get('lane_code', 'LANE_CODE'))
+
+        self.cached_routes = [x for x in self.check.valid_route if x in cached]
+        checked_routes = [x for x in self.check.valid_route if x not in cached]
+
+        if len(cached) == 0:
+            check = self.check
+        elif len(checked_routes) != 0:
+            check = shard_check(self.check, checked_routes, routeid_col)  # Only the changed routes is checked
+        else:
+            check = None  # All of the valid routes reuse the cached result
+
+        if check is not None:
+            if self.parallel and (len(checked_routes) >= self.parallel_min_routes):
+                run_sharded(check, steps, references, processes=self.parallel_processes, routeid_col=routeid_col)
+            else:
+                run_steps(check, steps, references)
+
+            if check is not self.check:
+                merge_results(self.check, [(check.violations, check.error_list, check._coordinate_status,
+                                            check.df_valid)], checked_routes, routeid_col)
+
+        for route in self.cached_routes:
+            ResultCache.restore(self.check.violations, route, cached[route])
+
+        modifying_steps = [x for x in steps if x.method in MODIFYING_CHECKS]
+        if (len(self.cached_routes) != 0) and (len(modifying_steps) != 0):
+            # The cached route rows is still written, so the steps which modify the input DataFrame are executed for
+            # the cached routes. The step messages is discarded because the cached result is used.
+            cached_check = shard_check(self.check, self.cached_routes, routeid_col)
+            run_steps(cached_check, modifying_steps, references)
+            merge_results(self.check, [(ViolationStore(), list(), dict(), cached_check.df_valid)], self.cached_routes,
+                          routeid_col)
+
+        if self.result_cache is not None:
+            # The passed routes result is stored after the routes is written by write_to_table.
+            passed_routes = self.passed_routes()
+            self.result_cache.store(self.check.violations, [x for x in checked_routes if x not in passed_routes])
+
+        return self
+
     def write_to_table(self, trim_to_reference=None, replace_key=None):
         """
-        Function to write selected route from valid DataFrame to GDB.
+        Function to write selected route from valid DataFrame to GDB. The route which reuses the cached check result
+        is also written.
         """
         passed_routes = self.passed_routes()
 
@@ -139,7 +237,10 @@ class TableCheckService(object):
                 rows = adjust.df
 
             gdb_table_writer(env.workspace, rows, self.output_table, self.column_details,
-                             replace_key=replace_key)
+                             replace_key=replace_key, year=self.data_year, semester=self.data_semester)
+
+            if self.result_cache is not None:
+                self.result_cache.store(self.check.violations, passed_routes)
 
         return self
 
@@ -181,53 +282,26 @@ class TableCheckService(object):
     def return_all_message(self, selection=True, return_df=False):
         """
         Function to write all type of message as arcpy.SetParameterAsText.
+        :param selection: If True then only the messages with the most severe status of every route is written.
+        :param return_df: If True then return the messages as DataFrame.
         :return:
         """
-        def group_function(series):
-            """
-            This function checks for every route available message
-            :param series: Input series from groupby object.
-            :return: Pandas Series.
-            """
-            d = dict()
-            status = 'status'
-            d['error'] = np.any(series[status] == 'error')
-            d['review'] = np.any(series[status] == 'ToBeReviewed')
-            d['warning'] = np.any(series[status] == 'VerifiedWithWarning')
-            d['verified'] = np.any(series[status] == 'verified')
-
-            return pd.Series(d, index=['error', 'review', 'warning', 'verified'])
-
         errors = self.check.altered_route_result(include_valid_routes=True, message_type='error')
         reviews = self.check.altered_route_result(include_valid_routes=False, message_type='ToBeReviewed')
         warning = self.check.altered_route_result(include_valid_routes=False, message_type='VerifiedWithWarning')
         all_messages = errors + reviews + warning
-        df = pd.DataFrame(all_messages)
 
         if selection:
-            grouped = df.groupby('linkid')
-
-            for route, group in grouped:
-                g_status = group_function(group)
-                route_selection = df['linkid'] == route
-
-                if g_status['error']:
-                    tobe_dropped = df.loc[route_selection & (df['status'] != 'error')].index
-                    df.drop(tobe_dropped, inplace=True)
-                    continue
-
-                elif not g_status['verified']:
-                    if g_status['review']:
-                        tobe_dropped = df.loc[route_selection & (df['status'] != 'ToBeReviewed')].index
-                        df.drop(tobe_dropped, inplace=True)
-                        continue
-
-            all_messages = df.to_dict(orient='records')
+            # The route with error only returns the error messages, the route with review only returns the review
+            # messages. The route status is read from the violation store route status counter.
+            route_status = self.check.violations.route_status
+            all_messages = [x for x in all_messages if
+                            route_status(x['linkid']) in [None, 'VerifiedWithWarning', x['status']]]
 
         SetParameterAsText(self.output_index, output_message("Succeeded", all_messages))
 
         if return_df:
-            return df
+            return pd.DataFrame(all_messages)
         else:
             return self
 
@@ -242,9 +316,13 @@ class TableCheckService(object):
         return self
 
     def passed_routes(self):
-        df_msg = self.return_all_message(return_df=True)
-        verified_status = ['verified', 'VerifiedWithWarning']
-        passed_routes = df_msg.loc[df_msg['status'].isin(verified_status), 'linkid'].unique().tolist()
+        """
+        All of the verified route and the route which only have VerifiedWithWarning messages.
+        :return: List of route.
+        """
+        violations = self.check.violations
+        passed_routes = self.check.verified_routes()
+        passed_routes += [x for x in violations.routes() if violations.route_status(x) == 'VerifiedWithWarning']
 
         return passed_routes
 
@@ -256,36 +334,10 @@ class RoughnessCheck(TableCheckService):
     def __init__(self, force_write, **kwargs):
         super(RoughnessCheck, self).__init__(**kwargs)
 
-        compare_fc = self.data_config.compare_table['table_name']
-        comp_routeid = self.data_config.compare_table['route_id']
-        comp_from_m = self.data_config.compare_table['from_measure']
-        comp_to_m = self.data_config.compare_table['to_measure']
-        comp_lane_code = self.data_config.compare_table['lane_code']
-        comp_iri = self.data_config.compare_table['iri']
-
         if self.initial_check_passed:
             self.check.route_domain(self.kode_balai, self.route_list)
             self.check.route_selection(selection=self.route_req)
-            valid_routes = self.check.valid_route
-
-            self.check.segment_duplicate_check(routes=valid_routes, **self.kwargs)
-            self.check.range_domain_check(routes=valid_routes, **self.kwargs)
-            self.check.survey_year_check(self.data_year, **self.kwargs)
-            self.check.measurement_check(routes=valid_routes, compare_to='RNI', **self.kwargs)
-            self.check.lane_direction_check(routes=valid_routes, **self.kwargs)
-            self.check.lane_code_check(routes=valid_routes, **self.kwargs)
-
-            if str(force_write) == 'false':
-                self.check.segment_len_check(routes=valid_routes, **self.kwargs)  # TEMPORARY.
-                self.check.coordinate_check(routes=valid_routes, comparison='RNIline-LRS',
-                                            previous_year_table=compare_fc,
-                                            kwargs_comparison=self.data_config.compare_table, **self.kwargs)
-
-            # REVIEW
-            if len(self.check.no_error_route) != 0:
-                self.check.compare_kemantapan('IRI', compare_fc, comp_from_m, comp_to_m, comp_routeid, comp_lane_code,
-                                              comp_iri, routes=self.check.no_error_route,
-                                              rni_comp_kwargs=self.data_config.rni_compare_table, **self.kwargs)
+            self.run_pipeline(force_write)
 
             self.write_to_table('RNI')  # Write passed routes to GDB
             self.return_all_message()
@@ -298,47 +350,10 @@ class RNICheck(TableCheckService):
     def __init__(self, force_write, wipe_other=True, **kwargs):
         super(RNICheck, self).__init__(**kwargs)
 
-        road_type_details = self.data_config.roadtype_details  # RNI road type details from data config file.
-        compare_fc = self.data_config.compare_table['table_name']
-
         if self.initial_check_passed:
             self.check.route_domain(self.kode_balai, self.route_list)
             self.check.route_selection(selection=self.route_req)
-            self.check.range_domain_check(routes=self.check.valid_route, **self.kwargs)
-            valid_routes = self.check.valid_route
-
-            self.check.segment_duplicate_check(routes=valid_routes, **self.kwargs)
-            self.check.lane_sequence_check(routes=valid_routes, **self.kwargs)
-            self.check.survey_year_check(self.data_year, **self.kwargs)
-            self.check.rni_roadtype_check(road_type_details, routes=valid_routes, **self.kwargs)
-            self.check.rni_median_inn_shwidth(r_shwidth='R_INN_SHWIDTH', l_shwidth='L_INN_SHWIDTH',
-                                              routes=valid_routes, **self.kwargs)
-            self.check.col_unique_check('VER_ALIGNMENT', routes=valid_routes, **self.kwargs)
-            self.check.col_unique_check('HOR_ALIGNMENT', routes=valid_routes, **self.kwargs)
-
-            for col in [["INN_SHTYPE", "INN_SHWIDTH"],
-                        ["OUT_SHTYPE", "OUT_SHWIDTH"],
-                        "TERRAIN_TYPE",
-                        "LAND_USE"]:
-                self.check.side_pattern_check(col, empty_value_type=0, routes=valid_routes, **self.kwargs)
-                self.check.side_consistency_check(col, routes=valid_routes, **self.kwargs)
-
-            for col in [["DITCH_TYPE", "DITCH_DEPTH", "DITCH_WIDTH"]]:
-                self.check.side_pattern_check(col, empty_value_type=5, routes=valid_routes,  **self.kwargs)
-                self.check.side_consistency_check(col, routes=valid_routes, **self.kwargs)
-
-            if str(force_write) == 'false':
-                self.check.segment_len_check(routes=valid_routes, **self.kwargs)  # TEMPORARY
-                self.check.coordinate_check(routes=valid_routes, comparison='LRS', previous_year_table=compare_fc,
-                                            kwargs_comparison=self.data_config.compare_table,
-                                            **self.kwargs)
-                self.check.measurement_check(routes=valid_routes, compare_to='LRS', max_m='segment_len',
-                                             **self.kwargs)
-                self.check.rni_compare_surftype(routes=valid_routes, kwargs_comparison=self.data_config.compare_table,
-                                                **self.kwargs)
-            else:
-                self.check.measurement_check(routes=valid_routes, compare_to='LRS', max_m='segment_len',
-                                             ignore_end_gap=True, **self.kwargs)
+            self.run_pipeline(force_write)
 
             self.write_to_table()  # Write passed routes to GDB
             if wipe_other:
@@ -353,38 +368,10 @@ class PCICheck(TableCheckService):
     def __init__(self, force_write, **kwargs):
         super(PCICheck, self).__init__(**kwargs)
 
-        compare_fc = self.data_config.compare_table['table_name']
-        asphalt_cols = self.data_config.asphalt_columns
-        rigid_cols = self.data_config.rigid_columns
-
         if self.initial_check_passed:
             self.check.route_domain(self.kode_balai, self.route_list)
             self.check.route_selection(selection=self.route_req)
-            valid_routes = self.check.valid_route
-
-            self.check.segment_duplicate_check(rotues=valid_routes, **self.kwargs)
-            self.check.range_domain_check(routes=valid_routes, **self.kwargs)
-            self.check.survey_year_check(self.data_year, **self.kwargs)
-            self.check.segment_len_check(routes=valid_routes, **self.kwargs)
-            self.check.measurement_check(routes=valid_routes, compare_to='RNI', **self.kwargs)
-            self.check.pci_asp_check(routes=valid_routes, asp_pref='VOL_AS', **self.kwargs)
-            self.check.pci_val_check(routes=valid_routes, asp_pref='VOL_AS', rg_pref='VOL_RG', **self.kwargs)
-            self.check.pci_surftype_check(routes=valid_routes, **self.kwargs)
-            self.check.lane_code_check(routes=valid_routes, **self.kwargs)
-            self.check.lane_direction_check(routes=valid_routes, **self.kwargs)
-
-            # Iterate all asphalt condition and severity column
-            for col in asphalt_cols:
-                self.check.pci_val_check(rg_pref='-', asp_pref='VOL_AS_'+col, pci_col='SEV_AS_'+col, max_value='NA',
-                                         min_value=None, check_null=True, routes=valid_routes, **self.kwargs)
-            for col in rigid_cols:
-                self.check.pci_val_check(rg_pref='VOL_RG_'+col, as_pref='-', pci_col='SEV_RG_'+col, max_value='NA',
-                                         min_value=None, check_null=True, routes=valid_routes,  **self.kwargs)
-
-            if str(force_write) == 'false':
-                self.check.coordinate_check(routes=valid_routes, comparison='RNIline-LRS',
-                                            previous_year_table=compare_fc,
-                                            kwargs_comparison=self.data_config.compare_table, **self.kwargs)
+            self.run_pipeline(force_write)
 
             self.write_to_table('RNI')
             self.return_all_message()
@@ -400,15 +387,7 @@ class RTCCheck(TableCheckService):
         if self.initial_check_passed:
             self.check.route_domain(self.kode_balai, self.route_list)
             self.check.route_selection(selection=self.route_req)
-            valid_routes = self.check.valid_route
-
-            self.check.range_domain_check(routes=valid_routes, from_m_col=None, to_m_col=None, **self.kwargs)
-            self.check.rtc_duration_check(routes=valid_routes, **self.kwargs)
-            self.check.rtc_time_interval_check(routes=valid_routes, **self.kwargs)
-
-            if str(force_write) == 'false':
-                self.check.coordinate_check(from_m_col=None, routes=valid_routes, segment_data=False, lat_col='RTC_LAT',
-                                            long_col='RTC_LONG', comparison='RNIline-LRS', **self.kwargs)
+            self.run_pipeline(force_write)
 
             self.write_to_table(None)
             self.return_all_message()
@@ -424,30 +403,9 @@ class DeflectionCheck(TableCheckService):
         if self.initial_check_passed:
             self.check.route_domain(self.kode_balai, self.route_list)
             self.check.route_selection(selection=self.route_req)
-            valid_routes = self.check.valid_route
-
-            self.check.range_domain_check(routes=valid_routes, lane_code='SURVEY_DIREC', **self.kwargs)
-            self.check.segment_len_check(routes=valid_routes, lane_code='SURVEY_DIREC', **self.kwargs)
-
-            valid_routes = self.check.no_error_route  # Refresh the valid route with no error routes.
-
-            if len(valid_routes) != 0:
-
-                if str(force_write) == 'false':
-                    self.check.deflection_null_row_check(routes=valid_routes, allow_rigid=True, **self.kwargs)
-                    valid_routes = self.check.no_error_route  # Refresh the valid route variable.
-
-                    self.check.surf_thickness_check(routes=valid_routes, **self.kwargs)
-                    self.check.coordinate_check(routes=valid_routes, segment_data=True, lat_col='DEFL_LAT',
-                                                lane_code=None, long_col='DEFL_LONG', comparison='RNIline-LRS',
-                                                window=2, radius=500, **self.kwargs)
-                    self.check.measurement_check(routes=valid_routes, lane_code=None, tolerance=0, **self.kwargs)
-                    self.check.median_direction_check(routes=valid_routes, **self.kwargs)
+            self.run_pipeline(force_write)
 
-                if str(force_write) == 'true':
-                    self.check.measurement_check(routes=valid_routes, ignore_end_gap=True, end_only=True,
-                                                 lane_code=None, start_at_zero=False,
-                                                 **self.kwargs)  # The input data should not exceed RNI max M.
+            valid_routes = self.check.no_error_route
 
             if sorting and len(valid_routes) != 0:
                 deflection = Deflection(self.check.df_valid, 'FORCE', 'FWD', 'FWD_D1', 'FWD_D2', 'ASPHALT_TEMP',
@@ -0,0 +1,203 @@
+"""
+This script provide the violation store used by EventValidation to record the check result of every route.
+"""
+from collections import OrderedDict
+from array import array
+
+STATUS = ['error', 'ToBeReviewed', 'VerifiedWithWarning']  # The status enum, the status code is the list index
+
+
+class ViolationStore(object):
+    """
+    Append-only violation store. Every violation field is stored in its own array, the message text is rendered from
+    the message template and the template args only when the message is requested. The per-route status counter is
+    updated on every append, so the route pass/fail query does not need to read the violation records.
+    """
+    def __init__(self):
+        """
+        Class initialization.
+        """
+        self.route = list()
+        self.status = array('b')  # The status code
+        self.check = list()  # The check ID
+        self.from_m = list()
+        self.to_m = list()
+        self.lane = list()
+        self.template = list()  # The message template or the message text if the args is None
+        self.args = list()  # The message template args dictionary
+
+        self._route_rows = OrderedDict()  # {route: [violation position]} in the route insertion order
+        self._counts = dict()  # {route: [error count, ToBeReviewed count, VerifiedWithWarning count]}
+        self._failed = list()  # The routes with error in the order of the first error
+
+    def __len__(self):
+        return len(self.route)
+
+    @staticmethod
+    def status_code(status):
+        """
+        Convert the message status to the status code.
+        :param status: The message status.
+        :return: The status code.
+        """
+        if status not in STATUS:
+            raise ValueError("{0} is not a valid message status. Use one of {1}.".format(status, STATUS))
+
+        return STATUS.index(status)
+
+    @classmethod
+    def from_route_results(cls, route_results):
+        """
+        Create the violation store from {route: {status: [message, ...]}} dictionary.
+        :param route_results: The route results dictionary.
+        :return: ViolationStore class instance.
+        """
+        store = cls()
+
+        for route, results in route_results.items():
+            for status in STATUS:
+                for message in results.get(status, list()):
+                    store.append(route, status, message)
+
+        return store
+
+    def append(self, route, status, template, args=None, check=None, from_m=None, to_m=None, lane=None):
+        """
+        Append a violation.
+        :param route: The violation route.
+        :param status: The message status ('error', 'ToBeReviewed' or 'VerifiedWithWarning').
+        :param template: The message template, or the message text if the args is None.
+        :param args: The message template args dictionary.
+        :param check: The check ID.
+        :param from_m: The violation segment from measure.
+        :param to_m: The violation segment to measure.
+        :param lane: The violation segment lane code.
+        :return:
+        """
+        code = self.status_code(status)
+
+        if route not in self._counts:
+            self._counts[route] = [0]*len(STATUS)
+            self._route_rows[route] = list()
+
+        counts = self._counts[route]
+        if (code == 0) and (counts[0] == 0):  # The route first error
+            self._failed.append(route)
+
+        counts[code] += 1
+        self._route_rows[route].append(len(self.route))
+
+        self.route.append(route)
+        self.status.append(code)
+        self.check.append(check)
+        self.from_m.append(from_m)
+        self.to_m.append(to_m)
+        self.lane.append(lane)
+        self.template.append(template)
+        self.args.append(args)
+
+        return self
+
+    def extend(self, store):
+        """
+        Append all violations from other violation store.
+        :param store: ViolationStore class instance.
+        :return:
+        """
+        for i in range(len(store)):
+            self.append(store.route[i], STATUS[store.status[i]], store.template[i], store.args[i], store.check[i],
+                        store.from_m[i], store.to_m[i], store.lane[i])
+
+        return self
+
+    def message(self, pos):
+        """
+        Render the violation message.
+        :param pos: The violation position.
+        :return: The message text.
+        """
+        args = self.args[pos]
+
+        if args is None:
+            return self.template[pos]
+        else:
+            return self.template[pos].format(**args)
+
+    def messages(self, status):
+        """
+        All of the message with the requested status, the messages are grouped by route in the route insertion order.
+        :param status: The message status.
+        :return: List of (route, message) tuple.
+        """
+        code = self.status_code(status)
+        messages = list()
+
+        for route, rows in self._route_rows.items():
+            if self._counts[route][code] == 0:
+                continue
+
+            messages += [(route, self.message(i)) for i in rows if self.status[i] == code]
+
+        return messages
+
+    def records(self, route):
+        """
+        All of the violation of a route with the rendered message text.
+        :param route: The requested route.
+        :return: List of (status, message, check, from_m, to_m, lane) tuple in the insertion order.
+        """
+        return [(STATUS[self.status[i]], self.message(i), self.check[i], self.from_m[i], self.to_m[i], self.lane[i])
+                for i in self._route_rows.get(route, list())]
+
+    def routes(self):
+        """
+        All of the route with any violation, in the route insertion order.
+        """
+        return list(self._route_rows.keys())
+
+    def count(self, route, status):
+        """
+        The number of violation with the requested status of a route.
+        """
+        counts = self._counts.get(route)
+
+        if counts is None:
+            return 0
+        else:
+            return counts[self.status_code(status)]
+
+    def route_status(self, route):
+        """
+        The most severe status of a route, 'error', 'ToBeReviewed' or 'VerifiedWithWarning'.
+        :param route: The requested route.
+        :return: The route status or None if the route does not have any violation.
+        """
+        counts = self._counts.get(route)
+
+        if counts is None:
+            return None
+
+        for code, count in enumerate(counts):
+            if count != 0:
+                return STATUS[code]
+
+    @property
+    def failed_routes(self):
+        """
+        All of the route with error violation.
+        """
+        return list(self._failed)
+
+    def route_results(self):
+        """
+        Create the {route: {status: [message, ...]}} dictionary from the violation store.
+        """
+        route_results = dict()
+
+        for route, rows in self._route_rows.items():
+            route_results[route] = {status: list() for status in STATUS}
+
+            for i in rows:
+                route_results[route][STATUS[self.status[i]]].append(self.message(i))
+
+        return route_results
@@ -3,56 +3,137 @@ from zipfile import BadZipfile
 from arcpy import SetParameterAsText
 from SMD_Package.OutputMessage import output_message
 from numpy import nan, unique, all
+import datetime
+import os
 import sys
 
 
 def read_input_excel(event_table_path, parameter_index=2):
     """
-    This function will read the submitted excel file by the SMD user, the file format has to be '.xls' or '.xlsx', if
-    any other file format is submitted then this function will return None.
+    This function will read the submitted excel file by the SMD user, the file format has to be '.xls', '.xlsx' or
+    '.csv', if any other file format is submitted then this function will return None.
+
+    The '.xlsx' file is streamed row by row (openpyxl read only mode) and the header is validated from the first row
+    before the rest of the workbook is read, the '.xls' and '.csv' file is read with a single pandas call.
     :param event_table_path: The excel file path.
     :param parameter_index: Parameter index for arcpy output message.
     :return: Pandas DataFrame or NoneType.
     """
-    file_format = str(event_table_path)[-4:]
-    if file_format in ['xls', 'xlsx']:
+    file_format = os.path.splitext(str(event_table_path))[1].lower()
+    if file_format in ['.xls', '.xlsx', '.csv']:
 
         try:
-            df_self_dtype = pd.read_excel(event_table_path)
-            s_converter = {col: str for col in list(df_self_dtype)}  # Create a string converters for read_excel
-            all_str_cols = all([(type(x) == str) | (type(x) == unicode) for x in s_converter.keys()])
-
-            if not all_str_cols:  # Check if all the column is a string/unicode.
-                SetParameterAsText(parameter_index, output_message("Failed", "Terdapat kolom yang bukan text"))
-                sys.exit(0)
-
-            col_ar = [x.split('.')[0] for x in s_converter.keys()]
-            unique_col_ar = unique(col_ar)
-            contain_dup = len(unique_col_ar) != len(col_ar)
-            del df_self_dtype
+            if file_format == '.xlsx':
+                df_string = _stream_xlsx(event_table_path, parameter_index)
+            elif file_format == '.csv':
+                header = list(pd.read_csv(event_table_path, nrows=0))  # Only read the header row
+                _validate_header(header, parameter_index)
+                df_string = pd.read_csv(event_table_path, dtype=str, keep_default_na=False)
+            else:
+                df_string = _read_excel(event_table_path, parameter_index)
         except IOError:  # Handle error if the file path is invalid
             SetParameterAsText(parameter_index, output_message("Failed", "File tidak ditemukan."))
             sys.exit(0)
         except BadZipfile:  # Handle corrupt file.
             SetParameterAsText(parameter_index, output_message("Failed", "File tidak dapat dibaca."))
             sys.exit(0)
-
-        if contain_dup:
-            SetParameterAsText(parameter_index, output_message("Failed", "File excel memiliki duplikasi nama kolom."))
-            sys.exit(0)
-
-        try:
-            df_string = pd.read_excel(event_table_path, converters=s_converter, keep_default_na=False)  # Convert all column to 'str' type.
-            df_string.replace("", nan, inplace=True)
         except UnicodeEncodeError:  # Handle if there is a non ascii character.
             SetParameterAsText(parameter_index, output_message("Failed", "Terdapat karakter yang tidak bisa diconvert."))
             sys.exit(0)
-        except TypeError:
-            SetParameterAsText(parameter_index, output_message("Failed", "File excel memiliki kolom tanpa header."))
-            sys.exit(0)
 
+        df_string.replace("", nan, inplace=True)
         df_string.columns = df_string.columns.str.upper()  # Uppercase all the column name
         return df_string  # df_string is DataFrame which contain all data in string format
     else:
-        SetParameterAsText(2, output_message("Failed", "Jenis file harus dalam .xlsx atau .xls"))
+        SetParameterAsText(2, output_message("Failed", "Jenis file harus dalam .xlsx, .xls atau .csv"))
         sys.exit(0)
+
+
+def _validate_header(header, parameter_index):
+    """
+    Check the input table header, the header has to be a text and does not contain any duplicate column name.
+    :param header: List of column name.
+    :param parameter_index: Parameter index for arcpy output message.
+    :return:
+    """
+    if None in header:  # The column does not have any header
+        SetParameterAsText(parameter_index, output_message("Failed", "File excel memiliki kolom tanpa header."))
+        sys.exit(0)
+
+    all_str_cols = all([(type(x) == str) | (type(x) == unicode) for x in header])
+
+    if not all_str_cols:  # Check if all the column is a string/unicode.
+        SetParameterAsText(parameter_index, output_message("Failed", "Terdapat kolom yang bukan text"))
+        sys.exit(0)
+
+    col_ar = [x.split('.')[0] for x in header]
+    unique_col_ar = unique(col_ar)
+    contain_dup = len(unique_col_ar) != len(col_ar)
+
+    if contain_dup:
+        SetParameterAsText(parameter_index, output_message("Failed", "File excel memiliki duplikasi nama kolom."))
+        sys.exit(0)
+
+    return
+
+
+def _read_excel(event_table_path, parameter_index):
+    """
+    Read the excel file with a single pandas read_excel call, all column will be read as a string.
+    """
+    df_string = pd.read_excel(event_table_path, dtype=str, keep_default_na=False)
+    _validate_header(list(df_string), parameter_index)
+
+    return df_string
+
+
+def _stream_xlsx(event_table_path, parameter_index):
+    """
+    Read the '.xlsx' file row by row using openpyxl read only mode, the header is validated from the first row before
+    the rest of the rows is read. If openpyxl is not available then the file will be read using pandas.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        return _read_excel(event_table_path, parameter_index)
+
+    workbook = load_workbook(event_table_path, read_only=True, data_only=True)
+
+    try:
+        sheet_rows = workbook.worksheets[0].iter_rows(values_only=True)  # Only the first sheet is read
+        header = list(next(sheet_rows, ()))
+
+        while len(header) != 0 and header[-1] is None:  # Remove the empty cell at the end of the header row
+            header.pop()
+
+        _validate_header(header, parameter_index)
+        col_count = len(header)
+        columns = [list() for _ in header]
+
+        for row in sheet_rows:
+            values = [_cell_string(x) for x in row[:col_count]]
+
+            if all([x == "" for x in values]):  # Skip the blank row
+                continue
+
+            values += [""]*(col_count-len(values))
+            for col_values, value in zip(columns, values):
+                col_values.append(value)
+    finally:
+        workbook.close()
+
+    return pd.DataFrame(dict(zip(header, columns)), columns=header)
+
+
+def _cell_string(value):
+    """
+    Convert the excel cell value to string, similar to the pandas read_excel string converter.
+    """
+    if value is None:
+        return ""
+    elif isinstance(value, float) and value.is_integer():  # Float with integer value is converted to integer
+        return str(int(value))
+    elif isinstance(value, datetime.datetime):
+        return str(pd.Timestamp(value))
+    else:
+        return str(value)
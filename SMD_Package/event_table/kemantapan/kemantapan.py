@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
 import json
+from collections import OrderedDict
 from SMD_Package.FCtoDataFrame import event_fc_to_df
 from SMD_Package.load_config import SMDConfigs
+from SMD_Package.event_table.reference_length import sk_length
+from SMD_Package.storage import sql_database
 from arcpy import env
-import cx_Oracle
 import os
 
 
@@ -47,10 +49,8 @@ class Kemantapan(object):
         rni_lane_code = SMDConfigs().table_fields['rni']['lane_code']
         surftype_col = SMDConfigs().table_fields['rni']['surface_type']
 
-        lrs_table = SMDConfigs().table_names['lrs_network']
         lrs_routeid = SMDConfigs().table_fields['lrs_network']['route_id']
         self.sklen_col = SMDConfigs().table_fields['lrs_network']['sk_length']
-        lrs_cols = [lrs_routeid, self.sklen_col]
 
         self.rni_table = rni_table
         self.rni_route_col = rni_route_col
@@ -72,9 +72,8 @@ class Kemantapan(object):
         df_rni[self.rni_from_col] = pd.Series(df_rni[self.rni_from_col]*rni_mfactor).round(1).astype(int)  # Convert the RNI measurement
         df_rni[self.rni_to_col] = pd.Series(df_rni[self.rni_to_col]*rni_mfactor).round(1).astype(int)
 
-        # Get the LRS SK Length data.
-        self.sklen_df = event_fc_to_df(lrs_table, lrs_cols, input_routes, lrs_routeid, env.workspace, True).\
-            set_index(lrs_routeid)
+        # Get the LRS SK Length data from the reference length table.
+        self.sklen_df = sk_length(input_routes, lrs_routeid, self.sklen_col).set_index(lrs_routeid)
 
         self.df_rni = df_rni
         self.group_details = self.group_details()
@@ -633,6 +632,8 @@ class KemantapanSQL(Kemantapan):
     """
     Class used for calculating Kemantapan using SQL query.
     """
+    methods = ['mean', 'max', 'lane_based']  # The methods calculated by the 'all' method.
+    method_column = 'KEMANTAPAN_METHOD'
     def __init__(self, data_type, table_name, method='mean', to_km_factor=1, **kwargs):
         """
         Initialization.
@@ -679,7 +680,7 @@ class KemantapanSQL(Kemantapan):
         elif str(method) == 'max':
             self.method = 'MAX'
         else:
-            self.method = str(method)  # Supported method is 'mean', 'max', 'lane_based'
+            self.method = str(method)  # Supported method is 'mean', 'max', 'lane_based' and 'all'
 
         # RNI table attribute.
         self.rni_table = rni_table
@@ -706,33 +707,29 @@ class KemantapanSQL(Kemantapan):
     @staticmethod
     def execute_sql(query, params=None):
         """
-        Execute SQL script from a string.
+        Execute SQL script from a string, the connection is borrowed from the SQL database session pool.
         :param query: SQL string.
         :param params: SQL parameter.
         :return: Pandas DataFrame.
         """
-        dsn_tns = cx_Oracle.makedsn('10.10.1.97', '1521', service_name='geodbbm')
-        connection = cx_Oracle.connect('SMD', 'SMD123M', dsn_tns)
-        df_ora = pd.read_sql(query, con=connection, params=params)
-
-        return df_ora
+        return sql_database().read_sql(query, params=params)
 
     @staticmethod
-    def routes_to_str(routes):
+    def routes_to_list(routes):
         """
-        Convert route list to a string for SQL script.
+        Convert route request to a list of route string for the SQL route bind parameter.
         :param routes: Routes as string, list or unicode.
-        :return: String.
+        :return: List.
         """
         # Check the input routes
         if (type(routes) == str) or (type(routes) == unicode):
             routes = [str(routes)]
         elif type(routes) == list:
-            pass
+            routes = [str(x) for x in routes]
         else:
             raise(Exception('Input routes is neither a str or list'))  # Raise an exception.
 
-        return str(routes).strip('[').strip(']')
+        return routes
 
     def df_sql(self, routes):
         """
@@ -740,32 +737,102 @@ class KemantapanSQL(Kemantapan):
         :param routes: Routes request.
         :return: Pandas DataFrame.
         """
-        table_join = self.sql_rni_table_join(routes)  # 1st
+        table_join = self.sql_rni_table_join()  # 1st
         groupby_cases = self.sql_groupby_cases()  # 2nd
         final_select = self._sql_other_columns()   # 3rd
         basic_grading_query = groupby_cases + ' FROM (' + table_join + ') merged GROUP BY merged.LINKID'
 
         final_query = final_select + ' FROM (' + basic_grading_query + ') graded'
 
-        df = self.execute_sql(final_query, params={'to_km_factor': self.to_km_factor})
+        # The routes is passed as bind parameter, so the query text is the same for every route chunk.
+        df = self.execute_sql(final_query, params={'to_km_factor': self.to_km_factor,
+                                                   'routes': self.routes_to_list(routes)})
+        return df
+
+    def df_sql_all(self, routes):
+        """
+        Execute Kemantapan SQL script for all methods in a single query. The input table and the RNI table are joined
+        once (table_join_all.sql) and every method is graded from the joined rows.
+        :param routes: Routes request.
+        :return: Pandas DataFrame with the KEMANTAPAN_METHOD column.
+        """
+        table_join = self.sql_rni_table_join()
+        groupby_cases = self.sql_groupby_cases()
+        final_select = self._sql_other_columns()
+        method_queries = list()
+
+        for method in self.methods:
+            basic_grading_query = groupby_cases + ' FROM merged_' + method + ' merged GROUP BY merged.LINKID'
+            method_queries.append("SELECT '{0}' AS {1}, method_graded.* FROM ({2} FROM ({3}) graded) method_graded".
+                                  format(method, self.method_column, final_select, basic_grading_query))
+
+        final_query = table_join + '\n' + ' UNION ALL '.join(method_queries)
+        df = self.execute_sql(final_query, params={'to_km_factor': self.to_km_factor,
+                                                   'routes': self.routes_to_list(routes)})
         return df
 
-    def summary(self, routes, project_to_sk=False):
+    def summary(self, routes, project_to_sk=False, in_memory=False):
         """
         Create summary table from Kemantapan DataFrame, complete with percentage column.
         :param routes: Rotues request.
         :param project_to_sk: If True then all the length column will be projected to SK length.
+        :param in_memory: If True then the Kemantapan is calculated in-memory (df_memory) instead of in the database.
         :return: Pandas DataFrame.
         """
-        df = self.df_sql(routes)
+        if in_memory:
+            df = self.df_memory(*self.read_tables(routes))
+        else:
+            df = self.df_sql(routes)
 
+        return self._summary(df, routes, project_to_sk, self.method)
+
+    def summary_all(self, routes, in_memory=False):
+        """
+        Create the summary table of every method, with and without SK length projection, from a single query.
+        :param routes: Routes request.
+        :param in_memory: If True then the tables are read once and every method is calculated in-memory.
+        :return: Dictionary of {(method, project_to_sk): Pandas DataFrame}.
+        """
+        if in_memory:
+            df_event, df_rni = self.read_tables(routes)
+        else:
+            df = self.df_sql_all(routes)
+
+        sklen_df = sk_length(routes, self.lrs_routeid, self.sklen_col)
+        summaries = dict()
+
+        for method in self.methods:
+            if in_memory:
+                df_method = self.df_memory(df_event, df_rni, method)
+            else:
+                df_method = df.loc[df[self.method_column] == method].drop(self.method_column, axis=1)
+                df_method = df_method.reset_index(drop=True)
+
+            for project_to_sk in [False, True]:
+                summaries[(method, project_to_sk)] = self._summary(df_method.copy(), routes, project_to_sk, method,
+                                                                   sklen_df=sklen_df)
+
+        return summaries
+
+    def _summary(self, df, routes, project_to_sk, method, sklen_df=None):
+        """
+        Add the percentage column and project the length column to the SK length.
+        :param df: The Kemantapan DataFrame from the SQL query.
+        :param routes: Routes request.
+        :param project_to_sk: If True then all the length column will be projected to SK length.
+        :param method: The Kemantapan method, the lane based Kemantapan is not projected.
+        :param sklen_df: The SK length DataFrame, if None then the SK length will be read from the reference table.
+        :return: Pandas DataFrame.
+        """
         columns_ar = df.columns.to_series()
         km_columns = columns_ar.loc[columns_ar.apply(lambda _: '_KM' in str(_))].tolist()
         psn_columns = [str(_).replace('KM', 'PSN') for _ in km_columns]  # Add percentage column (replace KM with PSN).
         df[psn_columns] = df[km_columns].apply(lambda _: _/df[self.total_len_col]*100)
 
-        if project_to_sk and (self.method != 'lane_based'):
-            sklen_df = event_fc_to_df(self.lrs_table, self.lrs_cols, routes, self.lrs_routeid, env.workspace, True)
+        if project_to_sk and (method != 'lane_based'):
+            if sklen_df is None:
+                sklen_df = sk_length(routes, self.lrs_routeid, self.sklen_col)
+
             df = pd.merge(df, sklen_df, left_on=self.route_col, right_on=self.lrs_routeid)
             df[km_columns] = df[km_columns].apply(lambda _: _ * (df[self.sklen_col] / df[self.total_len_col]))
             df[self.total_len_col] = df[self.sklen_col]
@@ -773,24 +840,20 @@ class KemantapanSQL(Kemantapan):
 
         return df
 
-    def sql_rni_table_join(self, routes):
+    def sql_rni_table_join(self):
         """
-        SQL table join script
-        :param routes: Routes request.
+        SQL table join script, the routes is selected with the :routes array bind parameter.
         :return: String.
         """
-        routes = self.routes_to_str(routes)
-
         if self.method == 'lane_based':
             sql = open('SMD_Package/event_table/kemantapan/table_join_lkm.sql')  # Open the SQL file.
+        elif self.method == 'all':
+            sql = open('SMD_Package/event_table/kemantapan/table_join_all.sql')  # WITH clause for all methods.
         else:
             sql = open('SMD_Package/event_table/kemantapan/table_join.sql')
 
         sql_str = sql.read()  # Read the SQL file as string object.
 
-        # Replace the '01001' (built-in within the SQL) with request routes.
-        sql_str = sql_str.replace("'01001'", routes)
-
         # The original column and table from the SQL script.
         # Can be replaced by class attribute.
         sql_columns = {
@@ -807,31 +870,27 @@ class KemantapanSQL(Kemantapan):
             'method': 'AVG'  # Only change for "mean" and "max" method.
         }
 
+        if self.method == 'all':
+            sql_columns.pop('method')  # The SQL file already contains the aggregate of every method.
+
         # Update the SQL string with class attribute
         for key, item in sql_columns.items():
             new_item = self.__dict__[key]
             sql_str = sql_str.replace(item, new_item)
 
+        # Replace the '01001' (built-in within the SQL) with the routes array bind parameter.
+        sql_str = sql_str.replace("'01001'", sql_database().array_select('routes'))
+
         return sql_str
 
-    def sql_groupby_cases(self):
+    def grade_ranges(self):
         """
-        SQL group by cases and columns.
-        :return: String.
+        The sorted grading range of every surface type group, grouped by the surface category ('p' or 'up'). The range
+        is used by both the SQL grading and the in-memory grading. The IRI range is sorted ascending and the PCI range
+        is sorted descending (a larger PCI is better), a value is graded to the i-th grade if it is worse than the
+        (i-1)-th range value and not worse than the i-th range value.
+        :return: List of (category, [(surface types, sorted grade range), ...]).
         """
-        sql_select = 'SELECT merged.{route_col}, ' \
-                     'SUM(merged.{segment_len_col}) as {total_len_col}, ' \
-                     'AVG(merged.{grading_col}) AS {grading_col}'.format(**self.__dict__)
-
-        upper_end_case = 'WHEN merged.{surftype_col} IN ({types}) and merged.{grading_col} > {value} THEN ' \
-                         'merged.{segment_len_col} '
-
-        lower_end_case = 'WHEN merged.{surftype_col} IN ({types}) and merged.{grading_col} <= {value} THEN ' \
-                         'merged.{segment_len_col} '
-
-        middle_case = 'WHEN merged.{surftype_col} IN ({types}) and merged.{grading_col} > {lower_bound} and  ' \
-                      'merged.{grading_col} <= {upper_bound} THEN merged.{segment_len_col} '
-
         surftype_df = pd.DataFrame.from_dict(self.group_details()).T.reset_index()
 
         if self.type == 'IRI':
@@ -839,29 +898,67 @@ class KemantapanSQL(Kemantapan):
         else:
             range_column = 'pci_range'
 
-        sum_cases = list()
-
         # Group based on the category 'P' or 'UP'
         category_group = surftype_df.groupby('category').agg({
             range_column: lambda x: list(x),
             'group': lambda x: list(x)
         }).reset_index()
 
+        grade_ranges = list()
+
         for index, row in category_group.iterrows():
-            category = row['category']  # 'P' or 'UP'
-            groups = row['group']  # The surface type classification group.
-            grade_ranges = row[range_column]
+            group_ranges = list()
 
-            category_cases = {grade: '' for grade in self.grades}  # For storing SUM for each grade.
-
-            for group, grade_range in zip(groups, grade_ranges):
-                types = str(group).strip('[').strip(']')
-                grade_range.sort()  # Sort the grade_range values.
+            for group, grade_range in zip(row['group'], row[range_column]):
+                grade_range = sorted(grade_range, reverse=(self.type == 'PCI'))  # Sort from the GOOD grade range.
 
                 if len(grade_range)+1 != len(self.grades):  # Raise an error for grading level defined in config file.
                     raise(Exception("Surface type group {0} has less grading level than {1}".
                                     format(group, self.grades)))
 
+                group_ranges.append((group, grade_range))
+
+            grade_ranges.append((row['category'], group_ranges))
+
+        return grade_ranges
+
+    def grade_columns(self):
+        """
+        The basic grade columns e.g('P_GOOD_KM', 'UP_BAD_KM', etc).
+        :return: List of (column name, category, grade).
+        """
+        return [("{0}_{1}_KM".format(str(category).upper(), grade), category, grade)
+                for category, group_ranges in self.grade_ranges() for grade in self.grades]
+
+    def sql_groupby_cases(self):
+        """
+        SQL group by cases and columns.
+        :return: String.
+        """
+        sql_select = 'SELECT merged.{route_col}, ' \
+                     'SUM(merged.{segment_len_col}) as {total_len_col}, ' \
+                     'AVG(merged.{grading_col}) AS {grading_col}'.format(**self.__dict__)
+
+        if self.type == 'PCI':  # A larger PCI is better.
+            better, worse = '>=', '<'
+        else:
+            better, worse = '<=', '>'
+
+        upper_end_case = 'WHEN merged.{surftype_col} IN ({types}) and merged.{grading_col} ' + worse + ' {value} ' \
+                         'THEN merged.{segment_len_col} '
+
+        lower_end_case = 'WHEN merged.{surftype_col} IN ({types}) and merged.{grading_col} ' + better + ' {value} ' \
+                         'THEN merged.{segment_len_col} '
+
+        middle_case = 'WHEN merged.{surftype_col} IN ({types}) and merged.{grading_col} ' + worse + ' {lower_bound} ' \
+                      'and merged.{grading_col} ' + better + ' {upper_bound} THEN merged.{segment_len_col} '
+
+        for category, group_ranges in self.grade_ranges():
+            category_cases = {grade: '' for grade in self.grades}  # For storing SUM for each grade.
+
+            for group, grade_range in group_ranges:
+                types = str(group).strip('[').strip(']')
+
                 for i, grade in enumerate(self.grades, start=0):
                     if i == 0:  # GOOD grade.
                         value = grade_range[i]
@@ -880,30 +977,31 @@ class KemantapanSQL(Kemantapan):
                         statement = upper_end_case.format(types=types, value=value, **self.__dict__)
                         category_cases[grade] += statement
 
-            for grade, statement in category_cases.items():
+            for grade in self.grades:
                 column_name = "{0}_{1}_KM".format(str(category).upper(), grade)
-                sum_statement = 'SUM(CASE ' + statement + 'ELSE 0 END) AS ' + column_name
-                sum_cases.append(sum_statement)
+                sum_statement = 'SUM(CASE ' + category_cases[grade] + 'ELSE 0 END) AS ' + column_name
                 self.columns.append(column_name)  # Append the column name to class attribute.
 
                 sql_select += ', ' + sum_statement
 
         return sql_select
 
-    def _sql_other_columns(self):
+    def _other_columns(self, columns=None):
         """
-        Additional columns.
-        :return: String.
+        Additional columns, the sum of the basic grade columns for every grade and kemantapan status.
+        :param columns: The basic grade columns, if None then the class columns attribute will be used.
+        :return: OrderedDict of {column: [basic grade column, ...]}.
         """
-        columns_sr = pd.Series(pd.Series(self.columns).unique())
+        if columns is None:
+            columns = self.columns
+
+        columns_sr = pd.Series(pd.Series(columns).unique())
         columns_prefix = columns_sr.apply(lambda x: str(x).split('_')[0]).unique()
-        select_statement = "SELECT graded.*"
+        other_columns = OrderedDict()
         mantap_col_filter = None
 
         for grade in self.grades:  # Iterate over all the grade.
-            grade_column_sql = str()  # String for storing the column operation.
             column_filter = columns_sr.apply(lambda x: grade in str(x))
-            grade_columns = columns_sr.loc[column_filter]
 
             if grade in self.mantap_grade:
                 if mantap_col_filter is None:
@@ -911,22 +1009,15 @@ class KemantapanSQL(Kemantapan):
                 else:
                     mantap_col_filter = mantap_col_filter | column_filter.values
 
-            for index, column in grade_columns.iteritems():
-                if len(grade_column_sql) == 0:
-                    grade_column_sql = '(' + str(column)
-                else:
-                    grade_column_sql += ' + ' + str(column)
-
-            grade_column_sql += ') AS ' + grade + '_KM'
-            select_statement += ', ' + grade_column_sql  # Append to the SELECT statement.
+            other_columns[grade + '_KM'] = columns_sr.loc[column_filter].tolist()
 
         mantap_columns = columns_sr.loc[mantap_col_filter]  # The MANTAP columns.
         tdk_mantap_columns = columns_sr.loc[~mantap_col_filter]  # The TIDAK_MANTAP columns.
 
-        kemantapan_columns = {
-            "MANTAP_KM": mantap_columns,
-            "TDK_MANTAP_KM": tdk_mantap_columns
-        }
+        kemantapan_columns = OrderedDict([
+            ("MANTAP_KM", mantap_columns),
+            ("TDK_MANTAP_KM", tdk_mantap_columns)
+        ])
 
         for prefix in columns_prefix:
             for kemantapan in ["MANTAP_KM", "TDK_MANTAP_KM"]:
@@ -934,15 +1025,139 @@ class KemantapanSQL(Kemantapan):
                 kemantapan_columns[prefix+'_'+kemantapan] = columns[columns.str.startswith(prefix)]
 
         for mantap_column, columns in kemantapan_columns.items():
-            mantap_sql_column = str()
+            other_columns[mantap_column] = columns.tolist()
 
-            for i, column in columns.iteritems():
-                if len(mantap_sql_column) == 0:
-                    mantap_sql_column = '(' + str(column)
-                else:
-                    mantap_sql_column += ' + ' + str(column)
+        return other_columns
 
-            mantap_sql_column += ') AS ' + mantap_column
-            select_statement += ', ' + mantap_sql_column  # Append to the SELECT statement.
+    def _sql_other_columns(self):
+        """
+        Additional columns.
+        :return: String.
+        """
+        select_statement = "SELECT graded.*"
+
+        for column, columns in self._other_columns().items():
+            select_statement += ', (' + ' + '.join([str(x) for x in columns]) + ') AS ' + column
 
         return select_statement
+
+    def read_tables(self, routes):
+        """
+        Read the input table and the RNI table rows of the requested routes for the in-memory calculation, the table is
+        read with event_fc_to_df so the configured storage backend (such as a local SQLite snapshot) is used.
+        :param routes: Routes request.
+        :return: (input DataFrame, RNI DataFrame).
+        """
+        routes = self.routes_to_list(routes)
+        df_event = event_fc_to_df(self.table_name, [self.route_col, self.from_m_col, self.to_m_col, self.lane_code,
+                                                    self.grading_col, self.segment_len_col], routes, self.route_col,
+                                  env.workspace, True)
+        df_rni = event_fc_to_df(self.rni_table, [self.rni_route_col, self.rni_from_col, self.rni_to_col,
+                                                 self.rni_lane_code, self.surftype_col], routes, self.rni_route_col,
+                                env.workspace, True)
+
+        return df_event, df_rni
+
+    @staticmethod
+    def surface_mode(df, keys, surftype_col):
+        """
+        The most frequent surface type of every segment group (equivalent to the STATS_MODE aggregate). The surface
+        type is integer coded and counted for all groups at once, the smallest surface type is selected for a tie.
+        :param df: The RNI DataFrame.
+        :param keys: The segment group columns.
+        :param surftype_col: The surface type column.
+        :return: DataFrame with the group columns and the surface type column.
+        """
+        grouped = df.groupby(keys, sort=False)
+        group_id = grouped.ngroup().values
+        group_count = grouped.ngroups
+        codes, surfaces = pd.factorize(df[surftype_col], sort=True)
+        valid = codes != -1  # Null surface type is not counted
+
+        counts = np.bincount(group_id[valid]*len(surfaces) + codes[valid], minlength=group_count*len(surfaces))
+        counts = counts.reshape(group_count, len(surfaces))
+
+        result = grouped.size().reset_index()[keys]  # The group keys in the group id order
+
+        if len(surfaces) == 0:  # No surface type at all
+            result[surftype_col] = np.nan
+        else:
+            mode = pd.Series(surfaces.take(counts.argmax(axis=1)))
+            result[surftype_col] = mode.where(counts.max(axis=1) > 0).values
+
+        return result
+
+    def df_memory(self, df_event, df_rni, method=None):
+        """
+        In-memory Kemantapan calculation, the result is equal to df_sql result for the same input.
+        :param df_event: The input table DataFrame from read_tables.
+        :param df_rni: The RNI table DataFrame from read_tables.
+        :param method: 'mean', 'max' or 'lane_based', if None then the class method will be used.
+        :return: Pandas DataFrame.
+        """
+        if method is None:
+            method = self.method
+
+        agg_method = {'AVG': 'mean', 'MAX': 'max'}.get(method, method)
+        segment_key = [self.route_col, self.from_m_col, self.to_m_col]
+        rni_key = ['_rni_route', '_rni_from', '_rni_to']
+        join_from = '_join_from'  # The input From Measure in the RNI measurement unit
+
+        df_rni = df_rni.rename(columns={self.rni_route_col: '_rni_route', self.rni_from_col: '_rni_from',
+                                        self.rni_to_col: '_rni_to', self.rni_lane_code: '_rni_lane'})
+
+        if agg_method == 'lane_based':
+            merged = df_event[segment_key + [self.lane_code, self.grading_col, self.segment_len_col]]
+            left_on = [self.route_col, join_from, self.lane_code]
+            right = df_rni[rni_key + ['_rni_lane', self.surftype_col]]
+            right_on = ['_rni_route', '_rni_from', '_rni_lane']
+        elif agg_method in ['mean', 'max']:
+            merged = df_event.groupby(segment_key).agg({self.grading_col: agg_method,
+                                                        self.segment_len_col: 'max'}).reset_index()
+            left_on = [self.route_col, join_from]
+            right = self.surface_mode(df_rni, rni_key, self.surftype_col)
+            right_on = ['_rni_route', '_rni_from']
+        else:
+            raise ValueError("'{0}' is not a valid method.".format(method))
+
+        # The FROM_STA*100/:to_km_factor = RNI FROM_STA join, rounded because the database compares exact decimal.
+        merged = merged.assign(**{join_from: (merged[self.from_m_col].astype(float)*100/self.to_km_factor).round(6)})
+        right = right.assign(_rni_from=right['_rni_from'].astype(float).round(6))
+        merged = pd.merge(merged, right[right_on + [self.surftype_col]], how='left', left_on=left_on,
+                          right_on=right_on)
+
+        # Grade every row with the surface group grading range.
+        values = merged[self.grading_col].values.astype(float)
+        surface = merged[self.surftype_col].values
+        grade = np.full(len(merged), -1)  # The index of the basic grade column
+        grade_columns = self.grade_columns()
+        direction = -1.0 if self.type == 'PCI' else 1.0  # The PCI range is descending
+
+        for category_index, (category, group_ranges) in enumerate(self.grade_ranges()):
+            for group, grade_range in group_ranges:
+                mask = np.isin(surface, group) & ~np.isnan(values)
+                grade_index = np.searchsorted(np.asarray(grade_range, dtype=float)*direction, values[mask]*direction,
+                                              side='left')
+                grade[mask] = category_index*len(self.grades) + grade_index
+
+        route_grouped = merged.groupby(self.route_col, sort=False)
+        df = pd.DataFrame({
+            self.route_col: route_grouped.size().index,
+            self.total_len_col: route_grouped[self.segment_len_col].sum(min_count=1).values,
+            self.grading_col: route_grouped[self.grading_col].mean().values
+        }, columns=[self.route_col, self.total_len_col, self.grading_col])
+
+        # Sum the segment length of every (route, grade column) pair at once.
+        route_id = route_grouped.ngroup().values
+        graded = grade != -1
+        lengths = np.nan_to_num(merged[self.segment_len_col].values.astype(float)[graded])
+        grade_len = np.bincount(route_id[graded]*len(grade_columns) + grade[graded], weights=lengths,
+                                minlength=len(df)*len(grade_columns)).reshape(len(df), len(grade_columns))
+
+        for i, (column, category, grade_name) in enumerate(grade_columns):
+            df[column] = grade_len[:, i]
+
+        for column, columns in self._other_columns([x[0] for x in grade_columns]).items():
+            df[column] = df[columns].sum(axis=1)
+
+        return df
@@ -1,5 +1,6 @@
 from SMD_Package import SMDConfigs, GetRoutes, event_fc_to_df, Kemantapan, gdb_table_writer, input_json_check, \
     KemantapanSQL
+from SMD_Package.TableWriter.GDBTableWriter import route_change_log
 from SMD_Package.event_table.traffic.aadt import TrafficSummary
 from SMD_Package.event_table.deflection.deflection import Deflection
 from arcpy import env, ListFields, Exists
@@ -85,6 +86,7 @@ class KemantapanService(object):
         self.segment_len_col = 'SEGMENT_LENGTH'
         self.force_update = False
         self.project_to_sk = False
+        self.in_memory = False  # If True then the Kemantapan is calculated in-memory, without the SQL database.
         self.chunk_size = 400  # Processing chunks.
 
         # For AADT only
@@ -113,7 +115,7 @@ class KemantapanService(object):
             request_j = input_json_check(input_json, 1, True, ['routes', 'year',
                                                                'data_type', 'method'])
 
-            self.method = str(request_j['method'])  # 'mean', 'max', 'lane_based'
+            self.method = str(request_j['method'])  # 'mean', 'max', 'lane_based' or 'all'
 
             # Initiate the KemantapanSQL class from here.
             self.kemantapan = KemantapanSQL(data_type=self.data_type, table_name=self.table_name, method=self.method,
@@ -124,10 +126,14 @@ class KemantapanService(object):
             else:
                 self.lane_based = False
 
-            if self.lane_based:
-                self.output_table = 'SMD.KEMANTAPAN_LKM_{0}'.format(self.grading_col)
+            if self.method == 'all':  # All methods with and without SK projection are calculated in one pass.
+                self.lane_based = None
+                self.output_tables = {(method, project_to_sk): self.kemantapan_table(method, self.grading_col,
+                                                                                     project_to_sk)
+                                      for method in KemantapanSQL.methods for project_to_sk in [False, True]}
+                self.output_table = self.output_tables[('mean', False)]
             else:
-                self.output_table = 'SMD.KEMANTAPAN_{0}_{1}'.format(str.upper(self.method), self.grading_col)
+                self.output_table = self.kemantapan_table(self.method, self.grading_col)
 
         else:  # Includes AADT, LWD, FWD and BB.
             self.lane_based = None
@@ -153,11 +159,12 @@ class KemantapanService(object):
         if self.project_to_sk:
             self.suffix = 'SK'
 
-        if self.suffix is not None:
+        if (self.suffix is not None) and (self.method != 'all'):
             self.output_table = self.output_table + '_' + self.suffix
 
         self.summary_result = pd.DataFrame()  # For storing all summary result
-        self.route_date = self.create_route_date(self.date_col)
+        self.summary_results = dict()  # For storing all summary result of every output table in the 'all' method
+        self.route_date = None  # The source route update date, for the satker and balai date query.
         self.failed_route = list()  # For storing route which cannot be calculated.
         self.route_status = pd.DataFrame(columns=[self.routeid_col, 'time', 'status'])  # For storing all status for each requested routes.
 
@@ -208,11 +215,14 @@ class KemantapanService(object):
         self.success_route = self._success_route()
 
         if len(self.success_route) > 0:
-            self.add_year_semester_col()
-            self.add_satker_ppk_id()
-            self.add_prov_id()
-            self.add_balai_id()
-            self.write_summary_to_gdb()
+            for output_table, summary_result in self.output_results():
+                self.output_table = output_table
+                self.summary_result = summary_result
+                self.add_year_semester_col()
+                self.add_satker_ppk_id()
+                self.add_prov_id()
+                self.add_balai_id()
+                self.write_summary_to_gdb()
 
         self.status_json = self.route_status.set_index(self.routeid_col).to_dict(orient='index')
 
@@ -238,11 +248,47 @@ class KemantapanService(object):
         return self
 
     def calculate_kemantapan_sql(self, route):
-        summary = self.kemantapan.summary(route, project_to_sk=self.project_to_sk)
+        if self.method == 'all':
+            for key, summary in self.kemantapan.summary_all(route, in_memory=self.in_memory).items():
+                self.summary_results[key] = self.summary_results.get(key, pd.DataFrame()).append(summary)
+
+            return self
+
+        summary = self.kemantapan.summary(route, project_to_sk=self.project_to_sk,
+                                          in_memory=self.in_memory)
         self.summary_result = self.summary_result.append(summary)
 
         return self
 
+    @staticmethod
+    def kemantapan_table(method, grading_col, project_to_sk=False):
+        """
+        The Kemantapan output table name.
+        :param method: 'mean', 'max' or 'lane_based'.
+        :param grading_col: The grading column.
+        :param project_to_sk: If True then the SK projected output table name is returned.
+        :return: String.
+        """
+        if method == 'lane_based':
+            output_table = 'SMD.KEMANTAPAN_LKM_{0}'.format(grading_col)
+        else:
+            output_table = 'SMD.KEMANTAPAN_{0}_{1}'.format(str.upper(method), grading_col)
+
+        if project_to_sk:
+            output_table = output_table + '_SK'
+
+        return output_table
+
+    def output_results(self):
+        """
+        List of (output table, summary result) to be written.
+        """
+        if self.method == 'all':
+            return [(self.output_tables[key], self.summary_results[key]) for key in sorted(self.output_tables)
+                    if key in self.summary_results]
+        else:
+            return [(self.output_table, self.summary_result)]
+
     def calculate_aadt(self, input_df, route):
         """
         Used for initiating AADT class and calculate the daily AADT.
@@ -414,15 +460,29 @@ class KemantapanService(object):
         else:
             raise ("Route selection is neither list or string.")
 
-        req_columns = [self.update_date_col, self.routeid_col]
-        source_date = self.create_route_date(self.update_date_col)
+        route_log = route_change_log()
+        source_date = self.logged_route_date(self.table_name, routes, route_log)
+        self._add_prov_id(source_date, self.routeid_col, self.prov_column)
+        self.route_date = source_date.rename(columns={self.update_date_col: self.date_col})
 
-        if (not self.force_update) and (Exists(self.output_table)):
-            output_date = event_fc_to_df(self.output_table, req_columns, routes, self.routeid_col, env.workspace, True)
-            merged = pd.merge(source_date, output_date, on=self.routeid_col, how='outer', suffixes=('_SOURCE', '_TARGET'))
-            selection = merged.loc[(merged['UPDATE_DATE_SOURCE'] > merged['UPDATE_DATE_TARGET']) |
-                                   (merged['UPDATE_DATE_TARGET'].isnull())]
-            routes = selection[self.routeid_col].tolist()
+        if self.method == 'all':
+            output_tables = [self.output_tables[key] for key in sorted(self.output_tables)]
+        else:
+            output_tables = [self.output_table]
+
+        if (not self.force_update) and all([Exists(x) for x in output_tables]):
+            selected = list()  # The route is selected if the route is outdated in any output table.
+
+            for output_table in output_tables:
+                output_date = self.logged_route_date(output_table, routes, route_log, year=self.year,
+                                                     semester=self.semester)
+                merged = pd.merge(source_date, output_date, on=self.routeid_col, how='outer',
+                                  suffixes=('_SOURCE', '_TARGET'))
+                selection = merged.loc[(merged['UPDATE_DATE_SOURCE'] > merged['UPDATE_DATE_TARGET']) |
+                                       (merged['UPDATE_DATE_TARGET'].isnull())]
+                selected += [x for x in selection[self.routeid_col].tolist() if x not in selected]
+
+            routes = selected
         else:
             routes = source_date[self.routeid_col].tolist()
 
@@ -440,25 +500,48 @@ class KemantapanService(object):
                       routes[x: len(routes)+1] for x in chunk_index]
             return chunks
 
-    def create_route_date(self, date_col):
-        if self.routes == 'ALL':
-            routes = self.routes
-        elif (type(self.routes) == unicode) or (type(self.routes) == str):
-            routes = [self.routes]
-        elif type(self.routes) == list:
-            routes = self.routes
-        elif self.routes is None:
-            raise ("No Route parameter in the input JSON.")
-        else:
-            raise ("Route selection is neither list or string.")
-
-        source_date = event_fc_to_df(self.table_name, [date_col, self.routeid_col], routes,
-                                     self.routeid_col, env.workspace, True,
-                                     sql_prefix='MAX ({0})'.format(self.update_date_col),
-                                     sql_postfix='GROUP BY ({0})'.format(self.routeid_col))
-
-        self._add_prov_id(source_date, self.routeid_col, self.prov_column)
-        return source_date
+    def logged_route_date(self, table_name, routes, route_log, year=None, semester=None):
+        """
+        The last update date of every route in the table, looked up from the route change log. If the table is not
+        fully tracked by the change log then the route which is missing from the log is read from the table (MAX of
+        the update date column grouped by the route, year and semester) and added to the log, so the table is only
+        scanned once.
+        :param table_name: The table name.
+        :param routes: 'ALL' or list of route.
+        :param route_log: RouteChangeLog object.
+        :param year: If not None then only the rows of the year is used, the table must have the year column.
+        :param semester: If not None then only the rows of the semester is used, the table must have the semester
+        column.
+        :return: DataFrame with route and update date column.
+        """
+        if not route_log.is_tracked(table_name):
+            if routes == 'ALL':
+                missing_routes = 'ALL'
+            else:
+                logged_routes = route_log.route_dates(table_name, routes, year=year, semester=semester)['route']
+                missing_routes = [str(x) for x in routes if str(x) not in logged_routes.tolist()]
+
+            if missing_routes == 'ALL' or len(missing_routes) != 0:
+                group_cols = [self.routeid_col]
+                if year is not None:
+                    group_cols.append(self.year_col)
+                if semester is not None:
+                    group_cols.append(self.semester_col)
+
+                table_date = event_fc_to_df(table_name, [self.update_date_col] + group_cols, missing_routes,
+                                            self.routeid_col, env.workspace, True,
+                                            sql_prefix='MAX ({0})'.format(self.update_date_col),
+                                            sql_postfix='GROUP BY {0}'.format(', '.join(group_cols)))
+                no_value = pd.Series(None, index=table_date.index)
+                route_log.seed(table_name, zip(table_date[self.routeid_col],
+                                               table_date.get(self.year_col, no_value),
+                                               table_date.get(self.semester_col, no_value),
+                                               table_date[self.update_date_col]), missing_routes)
+
+        route_date = route_log.route_dates(table_name, routes, year=year, semester=semester)
+        route_date.rename(columns={'route': self.routeid_col, 'update_date': self.update_date_col}, inplace=True)
+
+        return route_date
 
     def check_grading_column(self):
         list_fields = ListFields(self.table_name)
@@ -488,8 +571,9 @@ class KemantapanService(object):
 
         if self.semester is not None:
             gdb_table_writer(env.workspace, self.summary_result, self.output_table, col_details,
-                             replace_key=[self.routeid_col, self.year_col, self.semester_col])
+                             replace_key=[self.routeid_col, self.year_col, self.semester_col],
+                             data_type=self.data_type, year=self.year, semester=self.semester)
         else:
             gdb_table_writer(env.workspace, self.summary_result, self.output_table, col_details,
-                             replace_key=[self.routeid_col, self.year_col])
+                             replace_key=[self.routeid_col, self.year_col], data_type=self.data_type, year=self.year)
 
@@ -0,0 +1,49 @@
+WITH table1 AS
+    (
+        SELECT /*+ MATERIALIZE */ LINKID, FROM_STA, TO_STA, IRI, SEGMENT_LENGTH, LANE_CODE
+        FROM roughness_1_2020
+        WHERE LINKID IN ('01001')
+    ),
+rni AS
+    (
+        SELECT /*+ MATERIALIZE */ LINKID, FROM_STA, TO_STA, SURF_TYPE, LANE_CODE
+        FROM rni_2020
+        WHERE LINKID IN ('01001')
+    ),
+rni_segment AS
+    (
+        SELECT LINKID, FROM_STA, TO_STA, STATS_MODE(SURF_TYPE) AS SURF_TYPE
+        FROM rni
+        GROUP BY LINKID, FROM_STA, TO_STA
+    ),
+merged_mean AS
+    (
+        SELECT segment.LINKID, segment.FROM_STA, segment.TO_STA, segment.SEGMENT_LENGTH, segment.IRI as IRI, rni_segment.SURF_TYPE
+        FROM
+            (
+                SELECT LINKID, FROM_STA, TO_STA, AVG(IRI) as IRI, max(SEGMENT_LENGTH) as SEGMENT_LENGTH
+                FROM table1
+                GROUP BY LINKID, FROM_STA, TO_STA
+            ) segment
+            LEFT OUTER JOIN rni_segment
+            on segment.LINKID=rni_segment.LINKID and segment.FROM_STA*100/:to_km_factor = rni_segment.FROM_STA
+    ),
+merged_max AS
+    (
+        SELECT segment.LINKID, segment.FROM_STA, segment.TO_STA, segment.SEGMENT_LENGTH, segment.IRI as IRI, rni_segment.SURF_TYPE
+        FROM
+            (
+                SELECT LINKID, FROM_STA, TO_STA, MAX(IRI) as IRI, max(SEGMENT_LENGTH) as SEGMENT_LENGTH
+                FROM table1
+                GROUP BY LINKID, FROM_STA, TO_STA
+            ) segment
+            LEFT OUTER JOIN rni_segment
+            on segment.LINKID=rni_segment.LINKID and segment.FROM_STA*100/:to_km_factor = rni_segment.FROM_STA
+    ),
+merged_lane_based AS
+    (
+        SELECT table1.LINKID, table1.FROM_STA, table1.TO_STA, table1.SEGMENT_LENGTH, table1.IRI as IRI, rni.SURF_TYPE
+        FROM table1
+            LEFT OUTER JOIN rni
+            on table1.LINKID=rni.LINKID and table1.FROM_STA*100/:to_km_factor = rni.FROM_STA and table1.LANE_CODE = rni.LANE_CODE
+    )
@@ -1,7 +1,350 @@
-from arcpy import da
+from arcpy import da, Point, PointGeometry
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+from SMD_Package.load_config import SMDConfigs
 
 
-def route_geometry(route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE'):
+class RouteGeometry(object):
+    """
+    LRS route geometry with the vertex array and cumulative length/M index, used for in-memory max-M lookup, position
+    along line and snapping.
+    """
+    def __init__(self, route, polyline):
+        """
+        Class initialization.
+        :param route: The route ID.
+        :param polyline: Arcpy Polyline geometry object from the LRS Network.
+        """
+        self.route = route
+        self.geometry = polyline
+        self.spatial_reference = polyline.spatialReference
+
+        vertices = list()  # [X, Y, Z, M, part index]
+        for part_ind, part in enumerate(polyline.getPart()):
+            for point in part:
+                if point is None:
+                    continue
+
+                z = np.nan if point.Z is None else point.Z
+                m = np.nan if point.M is None else point.M
+                vertices.append([point.X, point.Y, z, m, part_ind])
+
+        self.vertices = np.array(vertices, dtype=float).reshape(-1, 5)
+
+        # The segment length between two consecutive vertex, the length is 0 between two different parts.
+        seg_len = np.hypot(np.diff(self.vertices[:, 0]), np.diff(self.vertices[:, 1]))
+        seg_len[np.diff(self.vertices[:, 4]) != 0] = 0
+        self.cum_length = np.concatenate([[0], np.cumsum(seg_len)])  # Cumulative length index
+        self.m_index = self.vertices[:, 3]  # Cumulative M index
+
+    @property
+    def x(self):
+        return self.vertices[:, 0]
+
+    @property
+    def y(self):
+        return self.vertices[:, 1]
+
+    @property
+    def max_m(self):
+        """
+        The route maximum M-value (the last point M-value).
+        """
+        return self.geometry.lastPoint.M
+
+    @property
+    def nbytes(self):
+        """
+        Approximate memory size of this object in bytes.
+        """
+        return self.vertices.nbytes + self.cum_length.nbytes + 64*len(self.vertices)
+
+    def position_along_line(self, distance, projection=None):
+        """
+        Return the point located at the specified distance along the route, similar to Polyline.positionAlongLine.
+        :param distance: The distance from the route start point in the route spatial reference unit.
+        :param projection: If specified then the resulting point will be projected to the specified spatial reference.
+        :return: Arcpy PointGeometry object.
+        """
+        x = np.interp(distance, self.cum_length, self.vertices[:, 0])
+        y = np.interp(distance, self.cum_length, self.vertices[:, 1])
+        z = np.interp(distance, self.cum_length, self.vertices[:, 2])
+        m = np.interp(distance, self.cum_length, self.m_index)
+
+        point_geom = PointGeometry(Point(x, y, z, m), self.spatial_reference, True, True)
+
+        if projection is not None:
+            return point_geom.projectAs(projection)
+        else:
+            return point_geom
+
+    def snap(self, x, y):
+        """
+        Snap the input point(s) to the nearest route segment.
+        :param x: The X coordinate in the route spatial reference, scalar or array.
+        :param y: The Y coordinate in the route spatial reference, scalar or array.
+        :return: Tuple of (M-value on the route, distance to the route) arrays.
+        """
+        px = np.atleast_1d(np.asarray(x, dtype=float))[:, None]
+        py = np.atleast_1d(np.asarray(y, dtype=float))[:, None]
+
+        x0, y0 = self.vertices[:-1, 0], self.vertices[:-1, 1]
+        dx, dy = np.diff(self.vertices[:, 0]), np.diff(self.vertices[:, 1])
+        seg_len_sq = dx**2 + dy**2
+        seg_len_sq[np.diff(self.vertices[:, 4]) != 0] = np.nan  # Segment between two parts is not valid
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = ((px-x0)*dx + (py-y0)*dy)/seg_len_sq
+        t = np.where(seg_len_sq == 0, 0, np.clip(t, 0, 1))  # Zero length segment snaps to its start point
+
+        dist = np.hypot(px-(x0+t*dx), py-(y0+t*dy))
+        dist[:, np.isnan(seg_len_sq)] = np.inf
+        nearest = np.argmin(dist, axis=1)
+
+        rows = np.arange(len(nearest))
+        t_nearest = t[rows, nearest]
+        m_value = self.m_index[nearest] + t_nearest*(self.m_index[nearest+1]-self.m_index[nearest])
+
+        return m_value, dist[rows, nearest]
+
+
+class GeometryCache(object):
+    """
+    Session scoped LRU cache for LRS route geometry, keyed by (LRS Network, route, route FROMDATE). The active FROMDATE
+    of every requested route (or the missing route marker) is kept in a separate version index, which is revalidated
+    with an attribute only query after version_ttl seconds. All of the expired versions are revalidated at once.
+    """
+    def __init__(self, max_mb=256, version_ttl=60):
+        """
+        Class initialization.
+        :param max_mb: The maximum memory used by the cached geometries in MegaBytes.
+        :param version_ttl: The number of seconds a resolved route version is used before it is read again.
+        """
+        self.max_bytes = max_mb*1024*1024
+        self.version_ttl = version_ttl
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._versions = dict()
+        self._lock = threading.Lock()  # The LRU order is modified by the concurrent check steps
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Get the cached geometry, the requested entry will be marked as the most recently used.
+        :param key: The cache key.
+        :return: RouteGeometry object or None if the key does not exist.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None:
+                self._entries[key] = entry  # Move the entry to the end
+
+        return entry
+
+    def put(self, key, entry):
+        """
+        Insert a geometry to the cache and evict the least recently used entries if the memory cap is exceeded.
+        :param key: The cache key.
+        :param entry: RouteGeometry object.
+        :return:
+        """
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.nbytes -= old_entry.nbytes
+
+            self._entries[key] = entry
+            self.nbytes += entry.nbytes
+
+            while (self.nbytes > self.max_bytes) and (len(self._entries) > 1):
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+        return self
+
+    def version(self, key):
+        """
+        Get the resolved route version.
+        :param key: The version key from version_key.
+        :return: The route FROMDATE, MISSING_ROUTE if the route does not exist, or UNRESOLVED if the version is not
+        resolved or already expired.
+        """
+        resolved = self._versions.get(key)
+
+        if (resolved is None) or (time.time() - resolved[1] > self.version_ttl):
+            return UNRESOLVED
+        else:
+            return resolved[0]
+
+    def set_version(self, key, from_date):
+        """
+        Store the resolved route version.
+        :param key: The version key from version_key.
+        :param from_date: The route FROMDATE or MISSING_ROUTE.
+        :return:
+        """
+        self._versions[key] = (from_date, time.time())
+        return self
+
+    def expired_routes(self, lrs_network, date_query=True):
+        """
+        List all of the routes with an expired version.
+        :param lrs_network: LRS Network feature class.
+        :param date_query: The version key date query.
+        :return: List of route.
+        """
+        now = time.time()
+        return [key[1] for key, (_, resolve_time) in self._versions.items()
+                if (key[0] == lrs_network) and (key[2] == bool(date_query)) and (now - resolve_time > self.version_ttl)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.nbytes = 0
+
+        return self
+
+
+MISSING_ROUTE = 'MISSING_ROUTE'  # Version marker for a route which does not exist in the LRS Network.
+UNRESOLVED = 'UNRESOLVED'  # Version marker for a route which version is not resolved.
+
+_cache_config = getattr(SMDConfigs(), 'geometry_cache', dict())
+geometry_cache = GeometryCache(_cache_config.get('max_mb', 256), _cache_config.get('version_ttl', 60))
+
+
+def cache_key(route, lrs_network, from_date=None):
+    """
+    Create the geometry cache key.
+    :param route: The route ID.
+    :param lrs_network: LRS Network feature class.
+    :param from_date: The FROMDATE of the cached route version.
+    :return: Tuple of (LRS Network, route, FROMDATE).
+    """
+    return lrs_network, str(route), from_date
+
+
+def version_key(route, lrs_network, date_query=True):
+    """
+    Create the route version key.
+    :param route: The route ID.
+    :param lrs_network: LRS Network feature class.
+    :param date_query: If True then the key is for the route active at the current date.
+    :return: Tuple of (LRS Network, route, date query).
+    """
+    return lrs_network, str(route), bool(date_query)
+
+
+def _route_where_clause(routes, lrs_routeid, from_date_col, to_date_col, date_query):
+    where_statement = "{0} IN ({1})".format(lrs_routeid, str([str(x) for x in routes]).strip('[]'))
+
+    if date_query:
+        where_statement += " and ({0} is null or {0}<=CURRENT_TIMESTAMP) and ({1} is null or {1}>CURRENT_TIMESTAMP)".\
+            format(from_date_col, to_date_col)
+
+    return where_statement
+
+
+def resolve_versions(routes, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE',
+                     date_query=True, chunk_size=500):
+    """
+    Read the FROMDATE of the requested routes (without the geometry) and store it in the version index, a single
+    attribute query is used for every route chunk. The route which does not exist in the LRS Network is stored as
+    MISSING_ROUTE.
+    :return: Dictionary of {route: FROMDATE or MISSING_ROUTE}
+    """
+    routes = [str(x) for x in routes]
+    versions = {x: MISSING_ROUTE for x in routes}
+
+    for chunk in [routes[x: x+chunk_size] for x in range(0, len(routes), chunk_size)]:
+        where_statement = _route_where_clause(chunk, lrs_routeid, from_date_col, to_date_col, date_query)
+
+        with da.SearchCursor(lrs_network, [lrs_routeid, from_date_col], where_clause=where_statement) as cursor:
+            for row in cursor:
+                versions[str(row[0])] = row[1]
+
+    for route, from_date in versions.items():
+        geometry_cache.set_version(version_key(route, lrs_network, date_query), from_date)
+
+    return versions
+
+
+def read_route_geometry(routes, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE',
+                        date_query=True):
+    """
+    Read the LRS Network geometry for the requested routes with a single SearchCursor and store it in the geometry
+    cache, keyed by the route FROMDATE. The route which does not exist in the LRS Network is stored as MISSING_ROUTE
+    in the version index.
+    :param routes: List of route.
+    :param lrs_network: LRS Network feature class.
+    :param lrs_routeid: The LRS Network feature class RouteID column.
+    :param from_date_col: Table From Date column
+    :param to_date_col: Table To Date column
+    :param date_query: If True then only the route active at the current date will be read.
+    :return: Dictionary of {route: RouteGeometry}
+    """
+    where_statement = _route_where_clause(routes, lrs_routeid, from_date_col, to_date_col, date_query)
+
+    route_dict = dict()
+    with da.SearchCursor(lrs_network, [lrs_routeid, from_date_col, "SHAPE@"], where_clause=where_statement) \
+            as cursor:
+        for row in cursor:
+            route_dict[str(row[0])] = (row[1], row[2])  # The FROMDATE and Polyline geometry object
+
+    for route in routes:
+        if str(route) not in route_dict:
+            geometry_cache.set_version(version_key(route, lrs_network, date_query), MISSING_ROUTE)
+
+    for route, (from_date, polyline) in route_dict.items():
+        if polyline is None:
+            geometry_cache.set_version(version_key(route, lrs_network, date_query), MISSING_ROUTE)
+            route_dict[route] = None
+            continue
+
+        geometry_cache.set_version(version_key(route, lrs_network, date_query), from_date)
+
+        entry = RouteGeometry(route, polyline)
+        geometry_cache.put(cache_key(route, lrs_network, from_date), entry)
+        route_dict[route] = entry
+
+    return route_dict
+
+
+def cached_route(route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE', date_query=True):
+    """
+    Return the cached RouteGeometry for the requested route, the geometry will be read from the LRS Network if the
+    route version does not exist in the cache. If the route version is expired, then all of the expired route versions
+    are resolved together.
+    :return: RouteGeometry object, or None if the requested route does not exist in the LRS Network.
+    """
+    from_date = geometry_cache.version(version_key(route, lrs_network, date_query))
+
+    if from_date == UNRESOLVED:
+        routes = [str(route)] + [x for x in geometry_cache.expired_routes(lrs_network, date_query) if x != str(route)]
+        from_date = resolve_versions(routes, lrs_network, lrs_routeid, from_date_col, to_date_col,
+                                     date_query)[str(route)]
+
+    if from_date == MISSING_ROUTE:
+        return None
+
+    entry = geometry_cache.get(cache_key(route, lrs_network, from_date))
+
+    if entry is None:
+        entry = read_route_geometry([route], lrs_network, lrs_routeid, from_date_col, to_date_col,
+                                    date_query).get(str(route))
+
+    return entry
+
+
+def route_geometry(route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE', date_query=False):
     """
     This static method return a Polyline object geometry from the LRS Network.
     :param route: The requested route.
@@ -9,20 +352,13 @@ def route_geometry(route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to
     :param lrs_routeid: The LRS Network feature class RouteID column.
     :param from_date_col: Table From Date column
     :param to_date_col: Table To Date column
+    :param date_query: If True then only the route active at the current date will be returned.
     :return: Arcpy Polyline geometry object if the requested route exist in the LRS Network, if the requested route
     does not exist in the LRS Network then the function will return None.
     """
-    where_statement = "{0}='{1}'".format(lrs_routeid, route)  # The where statement for SearchCursor
-    route_exist = False  # Variable for determining if the requested route exist in LRS Network
-    date_query = "({0} is null or {0}<=CURRENT_TIMESTAMP) and ({1} is null or {1}>CURRENT_TIMESTAMP)". \
-        format(from_date_col, to_date_col)
-
-    with da.SearchCursor(lrs_network, "SHAPE@", where_clause=where_statement) as cursor:
-        for row in cursor:
-            route_exist = True
-            route_geom = row[0]  # The Polyline geometry object
+    entry = cached_route(route, lrs_network, lrs_routeid, from_date_col, to_date_col, date_query)
 
-    if route_exist:
-        return route_geom
-    if not route_exist:
-        return None
\ No newline at end of file
+    if entry is not None:
+        return entry.geometry
+    else:
+        return None
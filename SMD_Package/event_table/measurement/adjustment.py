@@ -1,6 +1,6 @@
 from arcpy import env
 from SMD_Package.event_table.checks.coordinate import FindCoordinateError, distance_series
-from SMD_Package.event_table.lrs import route_geometry
+from SMD_Package.event_table.prefetch import RoutePrefetch
 from SMD_Package.load_config import SMDConfigs
 from flip import flip_measurement
 from trim_convert import convert_and_trim, _convert_measurement
@@ -21,13 +21,14 @@ class Adjust(object):
         self.lrs_routeid = config.table_fields['lrs_network']['route_id']
         workspace = config.smd_database['instance']
         env.workspace = workspace
+        self.prefetch = RoutePrefetch(workspace, df[routeid_col].unique().tolist())  # Reference data for all routes
 
     def survey_direction(self, lat_col='STATO_LAT', long_col='STATO_LONG', segment_len='SEGMENT_LENGTH'):
         dist_column = ['segDistance', 'rniDistance', 'lrsDistance', 'measureOnLine']
 
         for route in self.df[self.routeid].unique().tolist():
             df_route = self.df.loc[self.df[self.routeid] == route]
-            route_geom = route_geometry(route, self.lrs_network, self.lrs_routeid)
+            route_geom = self.prefetch.route_geometry(route, self.lrs_network, self.lrs_routeid, date_query=False)
             df_route[dist_column] = df_route.apply(lambda x: distance_series(x[lat_col],
                                                                              x[long_col],
                                                                              route_geom,
@@ -47,7 +48,7 @@ class Adjust(object):
 
     def trim_to_reference(self, fit_to='LRS'):
         convert_and_trim(self.df, self.routeid, self.from_m, self.to_m, self.lane_code, conversion=self.conversion,
-                         fit_to=fit_to)
+                         fit_to=fit_to, prefetch=self.prefetch)
         return self
 
     def convert(self, conversion=100):
@@ -1,12 +1,11 @@
 from arcpy import env, da
 import numpy as np
 from SMD_Package.load_config import SMDConfigs
-from SMD_Package.event_table.lrs import route_geometry
-from SMD_Package.FCtoDataFrame import event_fc_to_df
+from SMD_Package.event_table.prefetch import RoutePrefetch
 
 
 def convert_and_trim(dataframe, routeid_col, from_m_col, to_m_col, lane_code, conversion=100, rni_to_km=100,
-                     fit_to='LRS'):
+                     fit_to='LRS', prefetch=None):
     """
     This function will convert the input DataFrame to the specified conversion and trim the input DataFrame measurement
     column to fit the LRS Maximum measurement value.
@@ -16,15 +15,16 @@ def convert_and_trim(dataframe, routeid_col, from_m_col, to_m_col, lane_code, co
     :param to_m_col: The To Measurement column of the event table.
     :param lane_code: The Lane Code column of the evne table.
     :param conversion:  Conversion factor.
+    :param prefetch: RoutePrefetch object used for reading the reference data, if None then a new one will be created.
     :return: Modified DataFrame.
     """
     df = dataframe
     _convert_measurement(df, from_m_col, to_m_col, conversion=conversion)  # Convert the measurement
-    _trim(df, routeid_col, to_m_col, from_m_col, lane_code, fit_to=fit_to, rni_to_km=rni_to_km)
+    _trim(df, routeid_col, to_m_col, from_m_col, lane_code, fit_to=fit_to, rni_to_km=rni_to_km, prefetch=prefetch)
     return df
 
 
-def _trim(dataframe, routeid_col, to_m_col, from_m_col, lane_code, fit_to=None, rni_to_km=None):
+def _trim(dataframe, routeid_col, to_m_col, from_m_col, lane_code, fit_to=None, rni_to_km=None, prefetch=None):
     """
     This function will trim event table to fit the LRS Network Max Measurement.
     :param dataframe: The event DataFrame
@@ -33,6 +33,7 @@ def _trim(dataframe, routeid_col, to_m_col, from_m_col, lane_code, fit_to=None,
     :param lrs_network : The LRS Network Feature Class
     :param lrs_routeid : The LRS Network RouteID column
     :param workspace : The SDE Connection for LRS Network
+    :param prefetch: RoutePrefetch object used for reading the reference data.
     :return: Modified Event DataFrame
     """
 
@@ -49,15 +50,17 @@ def _trim(dataframe, routeid_col, to_m_col, from_m_col, lane_code, fit_to=None,
     routes = df[routeid_col].unique().tolist()  # All the routes in the input DataFrame
     env.workspace = workspace
 
+    if prefetch is None:  # Bulk load the reference data for all routes in the input DataFrame
+        prefetch = RoutePrefetch(workspace, routes)
+
     for route in routes:  # Iterate over all available route in the input DataFrame
         df_route = df.loc[df[routeid_col] == route]  # Create a DataFrame for a single route
         lanes = df_route[lane_code].unique().tolist()  # List of lanes
 
         if fit_to == 'LRS':
-            lrs_geom = route_geometry(route, lrs_network, lrs_routeid)
+            lrs_geom = prefetch.route_geometry(route, lrs_network, lrs_routeid, date_query=False)
         elif fit_to == 'RNI':
-            rni_df = event_fc_to_df(rni_table, [rni_to_col, rni_lane_code], route, rni_routeid, workspace,
-                                    is_table=True)
+            rni_df = prefetch.table_df(rni_table, [rni_to_col, rni_lane_code], route, rni_routeid, is_table=True)
         else:
             raise ValueError("{0} is not a valid reference for trimming.".format(fit_to))
 
@@ -0,0 +1,230 @@
+from arcpy import env
+from SMD_Package.FCtoDataFrame import event_fc_to_df
+from SMD_Package.event_table.lrs import geometry_cache, cache_key, cached_route, read_route_geometry, \
+    resolve_versions, MISSING_ROUTE
+import threading
+
+
+class RoutePrefetch(object):
+    """
+    This class bulk loads reference data (table rows and LRS geometries) for a set of routes using chunked IN list
+    query, and hands out a per-route view of the loaded data. A table is loaded only once for all routes when it is
+    requested for the first time.
+    """
+    def __init__(self, sde_connection, routes=None, chunk_size=500):
+        """
+        Class initialization.
+        :param sde_connection: The SDE connection used for reading the reference data.
+        :param routes: The route list which will be prefetched. If None then every request is read per route.
+        :param chunk_size: The maximum number of route in a single IN list query.
+        """
+        self.sde_connection = sde_connection
+        self.chunk_size = chunk_size
+        self.routes = None
+        self._route_set = set()  # For route membership test
+        self._tables = dict()  # For storing the loaded table, {key: (route_dict, empty_df)}
+        self._geometries = dict()  # For storing the LRS Network request which is already bulk loaded
+        self._shared = set()  # Shared table, (table, routeid_col, all_rows)
+        self._lock = threading.RLock()  # The concurrent check steps share the prefetched data
+
+        self.set_routes(routes)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']  # The lock can not be pickled for the shard worker process
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def set_routes(self, routes):
+        """
+        Set the prefetched route list, all the previously loaded data will be cleared.
+        :param routes: The route list.
+        :return:
+        """
+        if routes is None:
+            self.routes = None
+        elif type(routes) == str or type(routes) == unicode:
+            self.routes = [str(routes)]
+        else:
+            self.routes = [str(x) for x in routes]
+
+        self._route_set = set(self.routes or [])
+        self._tables = dict()
+        self._geometries = dict()
+
+        return self
+
+    def share(self, table, routeid_col, all_rows=True):
+        """
+        Mark a table as a shared reference table. A shared table is loaded once with all of its columns, and every
+        column request to that table is served from the loaded table.
+        :param table: The reference table or feature class.
+        :param routeid_col: The RouteID column in the reference table.
+        :param all_rows: If True then the rows with null geometry is also loaded (similar to is_table or include_all).
+        :return:
+        """
+        self._shared.add((table, routeid_col, all_rows))
+        return self
+
+    def load_shared(self):
+        """
+        Load all of the shared reference tables for the prefetched routes.
+        :return:
+        """
+        if self.routes:
+            for table, routeid_col, all_rows in sorted(self._shared):
+                self._shared_df(table, self.routes[0], routeid_col, all_rows)
+
+        return self
+
+    def route_chunks(self):
+        """
+        Split the prefetched route list into chunks with chunk_size maximum length.
+        :return: List of route list.
+        """
+        return [self.routes[x: x+self.chunk_size] for x in range(0, len(self.routes), self.chunk_size)]
+
+    def table_df(self, table, search_field, route, routeid_col, is_table=True, include_all=False):
+        """
+        Return the requested table rows for a single route. If the route is in the prefetched route list then the
+        table is loaded for all the prefetched routes at the first request.
+        :param table: The requested table or feature class.
+        :param search_field: The requested columns.
+        :param route: The requested route.
+        :param routeid_col: The RouteID column in the requested table.
+        :param is_table: If True then the requested table does not have any geometry.
+        :param include_all: If True then features with null geometry will also be included.
+        :return: Pandas DataFrame.
+        """
+        route = str(route)
+
+        if route not in self._route_set:
+            return event_fc_to_df(table, search_field, route, routeid_col, self.sde_connection, is_table=is_table,
+                                  include_all=include_all)
+
+        all_rows = is_table or include_all
+
+        if (table, routeid_col, all_rows) in self._shared:
+            shared_df = self._shared_df(table, route, routeid_col, all_rows)
+            fields = search_field if type(search_field) == list else [search_field]
+
+            if search_field == '*':
+                return shared_df.copy()
+            elif all([x in shared_df.columns for x in fields]):
+                return shared_df[fields].copy()
+
+        if type(search_field) == list:
+            field_key = tuple(search_field)
+        else:
+            field_key = search_field
+
+        key = (table, routeid_col, field_key, is_table, include_all)
+
+        with self._lock:
+            if key not in self._tables:
+                self._load_table(key, table, search_field, routeid_col, is_table, include_all)
+
+        route_dict, empty_df = self._tables[key]
+
+        if route in route_dict:
+            return route_dict[route].copy()
+        else:
+            return empty_df.copy()
+
+    def _shared_df(self, table, route, routeid_col, all_rows):
+        """
+        Return all columns of the shared table for a single route.
+        """
+        key = (table, routeid_col, '*', all_rows, all_rows)
+
+        with self._lock:
+            if key not in self._tables:
+                self._load_table(key, table, '*', routeid_col, all_rows, all_rows)
+
+        route_dict, empty_df = self._tables[key]
+
+        return route_dict.get(route, empty_df)
+
+    def _load_table(self, key, table, search_field, routeid_col, is_table, include_all):
+        """
+        Load the requested table for all prefetched routes and split it into per-route DataFrame.
+        """
+        if type(search_field) == list:
+            fields = list(search_field)
+            if routeid_col not in fields:
+                fields.append(routeid_col)
+        else:
+            fields = search_field
+
+        route_dict = dict()
+        empty_df = None
+
+        for chunk in self.route_chunks():
+            df = event_fc_to_df(table, fields, chunk, routeid_col, self.sde_connection, is_table=is_table,
+                                include_all=include_all)
+            route_values = df[routeid_col].astype(str)  # The RouteID used for splitting the DataFrame
+
+            if type(search_field) == list:
+                df = df[search_field]  # Only return the requested columns
+
+            if empty_df is None:
+                empty_df = df.iloc[0:0]
+
+            for route, route_df in df.groupby(route_values):
+                route_dict[str(route)] = route_df.reset_index(drop=True)
+
+        self._tables[key] = (route_dict, empty_df)
+
+        return self
+
+    def route_geometry(self, route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE',
+                       date_query=True):
+        """
+        Return the route Polyline geometry from the LRS Network. If the route is in the prefetched route list then the
+        geometry is loaded for all the prefetched routes at the first request. The geometries are stored in the
+        session geometry cache.
+        :param route: The requested route.
+        :param lrs_network: LRS Network feature class.
+        :param lrs_routeid: The LRS Network feature class RouteID column.
+        :param from_date_col: Table From Date column.
+        :param to_date_col: Table To Date column.
+        :param date_query: If True then only the currently active route will be returned.
+        :return: Arcpy Polyline geometry object, or None if the route does not exist in the LRS Network.
+        """
+        entry = self.route_entry(route, lrs_network, lrs_routeid, from_date_col, to_date_col, date_query)
+
+        if entry is not None:
+            return entry.geometry
+        else:
+            return None
+
+    def route_entry(self, route, lrs_network, lrs_routeid, from_date_col='FROMDATE', to_date_col='TODATE',
+                    date_query=True):
+        """
+        Return the cached RouteGeometry object (with vertex array and M index) for the requested route.
+        :return: RouteGeometry object, or None if the route does not exist in the LRS Network.
+        """
+        route = str(route)
+        key = (lrs_network, lrs_routeid, from_date_col, to_date_col, date_query)
+        env.workspace = self.sde_connection
+
+        with self._lock:
+            if (route in self._route_set) and (key not in self._geometries):
+                # Resolve the active version of every route with an attribute only query, then only read the geometry
+                # of the route version which is not cached yet.
+                missing = list()
+                for chunk in self.route_chunks():
+                    versions = resolve_versions(chunk, lrs_network, lrs_routeid, from_date_col, to_date_col,
+                                                date_query)
+                    missing += [x for x, from_date in versions.items() if (from_date != MISSING_ROUTE) and
+                                (cache_key(x, lrs_network, from_date) not in geometry_cache)]
+
+                for chunk in [missing[x: x+self.chunk_size] for x in range(0, len(missing), self.chunk_size)]:
+                    read_route_geometry(chunk, lrs_network, lrs_routeid, from_date_col, to_date_col, date_query)
+
+                self._geometries[key] = True  # The geometries for all prefetched routes is already loaded
+
+            return cached_route(route, lrs_network, lrs_routeid, from_date_col, to_date_col, date_query)
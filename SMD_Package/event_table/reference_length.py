@@ -0,0 +1,403 @@
+"""
+This script provide the materialized per-route reference length table (RNI max measure, LRS max M, SK length and RNI
+lane count). The table is stored in a local SQLite file specified in the SMD config file "reference_length" key. The
+reference length is read from the SQLite file, the staleness check against the RNI UPDATE_DATE and the LRS route
+effective date is only executed by the refresh method. A stored route is refreshed before it is read if it is older
+than the "reference_length" "refresh_interval" hours.
+"""
+from SMD_Package.FCtoDataFrame import event_fc_to_df
+from SMD_Package.load_config import SMDConfigs
+from SMD_Package.event_table.lrs import read_route_geometry
+from arcpy import env
+import pandas as pd
+import sqlite3
+import datetime
+import os
+
+LENGTH_COLUMNS = ['RNI_MAX_M', 'LRS_MAX_M', 'SK_LENGTH', 'LANE_COUNT']
+RNI_COLUMNS = ['RNI_MAX_M', 'LANE_COUNT']  # The columns refreshed from the RNI table
+LRS_COLUMNS = ['LRS_MAX_M', 'SK_LENGTH']  # The columns read from the LRS Network
+
+
+class ReferenceLength(object):
+    """
+    Per-route reference length table. The SK length, the LRS max M and the LRS route effective date (the active route
+    FROMDATE) is stored per route, the route geometry is only read for a new effective date. The RNI max measure and
+    lane count is stored per route, and refreshed if the RNI table has a newer UPDATE_DATE than the stored row. The
+    route which does not exist in the LRS Network or the RNI table is stored with null value.
+    """
+    def __init__(self, db_path=None, chunk_size=500, refresh_interval=None):
+        """
+        Class initialization.
+        :param db_path: The SQLite file path, if None then the "reference_length" "path" value from SMD config file
+        will be used.
+        :param chunk_size: The number of route in a single reference table query.
+        :param refresh_interval: The maximum age (in hours) of a stored route before the route is refreshed by the
+        read methods. If None then the "reference_length" "refresh_interval" value from SMD config file will be used.
+        """
+        smd_config = SMDConfigs()
+        length_config = getattr(smd_config, 'reference_length', dict())
+
+        if db_path is None:
+            db_path = length_config.get('path', 'reference_length.sqlite')
+            if not os.path.isabs(db_path):
+                db_path = os.path.join(SMDConfigs.smd_dir(), db_path)
+
+        if refresh_interval is None:
+            refresh_interval = length_config.get('refresh_interval', 24)
+
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+        self.refresh_interval = refresh_interval
+
+        self.rni_table = smd_config.table_names['rni']
+        self.rni_routeid = smd_config.table_fields['rni']['route_id']
+        self.rni_to_m = smd_config.table_fields['rni']['to_measure']
+        self.rni_lane_code = smd_config.table_fields['rni']['lane_code']
+        self.rni_update_date = 'UPDATE_DATE'
+
+        self.lrs_network = smd_config.table_names['lrs_network']
+        self.lrs_routeid = smd_config.table_fields['lrs_network']['route_id']
+        self.lrs_sklen = smd_config.table_fields['lrs_network']['sk_length']
+        self.lrs_from_date = smd_config.table_fields['lrs_network']['from_date']
+        self.lrs_to_date = smd_config.table_fields['lrs_network']['to_date']
+
+        con = self.connect()
+        with con:
+            lrs_columns = [row[1] for row in con.execute("PRAGMA table_info(lrs_length)").fetchall()]
+            if lrs_columns and ('sk_length' not in lrs_columns):  # The table from the previous version
+                con.execute("DROP TABLE lrs_length")
+
+            con.execute("CREATE TABLE IF NOT EXISTS lrs_length "
+                        "(route TEXT PRIMARY KEY, effective_date TEXT, sk_length REAL, lrs_max_m REAL, "
+                        "refresh_date TEXT)")
+            con.execute("CREATE TABLE IF NOT EXISTS rni_length "
+                        "(route TEXT PRIMARY KEY, rni_max_m REAL, lane_count INTEGER, rni_update_date TEXT, "
+                        "refresh_date TEXT)")
+        con.close()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def lengths(self, routes, columns=None, refresh=True):
+        """
+        Return the reference length of the requested routes from the SQLite file.
+        :param routes: The requested routes, a single route, list of route or 'ALL'.
+        :param columns: The requested columns from LENGTH_COLUMNS, if None then all columns are returned.
+        :param refresh: If True then the requested routes which is not stored or older than the refresh interval is
+        refreshed before the table is read. Only the LRS Network is refreshed for the LRS_MAX_M and SK_LENGTH column,
+        and only the RNI table is refreshed for the RNI_MAX_M and LANE_COUNT column.
+        :return: Pandas DataFrame indexed by the route with the requested columns. The RNI_MAX_M is in the RNI table
+        measurement unit. The route which does not exist in the LRS Network or the RNI table has null value in the
+        columns from that table.
+        """
+        if columns is None:
+            columns = LENGTH_COLUMNS
+
+        invalid = [x for x in columns if x not in LENGTH_COLUMNS]
+        if len(invalid) != 0:
+            raise ValueError("{0} is not a valid reference length column. Use {1}.".format(invalid, LENGTH_COLUMNS))
+
+        frames = list()
+
+        if any([x in LRS_COLUMNS for x in columns]):
+            if refresh:
+                self.refresh(self._expired('lrs_length', routes), columns=LRS_COLUMNS)
+
+            rows = self._select("SELECT route, sk_length, lrs_max_m FROM lrs_length WHERE effective_date IS NOT NULL",
+                                routes)
+            frames.append(pd.DataFrame([row[1:] for row in rows], index=[str(row[0]) for row in rows],
+                                       columns=['SK_LENGTH', 'LRS_MAX_M'], dtype=float))
+
+        if any([x in RNI_COLUMNS for x in columns]):
+            if refresh:
+                self.refresh(self._expired('rni_length', routes), columns=RNI_COLUMNS)
+
+            rows = self._select("SELECT route, rni_max_m, lane_count FROM rni_length "
+                                "WHERE rni_update_date IS NOT NULL", routes)
+            frames.append(pd.DataFrame([row[1:] for row in rows], index=[str(row[0]) for row in rows],
+                                       columns=RNI_COLUMNS))
+
+        df = pd.concat(frames, axis=1, sort=True).reindex(columns=columns)
+        df.index.name = 'ROUTE'
+
+        return df.sort_index()
+
+    def fingerprints(self, routes, refresh=True):
+        """
+        Return the reference data version of the requested routes from the SQLite file, the version is changed if the
+        LRS route effective date, the SK length or the RNI UPDATE_DATE is changed.
+        :param routes: The requested routes, a single route, list of route or 'ALL'.
+        :param refresh: If True then the requested routes which is not stored or older than the refresh interval is
+        refreshed before the table is read.
+        :return: Dictionary of {route: version string}. The route which does not exist in the LRS Network and the RNI
+        table is not included.
+        """
+        if refresh:
+            self.refresh(self._expired('lrs_length', routes), columns=LRS_COLUMNS)
+            self.refresh(self._expired('rni_length', routes), columns=RNI_COLUMNS)
+
+        active = {str(row[0]): row[1:] for row in
+                  self._select("SELECT route, effective_date, sk_length FROM lrs_length "
+                               "WHERE effective_date IS NOT NULL", routes)}
+        rni_date = {str(row[0]): row[1] for row in
+                    self._select("SELECT route, rni_update_date FROM rni_length WHERE rni_update_date IS NOT NULL",
+                                 routes)}
+        fingerprints = dict()
+
+        for route in set(active.keys()) | set(rni_date.keys()):
+            date, sk_length = active.get(route, ('', None))
+            fingerprints[route] = '{0}|{1}|{2}'.format(date, sk_length, rni_date.get(route))
+
+        return fingerprints
+
+    def refresh(self, routes='ALL', columns=None):
+        """
+        Refresh the stored reference length of the requested routes. The LRS route geometry is only read for the
+        route with a new effective date, and the RNI table is only summarized for the route with a newer UPDATE_DATE.
+        :param routes: The refreshed routes, a single route, list of route or 'ALL'.
+        :param columns: The refreshed columns from LENGTH_COLUMNS, if None then all columns are refreshed.
+        :return:
+        """
+        if columns is None:
+            columns = LENGTH_COLUMNS
+
+        if (not isinstance(routes, basestring)) and (len(routes) == 0):
+            return self
+
+        if any([x in LRS_COLUMNS for x in columns]):
+            self._refresh_lrs(routes)
+
+        if any([x in RNI_COLUMNS for x in columns]):
+            self._refresh_rni(routes)
+
+        return self
+
+    def _refresh_lrs(self, routes):
+        """
+        Refresh the SK length, the effective date and the LRS max M-value of the requested routes.
+        """
+        active = self.active_routes(routes)  # {route: (effective date, SK length)}
+        stored = {str(row[0]): row[1:] for row in
+                  self._select("SELECT route, effective_date, lrs_max_m FROM lrs_length", routes)}
+        new_version = [x for x in active if (x not in stored) or (stored[x][0] != active[x][0])]
+        lrs_max_m = self._lrs_max_m(new_version)
+
+        refresh_date = datetime.datetime.now().isoformat()
+        rows = list()
+
+        for route in self._requested(routes, set(active.keys()) | set(stored.keys())):
+            if route not in active:  # The route does not exist in the LRS Network
+                rows.append((route, None, None, None, refresh_date))
+            elif route in new_version:
+                rows.append((route, active[route][0], active[route][1], lrs_max_m.get(route), refresh_date))
+            else:
+                rows.append((route, active[route][0], active[route][1], stored[route][1], refresh_date))
+
+        con = self.connect()
+        with con:
+            con.executemany("INSERT OR REPLACE INTO lrs_length VALUES (?, ?, ?, ?, ?)", rows)
+        con.close()
+
+        return self
+
+    def _refresh_rni(self, routes):
+        """
+        Refresh the RNI max measure and lane count of the requested routes which has a newer RNI UPDATE_DATE than the
+        stored row.
+        """
+        rni_date = self._rni_update_date(routes)  # {route: RNI max UPDATE_DATE}
+        stored = {str(row[0]): row[1:] for row in
+                  self._select("SELECT route, rni_max_m, lane_count, rni_update_date FROM rni_length", routes)}
+        outdated = [route for route, date in rni_date.items()
+                    if (route not in stored) or (stored[route][-1] is None) or (date > stored[route][-1])]
+        rni_summary = self._rni_summary(outdated)
+
+        refresh_date = datetime.datetime.now().isoformat()
+        rows = list()
+
+        for route in self._requested(routes, set(rni_date.keys()) | set(stored.keys())):
+            if route not in rni_date:  # The route does not exist in the RNI table
+                rows.append((route, None, None, None, refresh_date))
+            elif route in outdated:
+                rows.append((route, ) + rni_summary.get(route, (None, None)) + (rni_date[route], refresh_date))
+            else:
+                rows.append((route, ) + tuple(stored[route]) + (refresh_date, ))
+
+        con = self.connect()
+        with con:
+            con.executemany("INSERT OR REPLACE INTO rni_length VALUES (?, ?, ?, ?, ?)", rows)
+        con.close()
+
+        return self
+
+    def _requested(self, routes, found):
+        """
+        The requested route list, 'ALL' is replaced by all of the found routes.
+        """
+        if routes == 'ALL':
+            return sorted(found)
+        else:
+            return [route for chunk in self._chunks(routes) for route in chunk]
+
+    def _expired(self, table, routes):
+        """
+        Select the requested routes which is not stored or older than the refresh interval.
+        :param table: The stored table name.
+        :param routes: The requested routes, a single route, list of route or 'ALL'.
+        :return: List of route, or 'ALL' if any stored row is expired or the table is empty.
+        """
+        cutoff = (datetime.datetime.now() - datetime.timedelta(hours=self.refresh_interval)).isoformat()
+        stored = {str(row[0]): row[1] for row in self._select("SELECT route, refresh_date FROM {0}".format(table),
+                                                                routes)}
+
+        if routes == 'ALL':
+            if (len(stored) == 0) or (min(stored.values()) < cutoff):
+                return 'ALL'
+            else:
+                return list()
+
+        return [route for chunk in self._chunks(routes) for route in chunk
+                if (route not in stored) or (stored[route] < cutoff)]
+
+    def _chunks(self, routes):
+        """
+        Split the requested routes into chunks, 'ALL' is not split.
+        """
+        if isinstance(routes, basestring):
+            if routes == 'ALL':
+                return ['ALL']
+            else:
+                routes = [routes]
+
+        routes = [str(x) for x in routes]
+        return [routes[x: x+self.chunk_size] for x in range(0, len(routes), self.chunk_size)]
+
+    def _select(self, statement, routes):
+        """
+        Read the stored rows of the requested routes.
+        :param statement: The SELECT statement, with or without the WHERE clause.
+        :param routes: The requested routes or 'ALL'.
+        :return: List of row.
+        """
+        rows = list()
+        con = self.connect()
+        conjunction = " AND " if " WHERE " in statement else " WHERE "
+
+        for chunk in self._chunks(routes):
+            if chunk == 'ALL':
+                rows += con.execute(statement).fetchall()
+            else:
+                rows += con.execute(statement + conjunction + "route IN ({0})".format(', '.join(['?']*len(chunk))),
+                                    chunk).fetchall()
+
+        con.close()
+
+        return rows
+
+    def active_routes(self, routes):
+        """
+        Read the currently active LRS Network route and its effective date and SK length.
+        :param routes: The requested routes, a single route, list of route or 'ALL'.
+        :return: Dictionary of {route: (effective date, SK length)}.
+        """
+        columns = [self.lrs_routeid, self.lrs_from_date, self.lrs_sklen]
+
+        lrs_df = pd.concat([event_fc_to_df(self.lrs_network, columns, x, self.lrs_routeid, env.workspace, True,
+                                           add_date_query=True, from_date=self.lrs_from_date,
+                                           to_date=self.lrs_to_date, replace_null=False)
+                            for x in self._chunks(routes)] or [pd.DataFrame(columns=columns)], sort=False)
+
+        return {str(route): ('' if pd.isnull(date) else str(date), None if pd.isnull(sk_len) else float(sk_len))
+                for route, date, sk_len in zip(lrs_df[self.lrs_routeid], lrs_df[self.lrs_from_date],
+                                               lrs_df[self.lrs_sklen])}
+
+    def _rni_update_date(self, routes):
+        """
+        Read the RNI table latest UPDATE_DATE of every requested route.
+        :return: Dictionary of {route: date string}.
+        """
+        columns = [self.rni_update_date, self.rni_routeid]
+        rni_date = dict()
+
+        for chunk in self._chunks(routes):
+            df = event_fc_to_df(self.rni_table, columns, chunk, self.rni_routeid, env.workspace, True,
+                                sql_prefix='MAX ({0})'.format(self.rni_update_date),
+                                sql_postfix='GROUP BY ({0})'.format(self.rni_routeid), replace_null=False)
+            rni_date.update({str(route): str(date) for route, date in zip(df[self.rni_routeid],
+                                                                          df[self.rni_update_date])
+                             if not pd.isnull(date)})
+
+        return rni_date
+
+    def _rni_summary(self, routes):
+        """
+        Read the RNI max To Measure and the lane count of every route.
+        :return: Dictionary of {route: (max measure, lane count)}.
+        """
+        columns = [self.rni_routeid, self.rni_to_m, self.rni_lane_code]
+        summary = dict()
+
+        for chunk in self._chunks(routes):
+            df = event_fc_to_df(self.rni_table, columns, chunk, self.rni_routeid, env.workspace, is_table=False,
+                                include_all=True, replace_null=False)
+            grouped = df.groupby(df[self.rni_routeid].astype(str))
+            max_m = grouped[self.rni_to_m].max()
+            lane_count = grouped[self.rni_lane_code].nunique()
+
+            summary.update({route: (None if pd.isnull(max_m[route]) else float(max_m[route]),
+                                    int(lane_count[route])) for route in max_m.index})
+
+        return summary
+
+    def _lrs_max_m(self, routes):
+        """
+        Read the LRS Network route max M-value from the route geometry.
+        :return: Dictionary of {route: max M-value}.
+        """
+        max_m = dict()
+
+        for chunk in self._chunks(routes):
+            for route, entry in read_route_geometry(chunk, self.lrs_network, self.lrs_routeid, self.lrs_from_date,
+                                                    self.lrs_to_date).items():
+                if entry is not None:
+                    max_m[route] = entry.max_m
+
+        return max_m
+
+
+def reference_length(routes, columns=None, refresh=True):
+    """
+    Return the reference length of the requested routes from the materialized reference length table.
+    :param routes: The requested routes, a single route, list of route or 'ALL'.
+    :param columns: The requested columns from LENGTH_COLUMNS, if None then all columns are returned.
+    :param refresh: If True then the expired routes is refreshed before the table is read.
+    :return: Pandas DataFrame indexed by the route with the requested columns.
+    """
+    return ReferenceLength().lengths(routes, columns=columns, refresh=refresh)
+
+
+def refresh_reference_length(routes='ALL', columns=None):
+    """
+    Refresh the materialized reference length table, this function can be scheduled to keep the table up to date.
+    :param routes: The refreshed routes, a single route, list of route or 'ALL'.
+    :param columns: The refreshed columns from LENGTH_COLUMNS, if None then all columns are refreshed.
+    :return:
+    """
+    ReferenceLength().refresh(routes, columns=columns)
+
+    return
+
+
+def sk_length(routes, routeid_col, sklen_col):
+    """
+    Return the SK length of the requested routes from the materialized reference length table.
+    :param routes: The requested routes, a single route, list of route or 'ALL'.
+    :param routeid_col: The RouteID column name of the returned DataFrame.
+    :param sklen_col: The SK length column name of the returned DataFrame.
+    :return: Pandas DataFrame with RouteID and SK length column.
+    """
+    df = reference_length(routes, columns=['SK_LENGTH'])[['SK_LENGTH']].reset_index()
+    df.columns = [routeid_col, sklen_col]
+
+    return df
@@ -3,12 +3,13 @@ from SMD_Package.FCtoDataFrame import event_fc_to_df
 from SMD_Package.load_config import SMDConfigs, Configs
 from SMD_Package.TableWriter.GDBTableWriter import gdb_table_writer
 from SMD_Package.event_table.kemantapan.kemantapan import Kemantapan
+from SMD_Package.event_table.reference_length import sk_length
+from SMD_Package.storage import sql_database
 from arcpy import env, Exists
 import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import cx_Oracle
 
 
 class RNISummary(object):
@@ -48,7 +49,6 @@ class RNISummary(object):
         self.output_table = output_table
         self.total_len_col = 'TOTAL_LENGTH'
 
-        lrs_table = smd_config.table_names['lrs_network']
         self.lrs_routeid_col = smd_config.table_fields['lrs_network']['route_id']
         self.lrs_sklen_col = smd_config.table_fields['lrs_network']['sk_length']
 
@@ -71,13 +71,11 @@ class RNISummary(object):
         self.status = dict()
         self.route_selection = self._route_date_selection(self.output_table)  # Create the route selection.
 
-        # Get the LRS SK length DataFrame.
+        # Get the LRS SK length DataFrame from the reference length table.
         if (len(self.route_selection) > 1000) or (self.route_req == 'ALL'):
-            self.sklen_df = event_fc_to_df(lrs_table, [self.lrs_routeid_col, self.lrs_sklen_col], "ALL",
-                                           self.lrs_routeid_col, env.workspace)
+            self.sklen_df = sk_length("ALL", self.lrs_routeid_col, self.lrs_sklen_col)
         elif len(self.route_selection) > 0:
-            self.sklen_df = event_fc_to_df(lrs_table, [self.lrs_routeid_col, self.lrs_sklen_col], self.route_selection,
-                                           self.lrs_routeid_col, env.workspace)
+            self.sklen_df = sk_length(self.route_selection, self.lrs_routeid_col, self.lrs_sklen_col)
         else:
             self.sklen_df = None
 
@@ -217,19 +215,32 @@ class RNISummary(object):
 
         return df
 
+    @staticmethod
+    def route_params(routes):
+        """
+        Create the SQL bind parameter for the route selection, the routes is bound as an array so the query text is
+        the same for every route chunk.
+        :param routes: Routes as string, list or unicode.
+        :return: Dictionary.
+        """
+        if (type(routes) == str) or (type(routes) == unicode):
+            routes = [str(routes)]
+        elif type(routes) == list:
+            routes = [str(_) for _ in routes]
+        else:
+            raise (Exception('Input routes is neither a str or list'))  # Raise an exception.
+
+        return {'routes': routes}
+
     @staticmethod
     def execute_sql(query, params=None):
         """
-        Execute SQL script from a string.
+        Execute SQL script from a string, the connection is borrowed from the SQL database session pool.
         :param query: SQL string.
         :param params: SQL parameter.
         :return: Pandas DataFrame.
         """
-        dsn_tns = cx_Oracle.makedsn('10.10.1.97', '1521', service_name='geodbbm')
-        connection = cx_Oracle.connect('SMD', 'SMD123M', dsn_tns)
-        df_ora = pd.read_sql(query, con=connection, params=params)
-
-        return df_ora
+        return sql_database().read_sql(query, params=params)
 
 
 class WidthSummary(RNISummary):
@@ -242,11 +253,13 @@ class WidthSummary(RNISummary):
         super(WidthSummary, self).__init__(output_table=output_table, **kwargs)
         self.columns = None
 
+        if sql:
+            self.columns = list()  # Change columns into list variable.
+            sql_query = self.sql_route_groupby()  # The same query for every route chunk.
+
         for route in self.route_selection:
             if sql:
-                self.columns = list()  # Change columns into list variable.
-                sql_query = self.sql_route_groupby(route)
-                result = self.execute_sql(sql_query)
+                result = self.execute_sql(sql_query, params=self.route_params(route))
             else:
                 df = self.rni_route_df(route)
 
@@ -289,24 +302,18 @@ class WidthSummary(RNISummary):
                 self._write_to_df(result, self.output_table)
                 print str(self.route_selection.index(route)+1) + "/" + str(len(self.route_selection))
 
-    def sql_segment_groupby(self, routes):
-        if (type(routes) == str) or (type(routes) == unicode):
-            pass
-        elif type(routes) == list:
-            routes = [str(_) for _ in routes]
-            routes = str(routes).strip('[').strip(']')
-        else:
-            raise (Exception('Input routes is neither a str or list'))  # Raise an exception.
+    def sql_segment_groupby(self):
+        route_filter = sql_database().route_filter(self.routeid_col)
 
         seg_groupby = "SELECT {routeid_col}, {from_m_col}, MAX({to_m_col}) AS {to_m_col}, " \
                       "SUM({lane_width}) AS {lane_width}, MAX({segment_len_col}) AS {segment_len_col}\n" \
                       "FROM {table_name} \n" \
-                      "WHERE {routeid_col} IN ({routes}) \n" \
-                      "GROUP BY {routeid_col}, {from_m_col}".format(routes=routes, **self.__dict__)
+                      "WHERE {route_filter} \n" \
+                      "GROUP BY {routeid_col}, {from_m_col}".format(route_filter=route_filter, **self.__dict__)
 
         return seg_groupby
 
-    def sql_route_groupby(self, routes):
+    def sql_route_groupby(self):
         sql_select = 'SELECT t1.{routeid_col}, \n' \
                      'SUM(t1.{segment_len_col}) AS {total_len_col}, \n' \
                      'AVG(t1.{lane_width}) AS {lane_width}, \n'.format(**self.__dict__)
@@ -340,7 +347,7 @@ class WidthSummary(RNISummary):
 
         sql_select += statement
 
-        sql_select += " FROM( \n" + self.sql_segment_groupby(routes=routes) + ") t1 \n " \
+        sql_select += " FROM( \n" + self.sql_segment_groupby() + ") t1 \n " \
                                                                                           "GROUP BY t1.{routeid_col}".\
             format(**self.__dict__)
 
@@ -360,10 +367,12 @@ class RoadTypeSummary(RNISummary):
         groups = type_group_df['ROAD_TYPE_GROUP'].unique().tolist()
         columns = [self.road_type_col_pref + str(x) for x in groups]
 
+        if sql:
+            query = self.sql_route_groupby()  # The same query for every route chunk.
+
         for route in self.route_selection:
             if sql:
-                query = self.sql_route_groupby(route)
-                result = self.execute_sql(query)
+                result = self.execute_sql(query, params=self.route_params(route))
             else:
                 df = self.rni_route_df(route)
 
@@ -409,24 +418,18 @@ class RoadTypeSummary(RNISummary):
                 self._write_to_df(result, self.output_table)
                 print str(self.route_selection.index(route)+1) + "/" + str(len(self.route_selection))
 
-    def _sql_segment_groupby(self, routes):
-        if (type(routes) == str) or (type(routes) == unicode):
-            pass
-        elif type(routes) == list:
-            routes = [str(_) for _ in routes]
-            routes = str(routes).strip('[').strip(']')
-        else:
-            raise (Exception('Input routes is neither a str or list'))  # Raise an exception.
+    def _sql_segment_groupby(self):
+        route_filter = sql_database().route_filter(self.routeid_col)
 
         seg_groupby = "SELECT {routeid_col}, {from_m_col}, MAX({to_m_col}) AS {to_m_col}, " \
                       "MAX({road_type_col}) AS {road_type_col}, MAX({segment_len_col}) AS {segment_len_col}\n" \
                       "FROM {table_name} \n" \
-                      "WHERE {routeid_col} IN ({routes}) \n" \
-                      "GROUP BY {routeid_col}, {from_m_col}".format(routes=routes, **self.__dict__)
+                      "WHERE {route_filter} \n" \
+                      "GROUP BY {routeid_col}, {from_m_col}".format(route_filter=route_filter, **self.__dict__)
 
         return seg_groupby
 
-    def sql_route_groupby(self, routes):
+    def sql_route_groupby(self):
         sql_select = 'SELECT t1.{routeid_col}, \n' \
                      'SUM(t1.{segment_len_col}) AS {total_len_col}\n'.format(**self.__dict__)
 
@@ -442,7 +445,7 @@ class RoadTypeSummary(RNISummary):
                                     **self.__dict__)
             sql_select += statement
 
-        sql_select += " FROM( \n" + self._sql_segment_groupby(routes=routes) + ") t1 \n " \
+        sql_select += " FROM( \n" + self._sql_segment_groupby() + ") t1 \n " \
                                                                                         "GROUP BY t1.{routeid_col}".\
             format(**self.__dict__)
 
@@ -485,10 +488,12 @@ class SurfaceTypeSummary(RNISummary):
         surfaces = surface_g_df[pivot_surface_type].tolist()
         surface_order = surface_g_df.groupby(['_surface_type'])['order'].max().reset_index(name='order')
 
+        if sql:
+            query = self.sql_route_groupby(lkm=lkm)  # The same query for every route chunk.
+
         for route in self.route_selection:
             if sql:
-                query = self.sql_route_groupby(routes=route, lkm=lkm)
-                result = self.execute_sql(query)
+                result = self.execute_sql(query, params=self.route_params(route))
             else:
                     df = self.rni_route_df(route)
 
@@ -521,31 +526,25 @@ class SurfaceTypeSummary(RNISummary):
                 self._write_to_df(result, self.output_table)
                 print str(self.route_selection.index(route)+1) + "/" + str(len(self.route_selection))
 
-    def _sql_segment_groupby(self, routes, lkm=False):
-        if (type(routes) == str) or (type(routes) == unicode):
-            pass
-        elif type(routes) == list:
-            routes = [str(_) for _ in routes]
-            routes = str(routes).strip('[').strip(']')
-        else:
-            raise (Exception('Input routes is neither a str or list'))  # Raise an exception.
+    def _sql_segment_groupby(self, lkm=False):
+        route_filter = sql_database().route_filter(self.routeid_col)
 
         if lkm:
             seg_groupby = "SELECT {routeid_col}, {from_m_col}, {to_m_col}, " \
                           "{surf_type_col}, {segment_len_col}\n" \
                           "FROM {table_name} \n" \
-                          "WHERE {routeid_col} IN ({routes}) \n".format(routes=routes, **self.__dict__)
+                          "WHERE {route_filter} \n".format(route_filter=route_filter, **self.__dict__)
 
         else:
             seg_groupby = "SELECT {routeid_col}, {from_m_col}, MAX({to_m_col}) AS {to_m_col}, " \
                           "MAX({surf_type_col}) AS {surf_type_col}, MAX({segment_len_col}) AS {segment_len_col}\n" \
                           "FROM {table_name} \n" \
-                          "WHERE {routeid_col} IN ({routes}) \n" \
-                          "GROUP BY {routeid_col}, {from_m_col}".format(routes=routes, **self.__dict__)
+                          "WHERE {route_filter} \n" \
+                          "GROUP BY {routeid_col}, {from_m_col}".format(route_filter=route_filter, **self.__dict__)
 
         return seg_groupby
 
-    def sql_route_groupby(self, routes, lkm=False):
+    def sql_route_groupby(self, lkm=False):
         sql_select = 'SELECT t1.{routeid_col}, \n' \
                      'SUM(t1.{segment_len_col}) AS {total_len_col}\n'.format(**self.__dict__)
 
@@ -561,7 +560,7 @@ class SurfaceTypeSummary(RNISummary):
                                     **self.__dict__)
             sql_select += statement
 
-        sql_select += " FROM( \n" + self._sql_segment_groupby(routes=routes, lkm=lkm) + ") t1 \n " \
+        sql_select += " FROM( \n" + self._sql_segment_groupby(lkm=lkm) + ") t1 \n " \
                                                                                           "GROUP BY t1.{routeid_col}".\
             format(**self.__dict__)
 
@@ -0,0 +1,2 @@
+from backend import StorageBackend, storage_backend
+from database import SQLDatabase, sql_database
@@ -0,0 +1,89 @@
+from SMD_Package.load_config import SMDConfigs
+from abc import ABCMeta, abstractmethod
+import os
+
+
+class StorageBackend(object):
+    """
+    Base class for the event table storage backend. The backend is responsible for reading a table or feature class
+    from the storage and return it as a Pandas DataFrame.
+    """
+    __metaclass__ = ABCMeta
+    backend_type = None
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    @abstractmethod
+    def read(self, table, search_field, route_selection, route_identifier, connection=None, is_table=False,
+             include_all=False, sql_prefix=None, sql_postfix=None, add_date_query=False, from_date='FROMDATE',
+             to_date='TODATE', replace_null=True, date=None):
+        """
+        Read the requested table and return it as Pandas DataFrame. Every backend implementation has to override this
+        method and follow the event_fc_to_df parameter semantic.
+        :return: Pandas DataFrame.
+        """
+        pass
+
+    @staticmethod
+    def route_list(route_selection):
+        """
+        Normalize the route selection into list of route string.
+        :param route_selection: The route selection, either 'ALL', a single route or list of route.
+        :return: None if the route selection is 'ALL', otherwise list of route.
+        """
+        if route_selection == 'ALL':
+            return None
+        elif type(route_selection) == str or type(route_selection) == unicode:
+            return [str(route_selection)]
+        elif type(route_selection) == list:
+            return [str(x) for x in route_selection]
+        else:
+            raise TypeError("Route selection is neither list or string.")
+
+
+_backend_types = ['sde', 'sqlite']
+_backend_cache = dict()
+
+
+def storage_backend(config=None):
+    """
+    Return the storage backend specified in the SMD config file "storage_backend" key. If the key does not exist then
+    the SDE backend will be used. The backend object is cached for each configuration.
+    :param config: The backend config dictionary, if None then the config will be loaded from SMD config file.
+    :return: StorageBackend object.
+    """
+    if config is None:
+        if None in _backend_cache:  # The default backend is already loaded
+            return _backend_cache[None]
+
+        smd_config = SMDConfigs()
+        default_config = getattr(smd_config, 'storage_backend', {'type': 'sde'})
+        _backend_cache[None] = storage_backend(default_config)
+
+        return _backend_cache[None]
+
+    backend_type = str(config.get('type', 'sde')).lower()
+    cache_key = (backend_type, config.get('path'))
+
+    if cache_key in _backend_cache:
+        return _backend_cache[cache_key]
+
+    if backend_type == 'sde':
+        from sde import SDEBackend
+        backend = SDEBackend(**config)
+    elif backend_type == 'sqlite':
+        from sqlite import SQLiteBackend
+        db_path = config.get('path')
+
+        if db_path is None:
+            raise ValueError("SQLite storage backend requires 'path' key.")
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(SMDConfigs.smd_dir(), db_path)
+
+        backend = SQLiteBackend(db_path)
+    else:
+        raise ValueError("{0} is not a valid storage backend. Use one of {1}.".format(backend_type, _backend_types))
+
+    _backend_cache[cache_key] = backend
+    return backend
@@ -0,0 +1,148 @@
+from SMD_Package.load_config import SMDConfigs
+from abc import ABCMeta, abstractmethod
+import pandas as pd
+import os
+
+
+class SQLDatabase(object):
+    """
+    Base class for the SQL database used by the SQL based summary (such as KemantapanSQL and RNISummary). The database
+    lends a DB-API 2.0 connection for every query, so the same generated SQL can be executed in the Oracle database or
+    in a local stand-in database.
+    """
+    __metaclass__ = ABCMeta
+    database_type = None
+
+    def __init__(self, arraysize=1000, **kwargs):
+        """
+        Class initialization.
+        :param arraysize: The number of rows fetched from the database in a single round trip.
+        """
+        self.arraysize = arraysize
+        self.kwargs = kwargs
+
+    @abstractmethod
+    def acquire(self):
+        """
+        Borrow a DB-API connection. Every database implementation has to override this method.
+        :return: DB-API connection object.
+        """
+        pass
+
+    def release(self, connection):
+        """
+        Return the borrowed connection.
+        :param connection: The connection from acquire.
+        :return:
+        """
+        connection.close()
+
+    @abstractmethod
+    def array_select(self, name):
+        """
+        The subquery which selects every value of an array bind parameter, used for filtering the rows with
+        "column IN (subquery)" while the SQL text is not changed by the number of value. Every database implementation
+        has to override this method.
+        :param name: The bind parameter name.
+        :return: SQL string.
+        """
+        pass
+
+    @abstractmethod
+    def array_bind(self, connection, values):
+        """
+        Convert list of value into the array bind parameter value used by array_select.
+        :param connection: The connection from acquire.
+        :param values: List of value.
+        :return: The bind parameter value.
+        """
+        pass
+
+    def route_filter(self, column, name='routes'):
+        """
+        The WHERE clause condition which filters the column value with the route array bind parameter.
+        :param column: The route column.
+        :param name: The bind parameter name.
+        :return: SQL string.
+        """
+        return "{0} IN ({1})".format(column, self.array_select(name))
+
+    def read_sql(self, query, params=None):
+        """
+        Execute the SQL query and return the result as Pandas DataFrame. A list parameter value is bound as an array
+        (see array_select).
+        :param query: SQL string.
+        :param params: SQL bind parameter dictionary.
+        :return: Pandas DataFrame.
+        """
+        connection = self.acquire()
+
+        try:
+            cursor = connection.cursor()
+            cursor.arraysize = self.arraysize
+
+            if params is None:
+                cursor.execute(query)
+            else:
+                params = {key: (self.array_bind(connection, value) if type(value) in [list, tuple] else value)
+                          for key, value in params.items()}
+                cursor.execute(query, params)
+
+            columns = [x[0] for x in cursor.description]
+            df = pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+            cursor.close()
+        finally:
+            self.release(connection)
+
+        return df
+
+
+_database_types = ['oracle', 'sqlite']
+_database_cache = dict()
+
+
+def sql_database(config=None):
+    """
+    Return the SQL database specified in the SMD config file "sql_database" key. If the key does not exist then the
+    Oracle database from the "smd_database" key will be used. The database object (and its session pool) is cached
+    for each configuration within a process.
+    :param config: The database config dictionary, if None then the config will be loaded from SMD config file.
+    :return: SQLDatabase object.
+    """
+    pid = os.getpid()  # The session pool can not be shared with the forked worker process.
+
+    if config is None:
+        if (None, pid) in _database_cache:  # The default database is already loaded
+            return _database_cache[(None, pid)]
+
+        default_config = getattr(SMDConfigs(), 'sql_database', {'type': 'oracle'})
+        _database_cache[(None, pid)] = sql_database(default_config)
+
+        return _database_cache[(None, pid)]
+
+    database_type = str(config.get('type', 'oracle')).lower()
+    cache_key = (database_type, config.get('path'), pid)
+
+    if cache_key in _database_cache:
+        return _database_cache[cache_key]
+
+    if database_type == 'oracle':
+        from oracle import OracleDatabase
+        connection_config = dict(SMDConfigs().smd_database)
+        connection_config.update(config)
+        database = OracleDatabase(**connection_config)
+    elif database_type == 'sqlite':
+        from sqlite import SQLiteDatabase
+        db_path = config.get('path')
+
+        if db_path is None:
+            raise ValueError("SQLite database requires 'path' key.")
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(SMDConfigs.smd_dir(), db_path)
+
+        database = SQLiteDatabase(db_path, **dict((k, v) for k, v in config.items() if k != 'path'))
+    else:
+        raise ValueError("{0} is not a valid SQL database. Use one of {1}.".format(database_type, _database_types))
+
+    _database_cache[cache_key] = database
+    return database
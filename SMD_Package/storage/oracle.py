@@ -0,0 +1,55 @@
+import cx_Oracle
+from database import SQLDatabase
+
+
+class OracleDatabase(SQLDatabase):
+    """
+    Oracle database with a process-wide session pool. The connection is borrowed from the pool for every query and
+    returned after the query result is fetched. The array bind parameter is bound as a SYS.ODCIVARCHAR2LIST
+    collection, so the statement text (and its cached plan) is the same for every route selection.
+    """
+    database_type = 'oracle'
+    array_type = 'SYS.ODCIVARCHAR2LIST'
+
+    def __init__(self, ip_address, port, service_name, username, password, min_sessions=1, max_sessions=4,
+                 session_increment=1, arraysize=1000, **kwargs):
+        """
+        Class initialization, the session pool is created on the first query.
+        :param ip_address: The database host.
+        :param port: The database port.
+        :param service_name: The database service name.
+        :param username: The database user.
+        :param password: The database user password.
+        :param min_sessions: The minimum number of session in the pool.
+        :param max_sessions: The maximum number of session in the pool.
+        :param session_increment: The number of session opened when the pool needs more session.
+        :param arraysize: The number of rows fetched from the database in a single round trip.
+        """
+        super(OracleDatabase, self).__init__(arraysize=arraysize, **kwargs)
+        self.dsn = cx_Oracle.makedsn(ip_address, port, service_name=service_name)
+        self.username = username
+        self.password = password
+        self.min_sessions = int(min_sessions)
+        self.max_sessions = int(max_sessions)
+        self.session_increment = int(session_increment)
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = cx_Oracle.SessionPool(self.username, self.password, self.dsn, self.min_sessions,
+                                               self.max_sessions, self.session_increment, threaded=True)
+
+        return self._pool
+
+    def acquire(self):
+        return self.pool.acquire()
+
+    def release(self, connection):
+        self.pool.release(connection)
+
+    def array_select(self, name):
+        return "SELECT COLUMN_VALUE FROM TABLE(:{0})".format(name)
+
+    def array_bind(self, connection, values):
+        return connection.gettype(self.array_type).newobject([str(x) for x in values])
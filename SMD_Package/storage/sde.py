@@ -0,0 +1,100 @@
+from arcpy import da, env, ListFields
+from pandas import DataFrame
+import numpy as np
+from backend import StorageBackend
+
+
+class SDEBackend(StorageBackend):
+    """
+    Storage backend for reading table or feature class from the ArcGIS SDE instance.
+    """
+    backend_type = 'sde'
+    in_list_limit = 1000  # The maximum number of value in an Oracle IN list
+
+    @classmethod
+    def route_where_clause(cls, route_identifier, routes):
+        """
+        Create the route selection where clause. The DataAccess where clause does not support bind variable, so the
+        routes is sorted (the same selection creates the same statement) and split into IN lists within the Oracle IN
+        list limit.
+        :param route_identifier: The RouteID column.
+        :param routes: List of route.
+        :return: String.
+        """
+        routes = sorted(set(routes))
+        in_lists = ["{0} IN ({1})".format(route_identifier, str(routes[x: x+cls.in_list_limit]).strip('[]'))
+                    for x in range(0, len(routes), cls.in_list_limit)] or ["{0} IN ('')".format(route_identifier)]
+
+        return "({0})".format(' OR '.join(in_lists))
+
+    def read(self, table, search_field, route_selection, route_identifier, connection=None, is_table=False,
+             include_all=False, sql_prefix=None, sql_postfix=None, add_date_query=False, from_date='FROMDATE',
+             to_date='TODATE', replace_null=True, date=None):
+        """
+        Read the SDE table or feature class using the DataAccess module.
+        :param table: GeoDataBase table or FeatureClass to be converted as pandas DataFrame.
+        :param search_field: The field which will be included in the Pandas DataFrame.
+        :param route_selection: The selected route to be included in the Pandas DataFrame.
+        :param route_identifier: The RouteID column in the GeoDataBase table or FeatureClass.
+        :param connection: The SDE Instance for accessing the FeatureClass.
+        :param is_table: If True then the requested table are a table without geometry.
+        :param include_all: If True then features with null geometry will also be included.
+        :param sql_prefix: SQL prefix used in the cursor SQL clause.
+        :param sql_postfix: SQL postfix used in the cursor SQL clause.
+        :param add_date_query: If True then date query statement will be added.
+        :param from_date: The From Date column.
+        :param to_date: The To Date column.
+        :param replace_null: If True then all Null value will be replaced with -9999
+        :param date: Date value for the date query, if None then CURRENT_TIMESTAMP will be used.
+        :return: Pandas DataFrame.
+        """
+        if connection is not None:
+            env.workspace = connection  # The workspace for accessing the SDE Feature Class
+
+        # Create the where_clause for DataAccess module
+        if route_selection == 'ALL':  # If the requested route is 'ALL' then there is no where_clause
+            where_clause = None
+        else:
+            where_clause = self.route_where_clause(route_identifier, self.route_list(route_selection))
+
+        # Modify the where_clause to prevent null event row with null segment to be included
+        if is_table:  # If the inputted is an SDE Table without geometry then include all records
+            pass
+        elif not include_all and (route_selection != 'ALL'):
+            where_clause += "AND (SHAPE.LEN IS NOT NULL)"
+        elif not include_all and (route_selection == 'ALL'):
+            where_clause = 'SHAPE.LEN IS NOT NULL'
+
+        if add_date_query and (date is None):  # If True, then add the date query statement.
+            date_query = "AND ({0} is null or {0}<=CURRENT_TIMESTAMP) and ({1} is null or {1}>CURRENT_TIMESTAMP)".\
+                format(from_date, to_date)
+            where_clause += date_query
+        elif add_date_query:
+            date_query = "AND ({0} is null or {0}<={2}) and ({1} is null or {1}>{2})".\
+                format(from_date, to_date, 'time_stamp ' + str(date))
+            where_clause += date_query
+
+        # Create the sql_clause for DataAccess module
+        sql_clause = (sql_prefix, sql_postfix)
+
+        # Find shape field in the search_field, if exist then pop it
+        if search_field == '*':
+            lf = ListFields(table)
+            search_field = [x.name for x in lf]
+
+        if type(search_field) == list:
+            search_field = [x for x in search_field if 'shape' not in x.lower()]
+
+        if replace_null:
+            # Create the numpy array of the requested table or feature class from GeoDataBase
+            table_search = da.FeatureClassToNumPyArray(table, search_field, where_clause=where_clause,
+                                                       sql_clause=sql_clause, null_value=-9999)
+        else:
+            table_search = da.FeatureClassToNumPyArray(table, search_field, where_clause=where_clause,
+                                                       sql_clause=sql_clause)
+
+        # Creating DataFrame from the numpy array
+        df = DataFrame(table_search)
+        df.replace(-9999, np.nan, inplace=True)
+
+        return df
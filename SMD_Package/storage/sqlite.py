@@ -0,0 +1,161 @@
+from pandas import read_sql
+import numpy as np
+from collections import Counter
+import sqlite3
+import json
+from backend import StorageBackend
+from database import SQLDatabase
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Storage backend for reading a local SQLite snapshot of the SDE tables. The snapshot table uses the same name as
+    the SDE table (including the owner prefix, e.g. "SMD.RNI_2020") and the same column names. Feature class geometry
+    length is stored in the SHAPE_LEN column.
+    """
+    backend_type = 'sqlite'
+    shape_len_col = 'SHAPE_LEN'
+
+    def __init__(self, db_path, **kwargs):
+        super(SQLiteBackend, self).__init__(**kwargs)
+        self.db_path = db_path
+
+    def connect(self):
+        """
+        Create connection to the SQLite snapshot file.
+        :return: SQLite connection object.
+        """
+        return sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+
+    def table_columns(self, table, connection):
+        """
+        List all the column available in the snapshot table.
+        :param table: The table name.
+        :param connection: SQLite connection object.
+        :return: List of column name.
+        """
+        cursor = connection.execute('PRAGMA table_info("{0}")'.format(table))
+        columns = [str(row[1]) for row in cursor.fetchall()]
+
+        if len(columns) == 0:
+            raise ValueError("{0} does not exist in {1}.".format(table, self.db_path))
+
+        return columns
+
+    def read(self, table, search_field, route_selection, route_identifier, connection=None, is_table=False,
+             include_all=False, sql_prefix=None, sql_postfix=None, add_date_query=False, from_date='FROMDATE',
+             to_date='TODATE', replace_null=True, date=None):
+        """
+        Read the snapshot table with a query equivalent to the SDE DataAccess where clause. The route selection and
+        date value are passed as bind parameters.
+        :return: Pandas DataFrame.
+        """
+        con = self.connect()
+
+        try:
+            table_columns = self.table_columns(table, con)
+
+            if search_field == '*':
+                search_field = table_columns
+            elif type(search_field) != list:
+                search_field = [search_field]
+
+            search_field = [x for x in search_field if 'shape' not in x.lower()]
+            where_clause = list()
+            params = list()
+
+            routes = self.route_list(route_selection)
+            if routes is not None:
+                where_clause.append('("{0}" IN ({1}))'.format(route_identifier, ', '.join(['?'] * len(routes))))
+                params += routes
+
+            # The SHAPE_LEN column only exists for feature class snapshot.
+            if (not is_table) and (not include_all) and (self.shape_len_col in table_columns):
+                where_clause.append('("{0}" IS NOT NULL)'.format(self.shape_len_col))
+
+            if add_date_query:
+                if date is None:
+                    date_value = 'CURRENT_TIMESTAMP'
+                else:
+                    date_value = '?'
+                    params += [str(date), str(date)]
+
+                where_clause.append('("{0}" IS NULL OR "{0}"<={2}) AND ("{1}" IS NULL OR "{1}">{2})'.
+                                    format(from_date, to_date, date_value))
+
+            query = 'SELECT {0} {1} FROM "{2}"'.format(sql_prefix or '',
+                                                      ', '.join(['"{0}"'.format(x) for x in search_field]),
+                                                      table)
+
+            if len(where_clause) != 0:
+                query += ' WHERE ' + ' AND '.join(where_clause)
+            if sql_postfix is not None:
+                query += ' ' + sql_postfix
+
+            df = read_sql(query, con, params=params)
+        finally:
+            con.close()
+
+        # The same null handling as the SDE backend FeatureClassToNumPyArray null_value=-9999 read.
+        if replace_null:
+            df = df.fillna(-9999)
+
+        df.replace(-9999, np.nan, inplace=True)
+
+        return df
+
+
+class _StatsMode(object):
+    """
+    SQLite aggregate equivalent to the Oracle STATS_MODE function, the smallest value is returned for a tie.
+    """
+    def __init__(self):
+        self.counter = Counter()
+
+    def step(self, value):
+        if value is not None:
+            self.counter[value] += 1
+
+    def finalize(self):
+        if len(self.counter) == 0:
+            return None
+
+        max_count = max(self.counter.values())
+        return min(x for x, count in self.counter.items() if count == max_count)
+
+
+class SQLiteDatabase(SQLDatabase):
+    """
+    Local SQLite stand-in for the Oracle database, used for executing the generated summary SQL in tests and
+    benchmarks. The database file is attached under every table owner name (such as SMD and ELRS), so the owner
+    prefixed table name in the generated SQL (e.g. SMD.RNI_2020) refers to the RNI_2020 table in the database file.
+    The Oracle functions used by the generated SQL are registered as SQLite functions, and the array bind parameter
+    is bound as a JSON array.
+    """
+    database_type = 'sqlite'
+
+    def __init__(self, db_path, schemas=('SMD', 'ELRS'), arraysize=1000, **kwargs):
+        """
+        Class initialization.
+        :param db_path: The SQLite file path.
+        :param schemas: The table owner names.
+        :param arraysize: The number of rows fetched in a single round trip.
+        """
+        super(SQLiteDatabase, self).__init__(arraysize=arraysize, **kwargs)
+        self.db_path = db_path
+        self.schemas = list(schemas)
+
+    def acquire(self):
+        connection = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        connection.create_aggregate('STATS_MODE', 1, _StatsMode)
+
+        for schema in self.schemas:
+            connection.execute('ATTACH DATABASE ? AS "{0}"'.format(schema), [self.db_path])
+
+        return connection
+
+    def array_select(self, name):
+        return "SELECT value FROM json_each(:{0})".format(name)
+
+    def array_bind(self, connection, values):
+        return json.dumps([str(x) for x in values])
@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from SMD_Package.event_table.checks.pipeline import CheckStep
+from SMD_Package.event_table.checks.runner import step_levels, route_shards
+import pandas as pd
+
+
+class TestStepLevels(TestCase):
+
+    @staticmethod
+    def level_names(levels):
+        return [[step.name for step in level] for level in levels]
+
+    def test_depends(self):
+        steps = [
+            CheckStep('year_and_semester_check', gate='hard'),
+            CheckStep('range_domain_check'),
+            CheckStep('segment_len_check', depends=[]),
+            CheckStep('segment_duplicate_check'),
+            CheckStep('lane_code_check', depends=['segment_duplicate_check'])
+        ]
+
+        self.assertEqual(self.level_names(step_levels(steps)), [['year_and_semester_check'],
+                                                                ['range_domain_check', 'segment_len_check'],
+                                                                ['segment_duplicate_check'],
+                                                                ['lane_code_check']])
+
+    def test_serial(self):
+        steps = [
+            CheckStep('range_domain_check', depends=[]),
+            CheckStep('coordinate_check', depends=[]),  # Serial by default
+            CheckStep('segment_len_check', depends=[]),
+            CheckStep('lane_code_check', depends=[]),
+            CheckStep('lane_sequence_check', depends=[], serial=True)
+        ]
+
+        self.assertTrue(steps[1].serial)
+        self.assertFalse(steps[0].serial)
+        self.assertEqual(self.level_names(step_levels(steps)), [['range_domain_check'],
+                                                                ['coordinate_check'],
+                                                                ['segment_len_check', 'lane_code_check'],
+                                                                ['lane_sequence_check']])
+
+    def test_empty(self):
+        self.assertEqual(step_levels(list()), list())
+
+
+class TestRouteShards(TestCase):
+
+    def test_balanced_shards(self):
+        df = pd.DataFrame({'LINKID': ['A']*6 + ['B']*4 + ['C']*3 + ['D']*2 + ['E']})
+        shards = route_shards(df, ['A', 'B', 'C', 'D', 'E', 'F'], 2)
+
+        self.assertEqual(shards, [['A', 'D', 'F'], ['B', 'C', 'E']])
+        self.assertEqual(sorted(sum(shards, list())), ['A', 'B', 'C', 'D', 'E', 'F'])
+
+    def test_shard_count(self):
+        df = pd.DataFrame({'LINKID': ['A', 'B']})
+
+        self.assertEqual(route_shards(df, ['A', 'B'], 4), [['A'], ['B']])
+        self.assertEqual(route_shards(df, list(), 4), list())
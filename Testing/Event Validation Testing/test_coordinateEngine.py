@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from SMD_Package.event_table.checks.coordinate import RouteLine
+import numpy as np
+
+# The WGS84 meridian radius of curvature at the equator a(1-e^2), the length of 0.001 degree latitude is
+# 6335439.327 * pi/180 * 0.001 = 110.5743 Meters.
+EQUATOR_ARC = 6335439.327*np.pi/180
+
+
+class TestRouteLine(TestCase):
+
+    @staticmethod
+    def equator_line():
+        # A straight route along the equator from 0 to 0.01 degree longitude with M-value from 0 to 1.
+        return RouteLine([0, 0.005, 0.01], [0, 0, 0], [0, 0.5, 1])
+
+    def test_locate_center(self):
+        line = self.equator_line()
+        distance, measure = line.locate([0.005], [0.001])
+
+        # The point is on the projection central meridian, so the distance is the meridian arc length.
+        self.assertAlmostEqual(distance[0], EQUATOR_ARC*0.001, places=3)
+        self.assertAlmostEqual(measure[0], 0.5, places=6)
+
+    def test_locate_offset(self):
+        line = self.equator_line()
+        distance, measure = line.locate([0.0025, 0.0075], [-0.002, 0.0005])
+
+        np.testing.assert_allclose(distance, [EQUATOR_ARC*0.002, EQUATOR_ARC*0.0005], atol=1e-3)
+        np.testing.assert_allclose(measure, [0.25, 0.75], atol=1e-6)
+
+    def test_locate_beyond_end(self):
+        line = self.equator_line()
+        distance, measure = line.locate([0.011], [0])
+
+        # The nearest point is the route end point, the distance is 0.001 degree of the equator.
+        self.assertAlmostEqual(distance[0], 6378137.0*np.pi/180*0.001, places=2)
+        self.assertAlmostEqual(measure[0], 1, places=6)
+
+    def test_invalid_point(self):
+        distance, measure = self.equator_line().locate([np.nan], [0])
+
+        self.assertTrue(np.isnan(distance[0]))
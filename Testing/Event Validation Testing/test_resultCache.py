@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from SMD_Package.event_table.checks.result_cache import route_hashes, route_index_hashes
+import pandas as pd
+
+
+class TestRouteHashes(TestCase):
+
+    @staticmethod
+    def input_df():
+        return pd.DataFrame({
+            'LINKID': ['A', 'A', 'B', 'B', 'C'],
+            'STA_FROM': [0, 100, 0, 100, 0],
+            'STA_TO': [100, 200, 100, 200, 100],
+            'LANE_CODE': ['L1', 'L1', 'L1', 'R1', 'L1'],
+            'IRI': [2.1, 3.4, 5.0, 4.2, 6.3]
+        })
+
+    def test_inserted_row(self):
+        df = self.input_df()
+        routes = ['A', 'B', 'C']
+        before = route_hashes(df, routes)
+
+        # Insert a row in route A, the next rows index is shifted.
+        inserted = pd.DataFrame({'LINKID': ['A'], 'STA_FROM': [200], 'STA_TO': [300], 'LANE_CODE': ['L1'],
+                                 'IRI': [2.8]})
+        df = pd.concat([df.iloc[:2], inserted, df.iloc[2:]], sort=False).reset_index(drop=True)
+        after = route_hashes(df, routes)
+
+        self.assertNotEqual(before['A'], after['A'])
+        self.assertEqual(before['B'], after['B'])
+        self.assertEqual(before['C'], after['C'])
+
+        # The row index of route B and C is changed.
+        self.assertNotEqual(route_index_hashes(self.input_df(), routes)['B'], route_index_hashes(df, routes)['B'])
+
+    def test_row_order(self):
+        df = self.input_df()
+        shuffled = df.iloc[[3, 0, 4, 2, 1]].reset_index(drop=True)
+
+        self.assertEqual(route_hashes(df, ['A', 'B', 'C']), route_hashes(shuffled, ['A', 'B', 'C']))
+
+    def test_changed_value(self):
+        df = self.input_df()
+        changed = df.copy()
+        changed.loc[3, 'IRI'] = 4.3
+
+        before = route_hashes(df, ['A', 'B'])
+        after = route_hashes(changed, ['A', 'B'])
+
+        self.assertEqual(before['A'], after['A'])
+        self.assertNotEqual(before['B'], after['B'])
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from SMD_Package.event_table.checks.coordinate.segment_index import SegmentIndex
+import pandas as pd
+import numpy as np
+
+
+class TestSegmentIndex(TestCase):
+
+    @staticmethod
+    def input_index():
+        ref_df = pd.DataFrame({
+            'FROM_STA': [0, 0, 100, 100, 0],
+            'TO_STA': [100, 100, 200, 200, 100],
+            'LANE_CODE': ['L1', 'R1', 'L1', 'L1', 'L1'],
+            'STATO_LONG': [110.1, 110.2, 110.3, 110.4, 110.5],
+            'STATO_LAT': [-7.1, -7.2, -7.3, -7.4, -7.5]
+        })
+
+        return SegmentIndex(ref_df, 'FROM_STA', 'TO_STA', 'LANE_CODE', 'STATO_LONG', 'STATO_LAT')
+
+    def test_lookup(self):
+        index = self.input_index()
+
+        self.assertEqual(len(index), 3)  # The duplicate segment is only indexed once
+        self.assertEqual(index.lookup([100, 0, 0, 200], [200, 100, 100, 300], ['L1', 'R1', 'L1', 'L1']).tolist(),
+                         [2, 1, 0, -1])
+
+    def test_coordinates(self):
+        lon, lat = self.input_index().coordinates([0, 100, 100], [100, 200, 200], ['L1', 'L1', 'R1'])
+
+        # The first row of the duplicate segment is used.
+        np.testing.assert_array_equal(lon, [110.1, 110.3, np.nan])
+        np.testing.assert_array_equal(lat, [-7.1, -7.3, np.nan])
+
+    def test_empty_reference(self):
+        ref_df = pd.DataFrame(columns=['FROM_STA', 'TO_STA', 'LANE_CODE', 'STATO_LONG', 'STATO_LAT'])
+        index = SegmentIndex(ref_df, 'FROM_STA', 'TO_STA', 'LANE_CODE', 'STATO_LONG', 'STATO_LAT')
+        lon, lat = index.coordinates([0, 100], [100, 200], ['L1', 'L1'])
+
+        self.assertEqual(len(index), 0)
+        self.assertTrue(np.isnan(lon).all() and np.isnan(lat).all())
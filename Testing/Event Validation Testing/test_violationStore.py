@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from SMD_Package.event_table.checks.violation import ViolationStore
+
+
+class TestViolationStore(TestCase):
+
+    @staticmethod
+    def input_store():
+        store = ViolationStore()
+        store.append('01001', 'ToBeReviewed', 'Rute {route} segmen {from_m}-{to_m}', {'route': '01001', 'from_m': 0,
+                                                                                    'to_m': 100},
+                     check='coordinate_check', from_m=0, to_m=100, lane='L1')
+        store.append('01002', 'error', 'Rute 01002 tidak memiliki data')
+        store.append('01001', 'error', 'Rute 01001 error', check='range_domain_check')
+        store.append('01002', 'error', 'Rute 01002 error kedua')
+        store.append('01003', 'VerifiedWithWarning', 'Rute 01003 warning')
+
+        return store
+
+    def test_invalid_status(self):
+        self.assertRaises(ValueError, ViolationStore().append, '01001', 'warning', 'Rute 01001')
+
+    def test_messages(self):
+        store = self.input_store()
+
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.messages('error'), [('01001', 'Rute 01001 error'),
+                                                  ('01002', 'Rute 01002 tidak memiliki data'),
+                                                  ('01002', 'Rute 01002 error kedua')])
+        self.assertEqual(store.messages('ToBeReviewed'), [('01001', 'Rute 01001 segmen 0-100')])
+        self.assertEqual(store.records('01001')[0], ('ToBeReviewed', 'Rute 01001 segmen 0-100', 'coordinate_check',
+                                                     0, 100, 'L1'))
+        self.assertEqual(store.records('01004'), list())
+
+    def test_route_status(self):
+        store = self.input_store()
+
+        self.assertEqual(store.routes(), ['01001', '01002', '01003'])
+        self.assertEqual(store.failed_routes, ['01002', '01001'])  # The order of the first error
+        self.assertEqual(store.route_status('01001'), 'error')
+        self.assertEqual(store.route_status('01003'), 'VerifiedWithWarning')
+        self.assertIsNone(store.route_status('01004'))
+        self.assertEqual(store.count('01002', 'error'), 2)
+        self.assertEqual(store.count('01004', 'error'), 0)
+
+    def test_route_results(self):
+        store = self.input_store()
+        copied = ViolationStore.from_route_results(store.route_results())
+
+        self.assertEqual(copied.route_results(), store.route_results())
+        self.assertEqual(store.route_results()['01003']['VerifiedWithWarning'], ['Rute 01003 warning'])
+
+    def test_extend(self):
+        store = ViolationStore().append('01003', 'error', 'Rute 01003 error')
+        store.extend(self.input_store())
+
+        self.assertEqual(len(store), 6)
+        self.assertEqual(store.failed_routes, ['01003', '01002', '01001'])
+        self.assertEqual(store.records('01001'), self.input_store().records('01001'))
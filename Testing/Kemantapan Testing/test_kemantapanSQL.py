@@ -0,0 +1,144 @@
+from unittest import TestCase
+import os
+import sqlite3
+import tempfile
+
+from SMD_Package.event_table.kemantapan.kemantapan import KemantapanSQL
+from SMD_Package.storage import database
+from SMD_Package.storage.database import sql_database
+import pandas as pd
+
+
+class TestKemantapanSQL(TestCase):
+    """
+    Compare the SQL Kemantapan (executed on the SQLite stand-in database) with the in-memory Kemantapan for the same
+    input rows.
+    """
+    event_cols = ['LINKID', 'FROM_STA', 'TO_STA', 'LANE_CODE', 'IRI', 'PCI', 'SEGMENT_LENGTH']
+    rni_cols = ['LINKID', 'FROM_STA', 'TO_STA', 'LANE_CODE', 'SURF_TYPE']
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        database._database_cache[(None, os.getpid())] = sql_database({'type': 'sqlite', 'path': self.db_path})
+
+    def tearDown(self):
+        database._database_cache.pop((None, os.getpid()), None)
+        os.remove(self.db_path)
+
+    def write_tables(self, event_rows, rni_rows):
+        df_event = pd.DataFrame(event_rows, columns=self.event_cols)
+        df_rni = pd.DataFrame(rni_rows, columns=self.rni_cols)
+
+        con = sqlite3.connect(self.db_path)
+        df_event.to_sql('ROUGHNESS_2020', con, index=False)
+        df_rni.to_sql('RNI_2020', con, index=False)
+        con.close()
+
+        return df_event, df_rni
+
+    @staticmethod
+    def boundary_rows(values):
+        """
+        Single lane asphalt segments (surface type 4) with the requested grading value, the segment length is doubled
+        for every segment so every grade sum identifies the graded segments.
+        """
+        event_rows = list()
+        rni_rows = list()
+
+        for i, value in enumerate(values):
+            event_rows.append(['01001', i, i+1, 'L1', value, value, 2**i])
+            rni_rows.append(['01001', i*100, (i+1)*100, 'L1', 4])
+
+        return event_rows, rni_rows
+
+    def compare(self, kemantapan, df_event, df_rni, routes):
+        df_sql = kemantapan.df_sql(routes).sort_values('LINKID').reset_index(drop=True)
+        df_memory = kemantapan.df_memory(df_event, df_rni).sort_values('LINKID').reset_index(drop=True)
+        pd.testing.assert_frame_equal(df_sql, df_memory, check_dtype=False)
+
+        return df_sql
+
+    def test_iri_grade_bins(self):
+        df_event, df_rni = self.write_tables(*self.boundary_rows([4, 4.01, 8, 12, 12.01]))
+        kemantapan = KemantapanSQL('IRI', 'SMD.ROUGHNESS_2020', method='lane_based')
+        result = self.compare(kemantapan, df_event, df_rni, ['01001']).iloc[0]
+
+        self.assertEqual(result['P_GOOD_KM'], 1)  # 4
+        self.assertEqual(result['P_FAIR_KM'], 2+4)  # 4.01 and 8
+        self.assertEqual(result['P_POOR_KM'], 8)  # 12
+        self.assertEqual(result['P_BAD_KM'], 16)  # 12.01
+
+    def test_pci_grade_direction(self):
+        df_event, df_rni = self.write_tables(*self.boundary_rows([85, 84.9, 70, 55, 54.9]))
+        kemantapan = KemantapanSQL('PCI', 'SMD.ROUGHNESS_2020', method='lane_based')
+        result = self.compare(kemantapan, df_event, df_rni, ['01001']).iloc[0]
+
+        self.assertEqual(result['P_GOOD_KM'], 1)  # 85
+        self.assertEqual(result['P_FAIR_KM'], 2+4)  # 84.9 and 70
+        self.assertEqual(result['P_POOR_KM'], 8)  # 55
+        self.assertEqual(result['P_BAD_KM'], 16)  # 54.9
+
+    def test_surface_mode_tie(self):
+        event_rows = [
+            ['01001', 0, 1, 'L1', 11, 11, 1],
+            ['01001', 0, 1, 'R1', 11, 11, 1],
+            ['01001', 1, 2, 'L1', 9, 9, 2],
+            ['01001', 1, 2, 'R1', 9, 9, 2]
+        ]
+        rni_rows = [
+            # Surface type 1 (tanah) and 4 (asphal) have the same count, the smallest is selected.
+            ['01001', 0, 100, 'L1', 4],
+            ['01001', 0, 100, 'R1', 1],
+            ['01001', 0, 100, 'L2', 1],
+            ['01001', 0, 100, 'R2', 4],
+            # The null surface type is not counted.
+            ['01001', 100, 200, 'L1', None],
+            ['01001', 100, 200, 'R1', None],
+            ['01001', 100, 200, 'L2', 3]
+        ]
+        df_event, df_rni = self.write_tables(event_rows, rni_rows)
+
+        for method in ['mean', 'max']:
+            kemantapan = KemantapanSQL('IRI', 'SMD.ROUGHNESS_2020', method=method)
+            result = self.compare(kemantapan, df_event, df_rni, ['01001']).iloc[0]
+
+            self.assertEqual(result['UP_FAIR_KM'], 1)  # Tanah IRI 11
+            self.assertEqual(result['P_FAIR_KM'], 2)  # Penmac IRI 9
+            self.assertEqual(result['P_POOR_KM'], 0)  # Asphal IRI 11
+            self.assertEqual(result['TOTAL_LENGTH'], 3)
+
+        mode = KemantapanSQL.surface_mode(df_rni, ['LINKID', 'FROM_STA'], 'SURF_TYPE')
+        self.assertEqual(mode['SURF_TYPE'].tolist(), [1, 3])
+
+    def test_sql_all_methods(self):
+        event_rows = list()
+        rni_rows = list()
+        surf_types = [1, 3, 4, 21, None]
+
+        for route_index, route in enumerate(['01001', '01002', '02001']):
+            for i in range(6):
+                for lane_index, lane in enumerate(['L1', 'R1']):
+                    value = (i*7 + lane_index*5 + route_index*3) % 20 + 0.5
+                    length = None if (i == 5) and (lane == 'R1') else 0.1
+                    event_rows.append([route, i, i+1, lane, value, value*5, length])
+
+                    if route != '02001':  # Route without RNI
+                        rni_rows.append([route, i*100, (i+1)*100, lane, surf_types[(i+lane_index) % 5]])
+
+        self.write_tables(event_rows, rni_rows)
+        routes = ['01001', '01002', '02001']
+
+        for data_type in ['IRI', 'PCI']:
+            df_all = KemantapanSQL(data_type, 'SMD.ROUGHNESS_2020', method='all').df_sql_all(routes)
+            self.assertEqual(sorted(df_all[KemantapanSQL.method_column].unique()), sorted(KemantapanSQL.methods))
+
+            for method in KemantapanSQL.methods:
+                df_method = KemantapanSQL(data_type, 'SMD.ROUGHNESS_2020', method=method).df_sql(routes)
+                df_method = df_method.sort_values('LINKID').reset_index(drop=True)
+
+                selected = df_all.loc[df_all[KemantapanSQL.method_column] == method]
+                selected = selected.drop(KemantapanSQL.method_column, axis=1).sort_values('LINKID').\
+                    reset_index(drop=True)
+
+                pd.testing.assert_frame_equal(selected, df_method, check_dtype=False)
@@ -0,0 +1,57 @@
+from unittest import TestCase
+import datetime
+import os
+import tempfile
+
+from SMD_Package.TableWriter.change_log import RouteChangeLog
+
+
+class TestRouteChangeLog(TestCase):
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        self.log = RouteChangeLog(self.db_path)
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    @staticmethod
+    def route_dates(df):
+        return dict(zip(df['route'], df['update_date'].dt.to_pydatetime()))
+
+    def test_record(self):
+        first = datetime.datetime(2020, 1, 1, 10, 0, 0, 500)
+        second = datetime.datetime(2020, 2, 1)
+
+        self.log.record('smd.roughness_2020', ['01001', '01002'], first, 'IRI', 2020, 1)
+        self.log.record('SMD.ROUGHNESS_2020', ['01002'], second, 'IRI', 2020.0, 2)
+
+        dates = self.route_dates(self.log.route_dates('SMD.ROUGHNESS_2020'))
+        self.assertEqual(dates, {'01001': first, '01002': second})
+
+        dates = self.route_dates(self.log.route_dates('SMD.ROUGHNESS_2020', ['01002', '01003'], year=2020,
+                                                      semester=1))
+        self.assertEqual(dates, {'01002': first})
+
+    def test_route_chunk(self):
+        routes = [str(x) for x in range(RouteChangeLog.sqlite_max_vars*2 + 1)]
+        self.log.record('SMD.ROUGHNESS_2020', routes, datetime.datetime(2020, 1, 1))
+
+        self.assertEqual(len(self.log.route_dates('SMD.ROUGHNESS_2020', routes)), len(routes))
+
+    def test_seed(self):
+        recorded = datetime.datetime(2020, 3, 1)
+        self.log.record('SMD.ROUGHNESS_2020', ['01001'], recorded)
+
+        self.assertFalse(self.log.is_tracked('SMD.ROUGHNESS_2020'))
+        self.log.seed('SMD.ROUGHNESS_2020', [('01001', None, None, '2020-01-01'), ('01002', None, None, '2020-01-02'),
+                                             ('01003', None, None, None)], routes=['01001', '01002', '01003'])
+        self.assertFalse(self.log.is_tracked('SMD.ROUGHNESS_2020'))  # Only a part of the routes is seeded
+
+        self.log.seed('SMD.ROUGHNESS_2020', list())
+        self.assertTrue(self.log.is_tracked('smd.roughness_2020'))
+
+        # The seed does not replace the recorded update date.
+        dates = self.route_dates(self.log.route_dates('SMD.ROUGHNESS_2020'))
+        self.assertEqual(dates, {'01001': recorded, '01002': datetime.datetime(2020, 1, 2)})
@@ -0,0 +1,49 @@
+from unittest import TestCase
+import os
+import tempfile
+
+from SMD_Package.TableWriter.journal import WriteJournal
+import pandas as pd
+
+
+class TestWriteJournal(TestCase):
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        self.journal = WriteJournal(self.db_path)
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    @staticmethod
+    def input_df():
+        return pd.DataFrame({'LINKID': ['01001', '01002'], 'IRI': [2.5, 3.1], 'UPDATE_DATE': ['2020', '2020']})
+
+    def test_job_id(self):
+        df = self.input_df()
+        job_id = WriteJournal.job_id('SMD.sde', 'SMD.ROUGHNESS_2020', df, ['LINKID', 'IRI'])
+
+        # The column order and the row index does not change the job ID.
+        self.assertEqual(job_id, WriteJournal.job_id('SMD.sde', 'SMD.ROUGHNESS_2020', df.set_index('IRI', drop=False),
+                                                     ['IRI', 'LINKID']))
+        self.assertNotEqual(job_id, WriteJournal.job_id('SMD_dev.sde', 'SMD.ROUGHNESS_2020', df, ['LINKID', 'IRI']))
+        self.assertNotEqual(job_id, WriteJournal.job_id('SMD.sde', 'SMD.ROUGHNESS_2019', df, ['LINKID', 'IRI']))
+        self.assertNotEqual(job_id, WriteJournal.job_id('SMD.sde', 'SMD.ROUGHNESS_2020', df, ['LINKID', 'IRI'],
+                                                        batch_size=100))
+
+        df.loc[1, 'IRI'] = 3.2
+        self.assertNotEqual(job_id, WriteJournal.job_id('SMD.sde', 'SMD.ROUGHNESS_2020', df, ['LINKID', 'IRI']))
+
+    def test_committed_batches(self):
+        self.journal.commit('job1', 'SMD.ROUGHNESS_2020', 0, ['01001', '01002'])
+        self.journal.commit('job1', 'SMD.ROUGHNESS_2020', 1, ['01003'])
+        self.journal.commit('job1', 'SMD.ROUGHNESS_2020', 1, ['01003'])  # Retried batch
+        self.journal.commit('job2', 'SMD.ROUGHNESS_2020', 0, ['01001'])
+
+        self.assertEqual(self.journal.committed_batches('job1'), {0, 1})
+        self.assertEqual(WriteJournal(self.db_path).committed_batches('job2'), {0})  # Reopen the journal file
+
+        self.journal.finish('job1')
+        self.assertEqual(self.journal.committed_batches('job1'), set())
+        self.assertEqual(self.journal.committed_batches('job2'), {0})